@@ -6,6 +6,9 @@ from function_.business_functions import (
     get_user_engagement_report,
     forecast_pet_demand_by_breed_or_tag
 )
+from queries.mongo_db_queries import ensure_mongo_indexes
+from db.migrate import migrate
+from queries.graph_queries import check_graph_schema
 
 
 def run_example_calls():
@@ -26,8 +29,9 @@ def run_example_calls():
     print(f"Top {top_n} Cross-DB Connections for user {user_id}: {connections}")
 
     # 4) Low engagement pets report
-    low_engagement = get_low_engagement_pets_report()
-    print(f"Low Engagement Pets: {low_engagement}")
+    print("Low Engagement Pets:")
+    for pet in get_low_engagement_pets_report():
+        print(f"  {pet}")
 
     # 5) User engagement report
     engagement_report = get_user_engagement_report(user_id)
@@ -38,5 +42,22 @@ def run_example_calls():
     print(f"Forecast Pet Demand by Breed and Tag: {forecast}")
 
 
+def ensure_indexes():
+    # Pending SQL migrations (e.g. the pet_supply_counts table the demand
+    # forecast reads); applied once, under an advisory lock.
+    for version, name in migrate():
+        print(f"Applied SQL migration {version:04d}_{name}")
+    # Idempotent: only indexes that are missing get built.
+    report = ensure_mongo_indexes()
+    if report["created"]:
+        print(f"Created MongoDB indexes: {report['created']}")
+    for label, error in report["failed"]:
+        print(f"Could not create MongoDB index {label}: {error}")
+    # Graph constraints are created on demand (manage.py graph-schema);
+    # at startup we only warn if they are missing.
+    check_graph_schema()
+
+
 if __name__ == '__main__':
+    ensure_indexes()
     run_example_calls()
@@ -0,0 +1,33 @@
+"""
+Benchmark scripts. Run from the backend/ directory, e.g.
+
+    python -m benchmarks.sql_indexes
+"""
+import statistics
+import time
+
+
+def time_call(fn, repeat=20, warmup=2):
+    """Run `fn` `repeat` times and return (median_ms, p95_ms)."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return statistics.median(samples), p95
+
+
+def insert_batches(collection, docs, batch=10_000):
+    """insert_many `docs` (any iterable) into a MongoDB collection `batch` at a time."""
+    buffer = []
+    for doc in docs:
+        buffer.append(doc)
+        if len(buffer) >= batch:
+            collection.insert_many(buffer, ordered=False)
+            buffer = []
+    if buffer:
+        collection.insert_many(buffer, ordered=False)
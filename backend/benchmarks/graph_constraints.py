@@ -0,0 +1,103 @@
+"""
+get_shared_like_counts latency with and without the Neo4j uniqueness
+constraints from ensure_graph_schema().
+
+Adds a synthetic User/Pet/LIKES graph to the configured database, with ids
+starting at --id-offset so existing nodes are left alone, and deletes it at
+the end unless --keep is given. The constraints are dropped for the
+"without" run and re-created afterwards, so point it at a development
+database.
+
+    python -m benchmarks.graph_constraints --users 20000 --pets 50000 --likes 500000
+"""
+import argparse
+import random
+
+from benchmarks import time_call
+from queries.clients import registry
+from queries.graph_queries import (
+    GRAPH_CONSTRAINTS,
+    create_likes_edges,
+    ensure_graph_schema,
+    get_graph_constraints,
+    get_shared_like_counts,
+)
+
+BATCH = 10_000
+
+
+def run(query, **params):
+    with registry.neo4j_driver().session() as session:
+        return session.run(query, **params).consume()
+
+
+def populate(offset, n_users, n_pets, n_likes):
+    for label, count in (("User", n_users), ("Pet", n_pets)):
+        for start in range(0, count, BATCH):
+            ids = list(range(offset + start, offset + min(start + BATCH, count)))
+            run(f"UNWIND $ids AS id CREATE (:{label} {{id: id}})", ids=ids)
+    create_likes_edges(
+        ((offset + random.randrange(n_users), offset + random.randrange(n_pets))
+         for _ in range(n_likes)),
+        chunk_size=BATCH,
+    )
+
+
+def cleanup(offset, n_users, n_pets):
+    for label, count in (("User", n_users), ("Pet", n_pets)):
+        run(f"""
+            MATCH (n:{label}) WHERE n.id >= $lo AND n.id < $hi
+            CALL {{ WITH n DETACH DELETE n }} IN TRANSACTIONS OF 10000 ROWS
+        """, lo=offset, hi=offset + count)
+
+
+def drop_constraints():
+    present = get_graph_constraints()
+    for _, label, prop in GRAPH_CONSTRAINTS:
+        name = present.get((label, prop))
+        if name:
+            run(f"DROP CONSTRAINT {name} IF EXISTS")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Neo4j constraints.")
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--pets", type=int, default=50_000)
+    parser.add_argument("--likes", type=int, default=500_000)
+    parser.add_argument("--id-offset", type=int, default=100_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic graph")
+    args = parser.parse_args()
+
+    offset = args.id_offset
+    # Constraints first, or the populate MATCHes scan every node.
+    ensure_graph_schema()
+    print("Populating synthetic graph ...")
+    populate(offset, args.users, args.pets, args.likes)
+    user_ids = [offset + random.randrange(args.users) for _ in range(args.repeat)]
+
+    def sample():
+        for uid in user_ids:
+            get_shared_like_counts(uid)
+
+    try:
+        with_median, with_p95 = time_call(sample, repeat=3)
+        drop_constraints()
+        without_median, without_p95 = time_call(sample, repeat=3)
+    finally:
+        report = ensure_graph_schema()
+        for name, error in report["failed"]:
+            print(f"could not re-create {name}: {error}")
+        if not args.keep:
+            cleanup(offset, args.users, args.pets)
+
+    per_call = len(user_ids)
+    print(f"\nget_shared_like_counts over {per_call} users (ms per call)")
+    print(f"  without constraints: median {without_median / per_call:8.2f}  "
+          f"p95 {without_p95 / per_call:8.2f}")
+    print(f"  with constraints:    median {with_median / per_call:8.2f}  "
+          f"p95 {with_p95 / per_call:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Import/startup cost of the query modules, measured with `python -X importtime`
+in fresh interpreters. Each module is imported on its own, so the numbers
+show what a script that only needs that module pays.
+
+With --baseline REF the same measurement is repeated against the backend/
+tree of a git revision (exported to a temp directory), e.g. the commit
+before clients became lazy:
+
+    python -m benchmarks.import_time --baseline HEAD~1 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+MODULES = [
+    "queries.sql_queries",
+    "queries.mongo_db_queries",
+    "queries.graph_queries",
+    "function_.business_functions",
+]
+
+
+def import_cost(module, cwd):
+    """(cumulative importtime of `module` in ms, wall-clock ms of the interpreter)."""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, capture_output=True, text=True,
+    )
+    wall = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed in {cwd}:\n{proc.stderr.strip()[-2000:]}")
+
+    # Lines look like: "import time:  self [us] | cumulative | imported package"
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1000, wall
+    raise RuntimeError(f"no importtime entry for {module}")
+
+
+def measure(cwd, repeat):
+    results = {}
+    for module in MODULES:
+        samples = [import_cost(module, cwd) for _ in range(repeat)]
+        results[module] = (
+            statistics.median(s[0] for s in samples),
+            statistics.median(s[1] for s in samples),
+        )
+    return results
+
+
+def export_backend(backend, ref, target):
+    """Extract `backend` as of git revision `ref` into `target`; returns its path."""
+    top = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=backend,
+                         check=True, capture_output=True, text=True).stdout.strip()
+    prefix = os.path.relpath(backend, top).replace(os.sep, "/")
+    archive = os.path.join(target, "backend.tar")
+    with open(archive, "wb") as out:
+        # git archive limits its output to the cwd, so run it from the top level.
+        subprocess.run(["git", "archive", "--format=tar", f"{ref}:{prefix}"],
+                       cwd=top, check=True, stdout=out)
+    with tarfile.open(archive) as tar:
+        tar.extractall(os.path.join(target, "backend"))
+    return os.path.join(target, "backend")
+
+
+def print_results(label, results):
+    print(f"\n=== {label} ===")
+    print(f"{'module':32s} {'import (ms)':>12s} {'process (ms)':>13s}")
+    for module, (cumulative, wall) in results.items():
+        print(f"{module:32s} {cumulative:12.1f} {wall:13.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure query-module import time.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=None,
+                        help="git revision to compare against (e.g. HEAD~1)")
+    args = parser.parse_args()
+
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    current = measure(backend, args.repeat)
+    print_results("working tree", current)
+
+    if args.baseline is None:
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        # .env is untracked; copy it so the baseline connects the same way.
+        baseline_dir = export_backend(backend, args.baseline, tmp)
+        env_file = os.path.join(backend, ".env")
+        if os.path.exists(env_file):
+            with open(env_file, "rb") as src, open(os.path.join(baseline_dir, ".env"), "wb") as dst:
+                dst.write(src.read())
+        baseline = measure(baseline_dir, args.repeat)
+    print_results(f"baseline {args.baseline}", baseline)
+
+    print("\n=== import time, baseline -> working tree (median ms) ===")
+    for module in MODULES:
+        print(f"{module:32s} {baseline[module][0]:9.1f} -> {current[module][0]:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
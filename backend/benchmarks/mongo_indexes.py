@@ -0,0 +1,132 @@
+"""
+Collection-scan vs index-scan comparison for the MongoDB index bootstrap.
+
+Fills a scratch database with synthetic profiles, feedback, follow-ups and
+shelter reports, explains the hot queries without indexes, runs
+ensure_mongo_indexes() against the scratch database and explains them
+again. The scratch database is dropped at the end unless --keep is given.
+
+    python -m benchmarks.mongo_indexes --pets 200000 --feedback 1000000
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from benchmarks import insert_batches, time_call
+from queries.clients import registry
+from queries.mongo_db_queries import ensure_mongo_indexes, ensure_shelter_report_series
+
+BENCH_DB = "pet_tracker_bench"
+TAGS = ["good_with_kids", "calm", "energetic", "hypoallergenic",
+        "low_shedding", "independent", "playful"]
+
+
+def plan_stages(plan):
+    """All `stage` names in an explain plan, outermost first."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(plan_stages(item))
+    return stages
+
+
+def scan_kind(explain):
+    stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+    for kind in ("IXSCAN", "COUNT_SCAN", "COLLSCAN"):
+        if kind in stages:
+            return kind
+    return stages[0] if stages else "?"
+
+
+def populate(db, n_pets, n_users, n_feedback, n_follow_ups, n_shelters, days):
+    insert_batches(db.pet_profiles, (
+        {"pet_id": pid, "tags": random.sample(TAGS, 2), "gallery": [],
+         "healthHistory": [], "behaviorNotes": "", "dietaryNeeds": ""}
+        for pid in range(1, n_pets + 1)
+    ))
+    insert_batches(db.user_feedback, (
+        {"user_id": random.randint(1, n_users), "pet_id": random.randint(1, n_pets),
+         "reviewText": "", "rating": random.randint(1, 5)}
+        for _ in range(n_feedback)
+    ))
+    insert_batches(db.follow_up_reports, (
+        {"pet_id": random.randint(1, n_pets), "user_id": random.randint(1, n_users),
+         "energy_level": random.choice(["low", "medium", "high"])}
+        for _ in range(n_follow_ups)
+    ))
+    ensure_shelter_report_series(db)
+    first_day = datetime(2020, 1, 1)
+    insert_batches(db.shelter_report_series, (
+        {"shelter_id": sid, "date": first_day + timedelta(days=day),
+         "occupancy": random.randint(0, 50)}
+        for sid in range(1, n_shelters + 1) for day in range(days)
+    ))
+
+
+def queries(db, n_pets, n_users):
+    user_id = random.randint(1, n_users)
+    pet_id = random.randint(1, n_pets)
+    pet_ids = random.sample(range(1, n_pets + 1), 20)
+    return {
+        "find_pets_by_tags": (db.pet_profiles, {"tags": {"$in": ["calm", "playful"]}}),
+        "get_feedback_count_for_user": (db.user_feedback, {"user_id": user_id}),
+        "get_feedback_for_pet": (db.user_feedback, {"pet_id": pet_id}),
+        "get_shared_feedback_counts": (db.user_feedback,
+                                       {"user_id": {"$ne": user_id}, "pet_id": {"$in": pet_ids}}),
+        "get_follow_ups_for_pet": (db.follow_up_reports, {"pet_id": pet_id}),
+        "get_shelter_reports": (db.shelter_report_series, {"shelter_id": 1}),
+    }
+
+
+def measure(label, query_map, repeat):
+    print(f"\n=== {label} ===")
+    results = {}
+    for name, (collection, flt) in query_map.items():
+        explain = collection.find(flt).explain()
+        stats = explain.get("executionStats", {})
+        median, _ = time_call(lambda: list(collection.find(flt, {"_id": 1})), repeat=repeat)
+        results[name] = median
+        print(f"{name:30s} {scan_kind(explain):10s} docsExamined={stats.get('totalDocsExamined', '?'):>9} "
+              f"median {median:8.2f} ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the MongoDB index bootstrap.")
+    parser.add_argument("--pets", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--feedback", type=int, default=1_000_000)
+    parser.add_argument("--follow-ups", type=int, default=200_000)
+    parser.add_argument("--shelters", type=int, default=100)
+    parser.add_argument("--days", type=int, default=365 * 3)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args()
+
+    client = registry.mongo_client()
+    client.drop_database(BENCH_DB)
+    db = client[BENCH_DB]
+    print(f"Populating {BENCH_DB} ...")
+    populate(db, args.pets, args.users, args.feedback, args.follow_ups, args.shelters, args.days)
+
+    query_map = queries(db, args.pets, args.users)
+    before = measure("without indexes", query_map, args.repeat)
+    report = ensure_mongo_indexes(db)
+    print(f"\ncreated: {report['created']}")
+    after = measure("with indexes", query_map, args.repeat)
+
+    print("\n=== summary (median ms) ===")
+    for name in query_map:
+        print(f"{name:30s} {before[name]:9.2f} -> {after[name]:9.2f}")
+
+    if not args.keep:
+        client.drop_database(BENCH_DB)
+
+
+if __name__ == "__main__":
+    main()
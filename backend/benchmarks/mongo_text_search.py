@@ -0,0 +1,111 @@
+"""
+Indexed full-text search (search_pets) vs scanning profiles and reviews in
+Python, over a synthetic corpus in a scratch database (1M profiles by
+default). The scratch database is dropped at the end unless --keep is given.
+
+    python -m benchmarks.mongo_text_search --profiles 1000000 --reviews 500000
+"""
+import argparse
+import dataclasses
+import random
+import time
+
+from benchmarks import insert_batches, time_call
+from queries.clients import registry
+from queries.mongo_db_queries import ensure_mongo_indexes, search_pets
+
+BENCH_DB = "pet_tracker_text_bench"
+TAGS = ["good_with_kids", "calm", "energetic", "hypoallergenic",
+        "low_shedding", "independent", "playful"]
+BEHAVIOR = [
+    "good with cats", "good with kids", "shy around strangers", "loves long walks",
+    "house trained", "crate trained", "barks at the doorbell", "pulls on the leash",
+    "gentle with other dogs", "needs a quiet home", "very playful", "knows basic commands",
+    "anxious during storms", "enjoys car rides", "likes to cuddle", "escape artist",
+]
+DIET = ["grain-free", "senior formula", "no chicken", "wet food only", "raw diet",
+        "weight management", "sensitive stomach", "hypoallergenic kibble"]
+REVIEWS = ["lovely temperament", "great with our cat", "a bit shy at first",
+           "very energetic", "perfect family pet", "needed some training"]
+QUERIES = ["good with cats", "\"crate trained\"", "storms anxious", "grain-free -chicken"]
+
+
+def populate(db, n_profiles, n_reviews):
+    insert_batches(db.pet_profiles, (
+        {"pet_id": pid, "tags": random.sample(TAGS, 2), "gallery": [], "healthHistory": [],
+         "behaviorNotes": ". ".join(random.sample(BEHAVIOR, 3)).capitalize() + ".",
+         "dietaryNeeds": random.choice(DIET), "available": random.random() < 0.7}
+        for pid in range(1, n_profiles + 1)
+    ))
+    insert_batches(db.user_feedback, (
+        {"user_id": random.randint(1, 50_000), "pet_id": random.randint(1, n_profiles),
+         "reviewText": random.choice(REVIEWS), "rating": random.randint(1, 5),
+         "timestamp": "2024-01-01T00:00:00"}
+        for _ in range(n_reviews)
+    ))
+
+
+def python_scan(db, query, limit=20):
+    """What callers did before: pull every profile and review, match in Python."""
+    words = [w.strip('"').lower() for w in query.split() if not w.startswith("-")]
+    scores = {}
+    for doc in db.pet_profiles.find({}, {"_id": 0, "pet_id": 1, "behaviorNotes": 1,
+                                         "dietaryNeeds": 1}):
+        text = f"{doc.get('behaviorNotes', '')} {doc.get('dietaryNeeds', '')}".lower()
+        hits = sum(word in text for word in words)
+        if hits:
+            scores[doc["pet_id"]] = scores.get(doc["pet_id"], 0) + hits
+    for doc in db.user_feedback.find({}, {"_id": 0, "pet_id": 1, "reviewText": 1}):
+        text = (doc.get("reviewText") or "").lower()
+        hits = sum(word in text for word in words)
+        if hits:
+            scores[doc["pet_id"]] = scores.get(doc["pet_id"], 0) + hits / 2
+    return sorted(scores, key=scores.get, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full-text pet search.")
+    parser.add_argument("--profiles", type=int, default=1_000_000)
+    parser.add_argument("--reviews", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--no-scan", action="store_true",
+                        help="skip the (slow) Python scan baseline")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args()
+
+    # Point the query functions at the scratch database.
+    registry.configure(dataclasses.replace(registry.settings, mongo_db_name=BENCH_DB))
+    client = registry.mongo_client()
+    client.drop_database(BENCH_DB)
+    db = client[BENCH_DB]
+
+    print(f"Populating {BENCH_DB} ...")
+    started = time.perf_counter()
+    populate(db, args.profiles, args.reviews)
+    print(f"  {time.perf_counter() - started:.1f} s")
+    started = time.perf_counter()
+    ensure_mongo_indexes(db)
+    print(f"Indexes built in {time.perf_counter() - started:.1f} s")
+
+    print(f"\n{'query':28s} {'filters':24s} {'indexed (ms)':>13s} {'p95':>9s} {'scan (ms)':>11s}")
+    for query in QUERIES:
+        for label, kwargs in (("-", {}),
+                              ("available, tag=calm", {"available": True, "tags": ["calm"]})):
+            median, p95 = time_call(lambda: search_pets(query, **kwargs), repeat=args.repeat)
+            scan = "-"
+            if not args.no_scan and not kwargs:
+                scan_ms, _ = time_call(lambda: python_scan(db, query), repeat=1, warmup=0)
+                scan = f"{scan_ms:.0f}"
+            print(f"{query:28s} {label:24s} {median:13.2f} {p95:9.2f} {scan:>11s}")
+
+    sample = search_pets(QUERIES[0], limit=3)
+    print(f"\nsample hits for {QUERIES[0]!r}:")
+    for hit in sample:
+        print(f"  pet {hit['pet_id']} score {hit['score']:.2f}: {hit['snippets']}")
+
+    if not args.keep:
+        client.drop_database(BENCH_DB)
+
+
+if __name__ == "__main__":
+    main()
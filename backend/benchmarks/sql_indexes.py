@@ -0,0 +1,140 @@
+"""
+Query-plan and latency comparison for the SQL index migrations.
+
+Builds a throw-away `bench_indexes` schema with the production table layout,
+fills it with synthetic data (1M pets by default), times the hot SQL
+queries, applies every migration in db/migrations, and times them again.
+The schema is dropped at the end unless --keep is given.
+
+    python -m benchmarks.sql_indexes --pets 1000000
+"""
+import argparse
+
+from benchmarks import time_call
+from db.migrate import apply_migration_sql, discover_migrations
+from queries.sql_pool import get_connection
+
+SCHEMA = "bench_indexes"
+TABLES = ("users", "shelters", "pets", "adoptions", "staff", "follow_ups")
+
+QUERIES = {
+    "get_available_pet_ids": ("""
+        SELECT id FROM pets WHERE status = 'available';
+    """, ()),
+    "get_pets_by_ids": ("""
+        SELECT id, name, type, breed, gender, status
+          FROM pets
+         WHERE id = ANY(%s) AND status = 'available';
+    """, (list(range(1, 100_000, 997)),)),
+    "get_available_pets_count_by_breed": ("""
+        SELECT breed, COUNT(*) AS supply_count
+          FROM pets WHERE status = 'available' GROUP BY breed;
+    """, ()),
+    "get_shared_adoption_counts": ("""
+        SELECT a2.user_id AS other_id, COUNT(*) AS shared_count
+          FROM adoptions a1
+          JOIN adoptions a2 ON a1.pet_id = a2.pet_id
+         WHERE a1.user_id = %s AND a2.user_id <> %s
+      GROUP BY a2.user_id;
+    """, (42, 42)),
+    "get_adoption_count_for_user": ("""
+        SELECT COUNT(*) AS cnt FROM adoptions WHERE user_id = %s;
+    """, (42,)),
+}
+
+
+def build_schema(cur, n_pets, n_users, available_share):
+    cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;")
+    cur.execute(f"CREATE SCHEMA {SCHEMA};")
+    for table in TABLES:
+        cur.execute(f"""
+            CREATE TABLE {SCHEMA}.{table}
+                (LIKE public.{table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS);
+            ALTER TABLE {SCHEMA}.{table} ADD PRIMARY KEY (id);
+        """)
+    cur.execute(f"SET search_path TO {SCHEMA};")
+
+    cur.execute("""
+        INSERT INTO shelters (id, name, capacity)
+        SELECT g, 'Shelter ' || g, 50 FROM generate_series(1, 200) g;
+
+        INSERT INTO users (id, name, email, password_hash, role)
+        SELECT g, 'User ' || g, 'user' || g || '@example.com', 'x', 'adopter'
+          FROM generate_series(1, %(users)s) g;
+
+        INSERT INTO pets (id, name, age, type, breed, gender, shelter_id, status)
+        SELECT g, 'Pet ' || g, g %% 15, 'type_' || (g %% 7), 'breed_' || (g %% 35),
+               CASE WHEN g %% 2 = 0 THEN 'Male' ELSE 'Female' END,
+               1 + g %% 200,
+               CASE WHEN random() < %(available)s THEN 'available' ELSE 'adopted' END
+          FROM generate_series(1, %(pets)s) g;
+
+        INSERT INTO adoptions (id, user_id, pet_id)
+        SELECT row_number() OVER (), 1 + (random() * (%(users)s - 1))::int, id
+          FROM pets WHERE status = 'adopted';
+    """, {"users": n_users, "pets": n_pets, "available": available_share})
+    vacuum(cur)
+
+
+def vacuum(cur):
+    # Only the bench tables: a bare VACUUM would walk the whole database.
+    cur.execute("VACUUM ANALYZE " + ", ".join(f"{SCHEMA}.{t}" for t in TABLES) + ";")
+
+
+def explain(cur, query, params):
+    cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, params)
+    return [row["QUERY PLAN"] for row in cur.fetchall()]
+
+
+def measure(cur, label, repeat):
+    print(f"\n=== {label} ===")
+    results = {}
+    for name, (query, params) in QUERIES.items():
+        median, p95 = time_call(lambda: (cur.execute(query, params), cur.fetchall()),
+                                repeat=repeat)
+        results[name] = median
+        plan = explain(cur, query, params)
+        print(f"{name}: median {median:.2f} ms, p95 {p95:.2f} ms")
+        for line in plan[:4]:
+            print(f"    {line}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SQL index migrations.")
+    parser.add_argument("--pets", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--available-share", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="keep the bench schema")
+    args = parser.parse_args()
+
+    with get_connection() as conn:
+        # VACUUM cannot run inside a transaction block, and index-only scans
+        # need a fresh visibility map, so the whole run is in autocommit mode.
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                print(f"Building {SCHEMA} with {args.pets:,} pets ...")
+                build_schema(cur, args.pets, args.users, args.available_share)
+                before = measure(cur, "without migrations", args.repeat)
+
+                for version, name, path in discover_migrations():
+                    apply_migration_sql(cur, path)
+                vacuum(cur)
+                after = measure(cur, "with migrations", args.repeat)
+
+                print("\n=== summary (median ms) ===")
+                for name in QUERIES:
+                    speedup = before[name] / after[name] if after[name] else float("inf")
+                    print(f"{name:36s} {before[name]:9.2f} -> {after[name]:9.2f}  ({speedup:.1f}x)")
+
+                if not args.keep:
+                    cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE;")
+                cur.execute("RESET search_path;")
+        finally:
+            conn.autocommit = False
+
+
+if __name__ == "__main__":
+    main()
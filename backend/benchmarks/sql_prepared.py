@@ -0,0 +1,60 @@
+"""
+Per-call latency of the hot SQL reads in "simple" vs "prepared" execution
+mode, and of the engagement-report SQL reads done sequentially vs pipelined
+into one round trip. Runs against the configured database, so seed it first.
+
+    python -m benchmarks.sql_prepared --user-id 1 --repeat 500
+"""
+import argparse
+
+from benchmarks import time_call
+from queries import sql_queries
+from queries.sql_queries import (
+    get_adoption_count_for_user,
+    get_pets_by_ids,
+    get_user_by_id,
+    get_user_with_adoption_count,
+    set_execution_mode,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prepared and pipelined SQL reads.")
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--pet-ids", type=int, nargs="+", default=list(range(1, 51)))
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    calls = {
+        "get_user_by_id": lambda: get_user_by_id(args.user_id),
+        "get_pets_by_ids": lambda: get_pets_by_ids(args.pet_ids),
+        "get_adoption_count_for_user": lambda: get_adoption_count_for_user(args.user_id),
+    }
+
+    results = {}
+    for mode in sql_queries.EXECUTION_MODES:
+        set_execution_mode(mode)
+        for name, fn in calls.items():
+            results[(name, mode)] = time_call(fn, repeat=args.repeat, warmup=10)
+
+    print(f"{'query':32s} {'simple (ms)':>14s} {'prepared (ms)':>14s}")
+    for name in calls:
+        simple, _ = results[(name, "simple")]
+        prepared, _ = results[(name, "prepared")]
+        print(f"{name:32s} {simple:14.3f} {prepared:14.3f}")
+
+    set_execution_mode("simple")
+    sequential, _ = time_call(
+        lambda: (get_user_by_id(args.user_id), get_adoption_count_for_user(args.user_id)),
+        repeat=args.repeat, warmup=10,
+    )
+    pipelined, _ = time_call(
+        lambda: get_user_with_adoption_count(args.user_id),
+        repeat=args.repeat, warmup=10,
+    )
+    print(f"\nuser + adoption count: sequential {sequential:.3f} ms, "
+          f"pipelined {pipelined:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# backend/db/migrate.py
+"""
+Versioned schema migrations for the PostgreSQL database.
+
+`db/init.sql` is the baseline schema (version 0). Every later change lives in
+`db/migrations/NNNN_description.sql` and is applied exactly once, in version
+order, each in its own transaction. Applied versions are recorded in the
+`schema_migrations` table.
+"""
+import re
+from pathlib import Path
+
+from queries.sql_pool import get_connection
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+_FILENAME = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# Arbitrary key for pg_advisory_xact_lock so that two processes starting up
+# at the same time do not apply the same migration twice.
+_LOCK_KEY = 440_0001
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """
+    Return [(version, name, path), ...] for every migration file,
+    sorted by version.
+    """
+    migrations = []
+    for path in Path(directory).iterdir():
+        match = _FILENAME.match(path.name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), path))
+    migrations.sort()
+
+    versions = [m[0] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"duplicate migration versions in {directory}")
+    return migrations
+
+
+def _ensure_migrations_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version    INTEGER PRIMARY KEY,
+            name       TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+    """)
+
+
+def get_applied_versions():
+    """Return the set of migration versions already applied."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            _ensure_migrations_table(cur)
+            cur.execute("SELECT version FROM schema_migrations;")
+            return {row["version"] for row in cur.fetchall()}
+
+
+def get_pending_migrations():
+    """Return the migrations that have not been applied yet."""
+    applied = get_applied_versions()
+    return [m for m in discover_migrations() if m[0] not in applied]
+
+
+def apply_migration_sql(cur, path):
+    """Run the statements of one migration file on an open cursor."""
+    cur.execute(Path(path).read_text(encoding="utf-8"))
+
+
+def migrate(target=None):
+    """
+    Apply pending migrations up to and including `target` (all if None).
+    Returns a list of (version, name) that were applied.
+    """
+    applied = []
+    for version, name, path in discover_migrations():
+        if target is not None and version > target:
+            break
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                _ensure_migrations_table(cur)
+                cur.execute("SELECT pg_advisory_xact_lock(%s);", (_LOCK_KEY,))
+                cur.execute("SELECT 1 FROM schema_migrations WHERE version = %s;", (version,))
+                if cur.fetchone():
+                    continue
+                apply_migration_sql(cur, path)
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s);",
+                    (version, name)
+                )
+        applied.append((version, name))
+    return applied
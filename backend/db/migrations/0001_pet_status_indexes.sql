@@ -0,0 +1,17 @@
+-- Secondary indexes for the pets hot paths.
+
+-- get_available_pet_ids / get_pets_by_ids: only ever read available pets,
+-- so a partial index on id keeps those lookups to the available slice.
+CREATE INDEX IF NOT EXISTS idx_pets_available_id
+    ON pets (id)
+ WHERE status = 'available';
+
+-- get_available_pets_count_by_breed: GROUP BY breed over available pets
+-- becomes an index-only scan.
+CREATE INDEX IF NOT EXISTS idx_pets_available_breed
+    ON pets (breed)
+ WHERE status = 'available';
+
+-- Foreign key lookups (shelter pages, ON DELETE CASCADE from shelters).
+CREATE INDEX IF NOT EXISTS idx_pets_shelter_id
+    ON pets (shelter_id);
@@ -0,0 +1,15 @@
+-- Secondary indexes for the adoptions hot paths.
+
+-- get_adoption_count_for_user and the a1 side of the
+-- get_shared_adoption_counts self-join.
+CREATE INDEX IF NOT EXISTS idx_adoptions_user_pet
+    ON adoptions (user_id, pet_id);
+
+-- The a2 side of get_shared_adoption_counts: join on pet_id, read user_id
+-- straight from the index.
+CREATE INDEX IF NOT EXISTS idx_adoptions_pet_user
+    ON adoptions (pet_id, user_id);
+
+-- Foreign key lookups (ON DELETE CASCADE from adoptions).
+CREATE INDEX IF NOT EXISTS idx_follow_ups_adoption_id
+    ON follow_ups (adoption_id);
@@ -0,0 +1,13 @@
+-- Indexes for the keyset-paginated pet catalog (get_pet_catalog).
+-- Each one serves an equality filter on status plus one attribute and
+-- returns rows already ordered by id, so a page is a short range scan
+-- starting right after the previous page's last id.
+
+CREATE INDEX IF NOT EXISTS idx_pets_status_type_id
+    ON pets (status, type, id);
+
+CREATE INDEX IF NOT EXISTS idx_pets_status_breed_id
+    ON pets (status, breed, id);
+
+CREATE INDEX IF NOT EXISTS idx_pets_status_shelter_id
+    ON pets (status, shelter_id, id);
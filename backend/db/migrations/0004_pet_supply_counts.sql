@@ -0,0 +1,110 @@
+-- Available-pet counters per (breed, type, shelter), kept in sync with
+-- `pets` by statement-level triggers so supply reads no longer scan pets.
+--
+-- NULL breed/type/shelter_id are stored as '' / '' / 0 so the key can be
+-- a plain primary key; readers map them back with NULLIF.
+
+LOCK TABLE pets IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE TABLE IF NOT EXISTS pet_supply_counts (
+    breed           VARCHAR(100) NOT NULL,
+    type            VARCHAR(50)  NOT NULL,
+    shelter_id      INTEGER      NOT NULL,
+    available_count INTEGER      NOT NULL DEFAULT 0,
+    PRIMARY KEY (breed, type, shelter_id)
+);
+
+-- Supply by breed reads (breed, available_count) straight from this index.
+CREATE INDEX IF NOT EXISTS idx_pet_supply_counts_breed
+    ON pet_supply_counts (breed) INCLUDE (available_count);
+
+DELETE FROM pet_supply_counts;
+INSERT INTO pet_supply_counts (breed, type, shelter_id, available_count)
+SELECT COALESCE(breed, ''), COALESCE(type, ''), COALESCE(shelter_id, 0), COUNT(*)
+  FROM pets
+ WHERE status = 'available'
+ GROUP BY 1, 2, 3;
+
+
+CREATE OR REPLACE FUNCTION pet_supply_counts_on_insert() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO pet_supply_counts AS c (breed, type, shelter_id, available_count)
+    SELECT COALESCE(breed, ''), COALESCE(type, ''), COALESCE(shelter_id, 0), COUNT(*)
+      FROM new_pets
+     WHERE status = 'available'
+     GROUP BY 1, 2, 3
+     ORDER BY 1, 2, 3
+    ON CONFLICT (breed, type, shelter_id)
+    DO UPDATE SET available_count = c.available_count + EXCLUDED.available_count;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION pet_supply_counts_on_update() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO pet_supply_counts AS c (breed, type, shelter_id, available_count)
+    SELECT breed, type, shelter_id, SUM(delta)
+      FROM (
+            SELECT COALESCE(breed, '') AS breed, COALESCE(type, '') AS type,
+                   COALESCE(shelter_id, 0) AS shelter_id, 1 AS delta
+              FROM new_pets
+             WHERE status = 'available'
+            UNION ALL
+            SELECT COALESCE(breed, ''), COALESCE(type, ''),
+                   COALESCE(shelter_id, 0), -1
+              FROM old_pets
+             WHERE status = 'available'
+           ) changes
+     GROUP BY 1, 2, 3
+    HAVING SUM(delta) <> 0
+     ORDER BY 1, 2, 3
+    ON CONFLICT (breed, type, shelter_id)
+    DO UPDATE SET available_count = c.available_count + EXCLUDED.available_count;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION pet_supply_counts_on_delete() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO pet_supply_counts AS c (breed, type, shelter_id, available_count)
+    SELECT COALESCE(breed, ''), COALESCE(type, ''), COALESCE(shelter_id, 0), -COUNT(*)
+      FROM old_pets
+     WHERE status = 'available'
+     GROUP BY 1, 2, 3
+     ORDER BY 1, 2, 3
+    ON CONFLICT (breed, type, shelter_id)
+    DO UPDATE SET available_count = c.available_count + EXCLUDED.available_count;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION pet_supply_counts_on_truncate() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM pet_supply_counts;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+DROP TRIGGER IF EXISTS pets_supply_counts_insert ON pets;
+CREATE TRIGGER pets_supply_counts_insert
+    AFTER INSERT ON pets
+    REFERENCING NEW TABLE AS new_pets
+    FOR EACH STATEMENT EXECUTE FUNCTION pet_supply_counts_on_insert();
+
+DROP TRIGGER IF EXISTS pets_supply_counts_update ON pets;
+CREATE TRIGGER pets_supply_counts_update
+    AFTER UPDATE ON pets
+    REFERENCING OLD TABLE AS old_pets NEW TABLE AS new_pets
+    FOR EACH STATEMENT EXECUTE FUNCTION pet_supply_counts_on_update();
+
+DROP TRIGGER IF EXISTS pets_supply_counts_delete ON pets;
+CREATE TRIGGER pets_supply_counts_delete
+    AFTER DELETE ON pets
+    REFERENCING OLD TABLE AS old_pets
+    FOR EACH STATEMENT EXECUTE FUNCTION pet_supply_counts_on_delete();
+
+DROP TRIGGER IF EXISTS pets_supply_counts_truncate ON pets;
+CREATE TRIGGER pets_supply_counts_truncate
+    AFTER TRUNCATE ON pets
+    FOR EACH STATEMENT EXECUTE FUNCTION pet_supply_counts_on_truncate();
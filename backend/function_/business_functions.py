@@ -9,32 +9,39 @@ from queries.graph_queries import (
     get_pet_like_counts,
     get_adopted_pet_ids,
     get_shared_like_counts,
-    get_unliked_pet_ids,
+    filter_unliked_pet_ids,
     get_shared_preference_tag_counts,
     get_like_count_for_user,
     get_like_counts_by_breed,
     get_like_counts_by_tag
 )
 from queries.mongo_db_queries import (
-    find_pets_by_tags,
+    get_top_pets_by_tag_overlap,
     get_average_rating_for_pet,
     get_average_ratings_for_all_pets, 
-    pet_profiles,
     get_shared_feedback_counts,
-    get_reviewed_pet_ids,
+    filter_reviewed_pet_ids,
     get_feedback_count_for_user,
-    get_supply_counts_by_tag
+    get_supply_counts_by_tag,
+    get_follow_up_analytics,
+    get_first_follow_ups,
+    search_pets
 )
                                       
 from queries.sql_queries import (
     get_pets_by_ids,
     get_user_by_id,
-    get_available_pet_ids,
+    get_users_by_ids,
+    iter_available_pet_ids,
+    iter_pets_by_ids,
     get_shared_adoption_counts,
-    get_adoption_count_for_user,
-    get_available_pets_count_by_breed
+    get_user_with_adoption_count,
+    get_available_pets_count_by_breed,
+    iter_adoptions_with_pets
 ) 
-import os
+import heapq
+from collections import defaultdict
+from datetime import date, timedelta
 
 def get_top_recommended_pets_for_user(user_id, top_n = 5):
     """
@@ -43,8 +50,8 @@ def get_top_recommended_pets_for_user(user_id, top_n = 5):
     Workflow:
       1. Fetch user's preferred tags from Neo4j.
       2. Fetch pet IDs user has already interacted with (LIKES or ADOPTED).
-      3. Query MongoDB for pets matching those tags (raw profile lookup).
-      4. Score and sort pets by tag overlap (in Python).
+      3-4. Score pets by tag overlap, drop adopted ones, sort and keep
+           top_n, all in one MongoDB aggregation.
       5. Fetch final pet details from PostgreSQL for those top IDs.
     """
     user = get_user_by_id(user_id)
@@ -54,20 +61,12 @@ def get_top_recommended_pets_for_user(user_id, top_n = 5):
     preferred_tags = _get_preferred_tags(user_id)
     # 2. Pet IDs the user has liked or adopted already
     
-    adopted_ids = set(get_adopted_pet_ids(user_id))
+    adopted_ids = get_adopted_pet_ids(user_id)
 
-    matching_profiles = find_pets_by_tags(preferred_tags)
-
-    # 4. Score by overlap, exclude seen pets
-    scored = []
-    for profile in matching_profiles:
-        pid = profile['pet_id']
-        if pid in adopted_ids:
-            continue
-        overlap = len(set(profile.get('tags', [])) & set(preferred_tags))
-        scored.append((overlap, pid))
-    scored.sort(key=lambda x: -x[0])
-    top_ids = [pid for _, pid in scored[:top_n]]
+    # 3-4. Overlap score, exclusion, sort and limit run server-side;
+    #      only pet_id and score come back
+    top = get_top_pets_by_tag_overlap(preferred_tags, adopted_ids, top_n)
+    top_ids = [doc['pet_id'] for doc in top]
 
     # 5. Get full pet details from SQL
     return get_pets_by_ids(top_ids)
@@ -81,22 +80,16 @@ def get_most_adoptable_pet_profiles(top_n):
       - High average feedback rating (MongoDB)
       - Currently available (PostgreSQL)
     """
-    # 1. Get all available pet IDs
-    available_ids = get_available_pet_ids()
-
-    # 2. Get like counts and average ratings
+    # 1. Get like counts and average ratings
     like_counts = {d['pet_id']: d['like_count'] for d in get_pet_like_counts()}
     avg_ratings = get_average_ratings_for_all_pets()
 
-    # 3. Compute a simple composite score: like_count + avg_rating
-    scores = []
-    for pid in available_ids:
-        score = like_counts.get(pid, 0) + avg_ratings.get(pid, 0)
-        scores.append((score, pid))
+    # 2. Composite score: like_count + avg_rating
+    def score(pid):
+        return like_counts.get(pid, 0) + avg_ratings.get(pid, 0)
 
-    # 4. Sort and pick top_n
-    scores.sort(key=lambda x: -x[0])
-    top_ids = [pid for _, pid in scores[:top_n]]
+    # 3-4. Stream the available pet IDs and keep only the top_n on a heap
+    top_ids = heapq.nlargest(top_n, iter_available_pet_ids(), key=score)
 
     # 5. Fetch full pet details
     return get_pets_by_ids(top_ids)
@@ -125,33 +118,36 @@ def get_top_crossdb_user_connections(user_id, top_n):
     # 3. rank and pick top_n
     top_ids = sorted(scores, key=lambda uid: -scores[uid])[:top_n]
 
-    # 4. fetch their user records
-    return [get_user_by_id(uid) for uid in top_ids]
+    # 4. fetch their names in one query; users deleted meanwhile drop out
+    return [user for user in get_users_by_ids(top_ids, columns=("name",)) if user is not None]
 
-def get_low_engagement_pets_report():
+LOW_ENGAGEMENT_CHUNK_SIZE = 1000
+
+def get_low_engagement_pets_report(chunk_size=LOW_ENGAGEMENT_CHUNK_SIZE):
     """
-    Find all pets that:
+    Yield the pets that are:
+      • available (PostgreSQL),
       • have NO LIKES (Neo4j),
       • have NO reviews (MongoDB),
-      • have been available > `days` days (PostgreSQL).
-    Returns a list of full pet records (dicts) from SQL.
+    as full pet records (dicts) from SQL. Available ids are streamed and
+    checked `chunk_size` at a time, so memory stays flat however large the
+    catalog is.
     """
-    # 1. Pets nobody's liked
-    unliked = set(get_unliked_pet_ids())
-
-    # 2. Pets with no user_feedback
-    reviewed = set(get_reviewed_pet_ids())
-
-    # 3. Pets still available and older than `days`
-    available = set(get_available_pet_ids())
-
-    # 4. Intersection: unliked ∩ old_available ∖ reviewed
-    low_ids = sorted(unliked & available  - reviewed)
-    if not low_ids:
-        return []
+    def low_engagement(chunk):
+        # 1-2. of this chunk, pets nobody's liked and nobody's reviewed
+        unliked = filter_unliked_pet_ids(chunk)
+        reviewed = set(filter_reviewed_pet_ids(unliked)) if unliked else set()
+        # 3. stream their detailed rows from SQL
+        yield from iter_pets_by_ids([pid for pid in unliked if pid not in reviewed])
 
-    # 5. Fetch detailed rows from SQL
-    return get_pets_by_ids(low_ids)
+    chunk = []
+    for pid in iter_available_pet_ids():
+        chunk.append(pid)
+        if len(chunk) >= chunk_size:
+            yield from low_engagement(chunk)
+            chunk = []
+    if chunk:
+        yield from low_engagement(chunk)
 
 def get_user_engagement_report(user_id: int) -> dict | None:
     """
@@ -162,7 +158,8 @@ def get_user_engagement_report(user_id: int) -> dict | None:
 
     Returns None if the user doesn’t exist.
     """
-    user = get_user_by_id(user_id)
+    # user check + adoption count share one SQL round trip
+    user, adoptions = get_user_with_adoption_count(user_id)
     if not user:
         return None
 
@@ -171,7 +168,7 @@ def get_user_engagement_report(user_id: int) -> dict | None:
         "name":       user["name"],
         "likes":      get_like_count_for_user(user_id),
         "feedbacks":  get_feedback_count_for_user(user_id),
-        "adoptions":  get_adoption_count_for_user(user_id),
+        "adoptions":  adoptions,
     }
 
 def forecast_pet_demand_by_breed_or_tag() -> dict:
@@ -212,4 +209,83 @@ def forecast_pet_demand_by_breed_or_tag() -> dict:
         ratio = (d / s) if s else None
         report["by_tag"][tag] = {"demand": d, "supply": s, "ratio": ratio}
 
-    return report
\ No newline at end of file
+    return report
+
+
+FOLLOW_UP_CHUNK_SIZE = 1000
+
+def get_follow_up_report(days=30, as_of=None, trend_months=12) -> dict:
+    """
+    Post-adoption follow-up report:
+      - energy-level trends per pet, breed and shelter (monthly average,
+        low=1 .. high=3) over the last `trend_months` calendar months,
+        from one MongoDB $facet pass
+      - the share of adoptions at least `days` old (as of `as_of`, default
+        today) without a follow-up within `days` of adopting
+      - per-shelter compliance: share of those adoptions followed up in time
+    Returns:
+    {
+      "energy_trends": {"by_pet": {...}, "by_breed": {...}, "by_shelter": {...}},
+      "adoptions_due": int,
+      "no_follow_up_share": float | None,
+      "shelter_compliance": {shelter_id: {"due": int, "on_time": int, "compliance": float}}
+    }
+    """
+    as_of = as_of or date.today()
+    months_back = as_of.year * 12 + as_of.month - 1 - (trend_months - 1)
+    trend_since = date(months_back // 12, months_back % 12 + 1, 1)
+    trends = get_follow_up_analytics(since=trend_since.isoformat())
+
+    # Only adoptions old enough for the follow-up to be due are counted;
+    # they are streamed from PostgreSQL and their first follow-ups looked
+    # up a chunk at a time.
+    due = missing = 0
+    per_shelter = defaultdict(lambda: {"due": 0, "on_time": 0})
+
+    def tally(adoptions):
+        nonlocal due, missing
+        first_reports = get_first_follow_ups([a["adoption_id"] for a in adoptions])
+        for adoption in adoptions:
+            deadline = adoption["adoption_date"] + timedelta(days=days)
+            first = (first_reports.get(adoption["adoption_id"]) or {}).get("first_report")
+            on_time = first is not None and first.date() <= deadline
+
+            due += 1
+            missing += not on_time
+            shelter = per_shelter[adoption["shelter_id"]]
+            shelter["due"] += 1
+            shelter["on_time"] += on_time
+
+    chunk = []
+    for adoption in iter_adoptions_with_pets(adopted_before=as_of - timedelta(days=days)):
+        chunk.append(adoption)
+        if len(chunk) >= FOLLOW_UP_CHUNK_SIZE:
+            tally(chunk)
+            chunk = []
+    if chunk:
+        tally(chunk)
+
+    return {
+        "energy_trends": trends,
+        "adoptions_due": due,
+        "no_follow_up_share": (missing / due) if due else None,
+        "shelter_compliance": {
+            shelter_id: {**counts, "compliance": counts["on_time"] / counts["due"]}
+            for shelter_id, counts in per_shelter.items()
+        },
+    }
+
+
+def search_adoptable_pets(query, tags=None, top_n=10):
+    """
+    Full-text search ("good with cats") over profiles and reviews, limited
+    to available pets and optionally to any of `tags`. Returns up to top_n
+    pet dicts from PostgreSQL, best match first, each with its text-search
+    "score" and "snippets".
+    """
+    hits = search_pets(query, tags=tags, available=True, limit=top_n)
+    pets = {pet["id"]: pet for pet in get_pets_by_ids([hit["pet_id"] for hit in hits])}
+    return [
+        {**pets[hit["pet_id"]], "score": hit["score"], "snippets": hit["snippets"]}
+        for hit in hits if hit["pet_id"] in pets
+    ]
@@ -1,30 +1,41 @@
 # backend/functions/core_create.py
 
+from datetime import datetime, timezone
+from itertools import islice
+
 from queries.sql_queries import (
     add_user,
     add_pet,
+    add_pets_bulk,
     add_shelter,
-    add_adoption
+    add_adoption,
+    set_pet_status,
+    iter_available_pet_ids,
+    iter_adoptions_with_pets
 )
 
 from queries.graph_queries import (
     create_user as create_user_neo4j,
-    create_pet as create_pet_neo4j,
     create_shelter as create_shelter_neo4j,
-    create_breed,
-    link_pet_to_breed,
-    link_pet_to_shelter,
-    link_pet_to_tag,
+    upsert_pet,
+    upsert_pets,
     create_adopted_relationship,
-    link_user_to_preference_tag
+    link_users_to_preference_tags
 )
 
 from queries.mongo_db_queries import (
     insert_pet_profile,
+    insert_pet_profiles_bulk,
     insert_user_feedback,
-    get_liked_tags_by_user
+    get_liked_tags_by_user,
+    set_pet_profile_availability,
+    mark_profiles_available,
+    mark_unstamped_profiles_unavailable,
+    set_follow_up_context
 )
 
+AVAILABILITY_SYNC_BATCH = 5000
+
 
 def create_user(name, email, password_hash, role):
     """Create user in both PostgreSQL and Neo4j."""
@@ -37,27 +48,86 @@ def create_pet(name, age, type_, breed, gender, shelter_id, status="available",
                tags=None, gallery=None, behavior_notes=None, dietary_needs=None, health_history=None):
     """Create pet in PostgreSQL, MongoDB, and Neo4j."""
     pet = add_pet(name, age, type_, breed, gender, shelter_id, status)
-    create_pet_neo4j(pet['id'], name)
-    
-    if breed:
-        create_breed(breed)
-        link_pet_to_breed(pet['id'], breed)
-    if shelter_id:
-        link_pet_to_shelter(pet['id'], shelter_id)
-    if tags:
-        for tag in tags:
-            link_pet_to_tag(pet['id'], tag)
-    
+    # node, breed, shelter and tag edges in one graph transaction
+    upsert_pet(pet['id'], name, breed, shelter_id, tags)
+
     insert_pet_profile(
         pet_id=pet['id'],
         gallery=gallery or [],
         tags=tags or [],
         health_history=health_history or [],
         behavior_notes=behavior_notes or "",
-        dietary_needs=dietary_needs or ""
+        dietary_needs=dietary_needs or "",
+        available=(status == "available")
+    )
+    return pet
+
+def create_pets(records):
+    """
+    Bulk variant of create_pet, e.g. for a whole shelter's intake. Each
+    record is a dict with create_pet's keyword arguments. Every store is
+    written in bulk: one multi-row INSERT, one graph upsert per
+    GRAPH_BATCH_SIZE pets and unordered profile inserts. Returns
+      {"pets": [...], "profile_errors": [{"pet_id", "index", "code", "errmsg"}, ...]}
+    with the created pets in input order and the MongoDB profiles that
+    could not be inserted (the pet exists in PostgreSQL and Neo4j).
+    """
+    records = list(records)
+    pets = add_pets_bulk(records)
+    upsert_pets(
+        {"pet_id": pet['id'], "name": pet['name'], "breed": pet['breed'],
+         "shelter_id": pet['shelter_id'], "tags": record.get("tags")}
+        for pet, record in zip(pets, records)
+    )
+    result = insert_pet_profiles_bulk(
+        {
+            "pet_id": pet['id'],
+            "gallery": record.get("gallery") or [],
+            "tags": record.get("tags") or [],
+            "health_history": record.get("health_history") or [],
+            "behavior_notes": record.get("behavior_notes") or "",
+            "dietary_needs": record.get("dietary_needs") or "",
+            "available": pet['status'] == "available"
+        }
+        for pet, record in zip(pets, records)
     )
+    profile_errors = [{"pet_id": pets[err["index"]]['id'], **err} for err in result["errors"]]
+    return {"pets": pets, "profile_errors": profile_errors}
+
+def update_pet_status(pet_id, status):
+    """Change a pet's status in PostgreSQL and mirror it onto its MongoDB profile."""
+    pet = set_pet_status(pet_id, status)
+    if pet:
+        set_pet_profile_availability(pet_id, status == "available")
     return pet
 
+def sync_pet_profile_availability(batch_size=AVAILABILITY_SYNC_BATCH):
+    """
+    Re-derive every pet_profiles `available` flag from PostgreSQL, e.g. to
+    backfill existing profiles or repair drift. Available ids are streamed
+    from SQL in batches and stamped; every profile left unstamped is then
+    marked unavailable. Returns the number of available pets seen.
+    """
+    token = datetime.now(timezone.utc).isoformat()
+    ids = iter_available_pet_ids(fetch_size=batch_size)
+    seen = 0
+    while True:
+        batch = list(islice(ids, batch_size))
+        if not batch:
+            break
+        mark_profiles_available(batch, token)
+        seen += len(batch)
+    mark_unstamped_profiles_unavailable(token)
+    return seen
+
+def backfill_follow_up_context():
+    """
+    Copy adoption_id, breed and shelter_id from PostgreSQL onto follow-up
+    reports written without them. Adoptions are streamed newest first (see
+    set_follow_up_context). Returns the number of reports updated.
+    """
+    return set_follow_up_context(iter_adoptions_with_pets(newest_first=True))
+
 def create_shelter(name, address, phone_number, capacity):
     """Create shelter in PostgreSQL and Neo4j."""
     shelter = add_shelter(name, address, phone_number, capacity)  # SQL
@@ -69,9 +139,8 @@ def create_adoption(user_id, pet_id, success_notes=None):
     adoption = add_adoption(user_id, pet_id, success_notes)
     create_adopted_relationship(user_id, pet_id)
     
-    # Sync tag preferences to Neo4j from MongoDB
+    # Sync tag preferences to Neo4j from MongoDB, one UNWIND write
     tags = get_liked_tags_by_user(user_id)
-    for tag in tags:
-        link_user_to_preference_tag(user_id, tag)
+    link_users_to_preference_tags([(user_id, tag) for tag in tags])
     
     return adoption
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""
+Maintenance commands for the Pet-Adoption Tracker databases.
+
+Run from the backend/ directory, e.g.:
+
+    python manage.py migrate
+    python manage.py migrate --status
+    python manage.py supply-counts verify
+    python manage.py mongo-indexes
+    python manage.py rating-stats verify
+    python manage.py rating-stats rebuild
+    python manage.py sync-availability
+    python manage.py shelter-reports migrate
+    python manage.py shelter-reports rebuild-rollups
+    python manage.py backfill-follow-ups
+    python manage.py graph-schema
+    python manage.py graph-schema --check
+    python manage.py like-counts reconcile
+"""
+import argparse
+
+
+def cmd_migrate(args):
+    from db.migrate import discover_migrations, get_applied_versions, migrate
+
+    if args.status:
+        applied = get_applied_versions()
+        for version, name, _ in discover_migrations():
+            state = "applied" if version in applied else "pending"
+            print(f"{version:04d}_{name}: {state}")
+        return
+
+    done = migrate(target=args.target)
+    if not done:
+        print("Database schema is up to date.")
+    for version, name in done:
+        print(f"Applied {version:04d}_{name}")
+
+
+def cmd_supply_counts(args):
+    from queries.sql_queries import rebuild_pet_supply_counts, verify_pet_supply_counts
+
+    if args.action == "rebuild":
+        rows = rebuild_pet_supply_counts()
+        print(f"Rebuilt pet_supply_counts ({rows} rows).")
+        return
+
+    drift = verify_pet_supply_counts()
+    if not drift:
+        print("pet_supply_counts matches pets.")
+    for row in drift:
+        print(f"breed={row['breed']!r} type={row['type']!r} shelter_id={row['shelter_id']}: "
+              f"expected {row['expected']}, stored {row['stored']}")
+
+
+def print_index_report(report):
+    for label in report["created"]:
+        print(f"created  {label}")
+    for label in report["existing"]:
+        print(f"exists   {label}")
+    for label, error in report["failed"]:
+        print(f"FAILED   {label}: {error}")
+
+
+def cmd_mongo_indexes(args):
+    from queries.mongo_db_queries import ensure_mongo_indexes
+
+    print_index_report(ensure_mongo_indexes())
+
+
+def cmd_rating_stats(args):
+    from queries.mongo_db_queries import rebuild_rating_stats, verify_rating_stats
+
+    if args.action == "rebuild":
+        pets = rebuild_rating_stats()
+        print(f"Rebuilt pet_rating_stats for {pets} pets.")
+        return
+
+    drift = verify_rating_stats()
+    if not drift:
+        print("pet_rating_stats matches user_feedback.")
+    for row in drift:
+        print(f"pet_id={row['pet_id']}: expected {row['expected']}, stored {row['stored']}")
+
+
+def cmd_sync_availability(args):
+    from function_.core_functions import sync_pet_profile_availability
+
+    available = sync_pet_profile_availability()
+    print(f"Synced pet_profiles availability ({available} available pets).")
+
+
+def cmd_shelter_reports(args):
+    from queries.mongo_db_queries import migrate_legacy_shelter_reports, rebuild_shelter_rollups
+
+    if args.action == "rebuild-rollups":
+        rollups = rebuild_shelter_rollups()
+        print(f"Rebuilt shelter_report_rollups ({rollups} rollups).")
+        return
+
+    result = migrate_legacy_shelter_reports()
+    print(f"Migrated {result['migrated']} shelter reports to shelter_report_series.")
+    for legacy_id, error in result["skipped"]:
+        print(f"skipped {legacy_id}: {error}")
+
+
+def cmd_backfill_follow_ups(args):
+    from function_.core_functions import backfill_follow_up_context
+
+    updated = backfill_follow_up_context()
+    print(f"Backfilled adoption context on {updated} follow-up reports.")
+
+
+def cmd_graph_schema(args):
+    from queries.graph_queries import check_graph_schema, ensure_graph_schema
+
+    if args.check:
+        missing = check_graph_schema()
+        print("Neo4j constraints are in place." if not missing
+              else f"Missing Neo4j constraints: {', '.join(missing)}")
+        return
+    print_index_report(ensure_graph_schema())
+
+
+def cmd_like_counts(args):
+    from queries.graph_queries import reconcile_like_counts
+
+    liked = reconcile_like_counts()
+    print(f"Recomputed like counters ({liked} liked pets).")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("migrate", help="apply pending SQL migrations")
+    p.add_argument("--target", type=int, default=None,
+                   help="stop after this migration version")
+    p.add_argument("--status", action="store_true",
+                   help="list migrations and whether they are applied")
+    p.set_defaults(func=cmd_migrate)
+
+    p = commands.add_parser("supply-counts",
+                            help="verify or rebuild the available-pet counters")
+    p.add_argument("action", choices=("verify", "rebuild"))
+    p.set_defaults(func=cmd_supply_counts)
+
+    p = commands.add_parser("mongo-indexes", help="create missing MongoDB indexes")
+    p.set_defaults(func=cmd_mongo_indexes)
+
+    p = commands.add_parser("rating-stats",
+                            help="verify or recompute per-pet rating stats from raw feedback")
+    p.add_argument("action", choices=("verify", "rebuild"))
+    p.set_defaults(func=cmd_rating_stats)
+
+    p = commands.add_parser("sync-availability",
+                            help="copy pet availability from PostgreSQL onto pet_profiles")
+    p.set_defaults(func=cmd_sync_availability)
+
+    p = commands.add_parser("shelter-reports",
+                            help="migrate legacy shelter reports or rebuild their rollups")
+    p.add_argument("action", choices=("migrate", "rebuild-rollups"))
+    p.set_defaults(func=cmd_shelter_reports)
+
+    p = commands.add_parser("backfill-follow-ups",
+                            help="copy adoption, breed and shelter onto follow-up reports")
+    p.set_defaults(func=cmd_backfill_follow_ups)
+
+    p = commands.add_parser("graph-schema",
+                            help="create missing Neo4j uniqueness constraints")
+    p.add_argument("--check", action="store_true",
+                   help="only report missing constraints")
+    p.set_defaults(func=cmd_graph_schema)
+
+    p = commands.add_parser("like-counts",
+                            help="recompute Pet/Breed/Tag like counters from LIKES edges")
+    p.add_argument("action", choices=("reconcile",))
+    p.set_defaults(func=cmd_like_counts)
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    args.func(args)
@@ -0,0 +1,317 @@
+# backend/queries/async_graph_queries.py
+"""
+Asyncio twin of `queries/graph_queries.py`, backed by the Neo4j async driver.
+
+Functions keep the names, arguments and return shapes of their blocking
+counterparts, so business code can `await` graph lookups alongside SQL and
+Mongo work instead of tying up a thread per call:
+
+    liked, shared = await asyncio.gather(
+        get_interacted_pet_ids(user_id),
+        get_shared_like_counts(user_id),
+    )
+
+The driver is created on first use from the NEO4J_* settings in
+`queries.clients.registry.settings`, including its pool limits
+(NEO4J_MAX_POOL_SIZE, NEO4J_ACQUISITION_TIMEOUT, NEO4J_CONNECTION_TIMEOUT).
+It keeps its own connection pool, separate from the blocking driver's.
+Schema bootstrap and like-counter reconciliation are maintenance commands
+and stay in the blocking module.
+"""
+from queries.clients import registry
+from queries.graph_queries import (
+    GRAPH_BATCH_SIZE,
+    _ADOPTED_EDGES,
+    _FRIEND_EDGES,
+    _LIKES_EDGES,
+    _PET_TAGS,
+    _PREFERENCE_TAGS,
+    _UPSERT_PETS,
+    _likes_rows,
+    _pet_rows,
+)
+
+_driver = None
+
+
+def get_driver():
+    """Return the process-wide async driver, creating it on first use."""
+    global _driver
+    if _driver is None:
+        from neo4j import AsyncGraphDatabase
+
+        settings = registry.settings
+        _driver = AsyncGraphDatabase.driver(
+            settings.neo4j_uri,
+            auth=(settings.neo4j_user, settings.neo4j_password),
+            max_connection_pool_size=settings.neo4j_max_pool_size,
+            connection_acquisition_timeout=settings.neo4j_acquisition_timeout,
+            connection_timeout=settings.neo4j_connection_timeout,
+        )
+    return _driver
+
+
+async def close_driver():
+    """Close every pooled connection (e.g. on application shutdown)."""
+    global _driver
+    if _driver is not None:
+        await _driver.close()
+        _driver = None
+
+
+async def _run_consumed(tx, query, **params):
+    result = await tx.run(query, **params)
+    return await result.consume()
+
+
+async def _write(query, **params):
+    async with get_driver().session() as session:
+        result = await session.run(query, **params)
+        await result.consume()
+
+
+async def _read(query, **params):
+    async with get_driver().session() as session:
+        result = await session.run(query, **params)
+        return [record async for record in result]
+
+# ---------- WRITERS ----------
+
+async def create_user(user_id, name):
+    await _write("""
+        MERGE (u:User {id: $user_id})
+        SET u.name = $name
+    """, user_id=user_id, name=name)
+
+async def create_pet(pet_id, name, breed=None):
+    await _write("""
+        MERGE (p:Pet {id: $pet_id})
+        SET p.name = $name, p.like_count = coalesce(p.like_count, 0)
+        """ + (", p.breed = $breed" if breed is not None else ""),
+        pet_id=pet_id, name=name, breed=breed)
+
+async def create_breed(breed_name):
+    await _write("""
+        MERGE (:Breed {name: $breed_name})
+    """, breed_name=breed_name)
+
+async def link_pet_to_breed(pet_id, breed_name):
+    await _write("""
+        MATCH (p:Pet {id: $pet_id})
+        MERGE (b:Breed {name: $breed_name})
+        MERGE (p)-[:OF_BREED]->(b)
+    """, pet_id=pet_id, breed_name=breed_name)
+
+async def create_shelter(shelter_id, name):
+    await _write("""
+        MERGE (s:Shelter {id: $shelter_id})
+        SET s.name = $name
+    """, shelter_id=shelter_id, name=name)
+
+async def link_pet_to_shelter(pet_id, shelter_id):
+    await _write("""
+        MATCH (p:Pet {id: $pet_id}), (s:Shelter {id: $shelter_id})
+        MERGE (p)-[:LOCATED_AT]->(s)
+    """, pet_id=pet_id, shelter_id=shelter_id)
+
+async def create_adopted_relationship(user_id, pet_id):
+    await _write("""
+        MATCH (u:User {id: $user_id}), (p:Pet {id: $pet_id})
+        MERGE (u)-[:ADOPTED]->(p)
+    """, user_id=user_id, pet_id=pet_id)
+
+async def create_likes_edge(user_id, pet_id):
+    await create_likes_edges([(user_id, pet_id)])
+
+async def create_friend_edge(user_id1, user_id2):
+    await _write("""
+        MATCH (u1:User {id: $user_id1}), (u2:User {id: $user_id2})
+        MERGE (u1)-[:FRIEND_OF]->(u2)
+        MERGE (u2)-[:FRIEND_OF]->(u1)
+    """, user_id1=user_id1, user_id2=user_id2)
+
+async def create_tag(tag_name):
+    await _write("""
+        MERGE (:Tag {name: $tag_name})
+    """, tag_name=tag_name)
+
+async def link_pet_to_tag(pet_id, tag_name):
+    await _write("""
+        MATCH (p:Pet {id: $pet_id})
+        MERGE (t:Tag {name: $tag_name})
+        MERGE (p)-[:HAS_TAG]->(t)
+        ON CREATE SET t.like_count = coalesce(t.like_count, 0) + coalesce(p.like_count, 0)
+    """, pet_id=pet_id, tag_name=tag_name)
+
+async def link_user_to_preference_tag(user_id, tag_name):
+    await _write("""
+        MATCH (u:User {id: $user_id})
+        MERGE (t:Tag {name: $tag_name})
+        MERGE (u)-[:PREFERS_TAG]->(t)
+    """, user_id=user_id, tag_name=tag_name)
+
+async def link_breeds_as_similar(breed1, breed2):
+    await _write("""
+        MERGE (b1:Breed {name: $breed1})
+        MERGE (b2:Breed {name: $breed2})
+        MERGE (b1)-[:SIMILAR_BREED]->(b2)
+        MERGE (b2)-[:SIMILAR_BREED]->(b1)
+    """, breed1=breed1, breed2=breed2)
+
+# ---------- BATCHED WRITERS ----------
+# Same statements and chunking as the blocking module; each chunk is its
+# own write transaction. They return the number of rows sent.
+
+async def _write_batched(query, rows, chunk_size=GRAPH_BATCH_SIZE):
+    rows = list(rows)
+    async with get_driver().session() as session:
+        for start in range(0, len(rows), chunk_size):
+            await session.execute_write(_run_consumed, query,
+                                        rows=rows[start:start + chunk_size])
+    return len(rows)
+
+async def create_likes_edges(pairs, chunk_size=GRAPH_BATCH_SIZE):
+    """Batched create_likes_edge over (user_id, pet_id) pairs; keeps like counters."""
+    return await _write_batched(_LIKES_EDGES, _likes_rows(pairs), chunk_size)
+
+async def link_pets_to_tags(pairs, chunk_size=GRAPH_BATCH_SIZE):
+    """Batched link_pet_to_tag over (pet_id, tag_name) pairs."""
+    return await _write_batched(
+        _PET_TAGS, ({"pet_id": p, "tag_name": t} for p, t in pairs), chunk_size)
+
+async def create_friend_edges(pairs, chunk_size=GRAPH_BATCH_SIZE):
+    """Batched create_friend_edge over (user_id1, user_id2) pairs."""
+    return await _write_batched(
+        _FRIEND_EDGES, ({"user_id1": a, "user_id2": b} for a, b in pairs), chunk_size)
+
+async def link_users_to_preference_tags(pairs, chunk_size=GRAPH_BATCH_SIZE):
+    """Batched link_user_to_preference_tag over (user_id, tag_name) pairs."""
+    return await _write_batched(
+        _PREFERENCE_TAGS, ({"user_id": u, "tag_name": t} for u, t in pairs), chunk_size)
+
+async def create_adopted_relationships(pairs, chunk_size=GRAPH_BATCH_SIZE):
+    """Batched create_adopted_relationship over (user_id, pet_id) pairs."""
+    return await _write_batched(
+        _ADOPTED_EDGES, ({"user_id": u, "pet_id": p} for u, p in pairs), chunk_size)
+
+async def upsert_pets(pets, chunk_size=GRAPH_BATCH_SIZE):
+    """Create or update many pets with breed, shelter and tag edges (see graph_queries)."""
+    return await _write_batched(_UPSERT_PETS, _pet_rows(pets), chunk_size)
+
+async def upsert_pet(pet_id, name, breed=None, shelter_id=None, tags=None):
+    """Single-pet upsert_pets: node, breed, shelter and tags in one transaction."""
+    await upsert_pets([{"pet_id": pet_id, "name": name, "breed": breed,
+                        "shelter_id": shelter_id, "tags": tags}])
+
+# ---------- READS ----------
+
+async def get_preferred_tags(user_id):
+    """Return a list of tag names the user has expressed a preference for."""
+    records = await _read("""
+        MATCH (u:User {id: $user_id})-[:PREFERS_TAG]->(t:Tag)
+        RETURN t.name AS tag
+    """, user_id=user_id)
+    return [record["tag"] for record in records]
+
+async def get_interacted_pet_ids(user_id):
+    records = await _read("""
+        MATCH (u:User {id: $user_id})-[r]->(p:Pet)
+        WHERE type(r) IN ['LIKES', 'ADOPTED']
+        RETURN DISTINCT p.id AS pet_id
+    """, user_id=user_id)
+    return [record["pet_id"] for record in records]
+
+async def get_pet_like_counts(limit=None):
+    """
+    Return a list of dicts {'pet_id': int, 'like_count': int} for liked
+    pets, sorted by like_count descending, optionally limited.
+    """
+    records = await _read("""
+        MATCH (p:Pet)
+        WHERE p.like_count > 0
+        RETURN p.id AS pet_id, p.like_count AS like_count
+        ORDER BY p.like_count DESC
+        """ + ("LIMIT $limit" if limit else ""), limit=limit)
+    return [{'pet_id': record['pet_id'], 'like_count': record['like_count']}
+            for record in records]
+
+async def get_adopted_pet_ids(user_id):
+    """Return all pet IDs the user has adopted."""
+    records = await _read("""
+        MATCH (u:User {id: $user_id})-[:ADOPTED]->(p:Pet)
+        RETURN p.id AS pet_id
+    """, user_id=user_id)
+    return [record["pet_id"] for record in records]
+
+async def get_shared_like_counts(user_id: int) -> dict[int,int]:
+    """other_user_id -> number of pets both have LIKED."""
+    records = await _read("""
+        MATCH (u:User {id: $uid})-[:LIKES]->(p:Pet)<-[:LIKES]-(o:User)
+        RETURN o.id AS other_id, count(p) AS shared_count
+    """, uid=user_id)
+    return {r["other_id"]: r["shared_count"] for r in records}
+
+async def get_shared_adoption_shelter_counts(user_id: int) -> dict[int,int]:
+    """other_user_id -> number of shelters both have adopted from."""
+    records = await _read("""
+        MATCH (u:User {id: $uid})-[:ADOPTED]->(:Pet)-[:LOCATED_AT]->(s:Shelter)
+              ,(o:User)-[:ADOPTED]->(:Pet)-[:LOCATED_AT]->(s)
+        RETURN o.id AS other_id, count(DISTINCT s) AS shared_count
+    """, uid=user_id)
+    return {r["other_id"]: r["shared_count"] for r in records}
+
+async def get_shared_preference_tag_counts(user_id: int) -> dict[int,int]:
+    """other_user_id -> number of tags both users prefer."""
+    records = await _read("""
+        MATCH (u:User {id: $uid})-[:PREFERS_TAG]->(t:Tag)<-[:PREFERS_TAG]-(o:User)
+        RETURN o.id AS other_id, count(t) AS shared_count
+    """, uid=user_id)
+    return {r["other_id"]: r["shared_count"] for r in records}
+
+async def get_unliked_pet_ids() -> list[int]:
+    """
+    Return IDs of all Pet nodes with no incoming LIKES edges (like_count = 0).
+    Pets without a like_count are not seen; ensure_graph_schema backfills it.
+    """
+    records = await _read("""
+        MATCH (p:Pet)
+        WHERE p.like_count = 0
+        RETURN p.id AS pet_id
+    """)
+    return [r["pet_id"] for r in records]
+
+async def filter_unliked_pet_ids(pet_ids) -> list[int]:
+    """The ids among `pet_ids` whose Pet node has no LIKES."""
+    records = await _read("""
+        UNWIND $ids AS id
+        MATCH (p:Pet {id: id})
+        WHERE coalesce(p.like_count, 0) = 0
+        RETURN p.id AS pet_id
+    """, ids=list(pet_ids))
+    return [r["pet_id"] for r in records]
+
+async def get_like_count_for_user(user_id: int) -> int:
+    """Return the number of :LIKES edges this user has made."""
+    records = await _read("""
+        MATCH (:User {id: $uid})-[r:LIKES]->(:Pet)
+        RETURN count(r) AS like_count
+    """, uid=user_id)
+    return records[0]["like_count"] if records else 0
+
+async def get_like_counts_by_breed() -> dict[str,int]:
+    """breed_name -> total number of LIKES on pets of that breed (Breed.like_count)."""
+    records = await _read("""
+        MATCH (b:Breed)
+        WHERE b.like_count > 0
+        RETURN b.name AS breed, b.like_count AS like_count
+    """)
+    return {r["breed"]: r["like_count"] for r in records}
+
+async def get_like_counts_by_tag() -> dict[str,int]:
+    """tag_name -> total number of LIKES on pets carrying that tag (Tag.like_count)."""
+    records = await _read("""
+        MATCH (t:Tag)
+        WHERE t.like_count > 0
+        RETURN t.name AS tag, t.like_count AS like_count
+    """)
+    return {r["tag"]: r["like_count"] for r in records}
@@ -0,0 +1,461 @@
+# backend/queries/async_sql_queries.py
+"""
+Asyncio twin of `queries/sql_queries.py`, backed by an asyncpg pool.
+
+Functions keep the names, arguments and return shapes of their blocking
+counterparts (rows come back as plain dicts), so business code can
+`await` them alongside Mongo and Neo4j work:
+
+    user, count = await asyncio.gather(
+        get_user_by_id(user_id),
+        get_adoption_count_for_user(user_id),
+    )
+
+The pool uses the same POSTGRES_* / POSTGRES_POOL_* settings as the
+blocking pool (read from `queries.clients.registry.settings`) and is
+created on first use. Read-only functions follow the
+same replica routing rules (POSTGRES_REPLICA_DSNS, read-your-writes window).
+"""
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+
+import asyncpg
+
+from queries.clients import registry
+from queries.sql_pool import reads_pinned_to_primary, record_write, replica_label
+from queries.sql_queries import (
+    BULK_CHUNK_SIZE,
+    CATALOG_COLUMNS,
+    CATALOG_MAX_PAGE_SIZE,
+    CATALOG_PAGE_SIZE,
+    DEFAULT_USER_COLUMNS,
+    SUPPLY_COUNTS_MISSING,
+    USER_COLUMNS,
+    _catalog_page,
+    _pet_catalog_conditions,
+    _record_values,
+)
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = asyncio.Lock()
+_replica_pools = {}
+_replica_down_until = {}
+_replica_turn = itertools.count()
+
+
+async def get_pool():
+    """Return the process-wide asyncpg pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                settings = registry.settings
+                _pool = await asyncpg.create_pool(
+                    database=settings.postgres_db,
+                    user=settings.postgres_user,
+                    password=settings.postgres_password,
+                    host=settings.postgres_host,
+                    port=int(settings.postgres_port) if settings.postgres_port else None,
+                    min_size=settings.postgres_pool_min,
+                    max_size=settings.postgres_pool_max,
+                    timeout=settings.postgres_pool_timeout,
+                )
+    return _pool
+
+
+def _mark_replica_down(dsn, exc):
+    retry_after = registry.settings.postgres_replica_retry_after
+    _replica_down_until[dsn] = time.monotonic() + retry_after
+    logger.warning("replica %s unavailable, skipping for %ss: %s",
+                   replica_label(dsn), retry_after, exc)
+
+
+async def _acquire_replica():
+    """
+    (dsn, pool, conn) from the next healthy replica in round-robin order, or
+    (None, None, None) when no replica is configured or reachable (callers
+    then fall back to the primary). A replica whose pool cannot be created
+    or connect is skipped for POSTGRES_REPLICA_RETRY_AFTER seconds; one
+    whose pool is merely full is passed over for this checkout only.
+    """
+    settings = registry.settings
+    dsns = settings.postgres_replica_dsns
+    if not dsns:
+        return None, None, None
+    start = next(_replica_turn)
+    for offset in range(len(dsns)):
+        dsn = dsns[(start + offset) % len(dsns)]
+        if _replica_down_until.get(dsn, 0) > time.monotonic():
+            continue
+        try:
+            if dsn not in _replica_pools:
+                _replica_pools[dsn] = await asyncpg.create_pool(
+                    dsn=dsn,
+                    min_size=settings.postgres_pool_min,
+                    max_size=settings.postgres_pool_max,
+                    timeout=settings.postgres_pool_timeout,
+                    server_settings={"default_transaction_read_only": "on"},
+                )
+        except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as exc:
+            _mark_replica_down(dsn, exc)
+            continue
+        pool = _replica_pools[dsn]
+        try:
+            conn = await pool.acquire(timeout=settings.postgres_pool_timeout)
+        except asyncio.TimeoutError:
+            # busy, not broken: try the next replica (or the primary)
+            logger.warning("replica %s pool exhausted after %ss",
+                           replica_label(dsn), settings.postgres_pool_timeout)
+            continue
+        except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+            # the replica went away after its pool was created
+            _mark_replica_down(dsn, exc)
+            continue
+        return dsn, pool, conn
+    return None, None, None
+
+
+async def close_pool():
+    """Close every pooled connection (e.g. on application shutdown)."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+    for pool in _replica_pools.values():
+        await pool.close()
+    _replica_pools.clear()
+
+
+@asynccontextmanager
+async def get_connection(readonly=False):
+    """
+    Acquire a pooled connection for the duration of an `async with` block.
+    readonly=True routes to a read replica when one is available.
+    """
+    dsn = pool = conn = None
+    if readonly and not reads_pinned_to_primary():
+        dsn, pool, conn = await _acquire_replica()
+    on_primary = conn is None
+    if on_primary:
+        pool = await get_pool()
+        conn = await pool.acquire(timeout=registry.settings.postgres_pool_timeout)
+    try:
+        yield conn
+    except (OSError, asyncpg.exceptions.ConnectionDoesNotExistError) as exc:
+        # Lost the replica mid-query: later reads go elsewhere.
+        if not on_primary:
+            _mark_replica_down(dsn, exc)
+        raise
+    finally:
+        await pool.release(conn)
+    if on_primary and not readonly:
+        record_write()
+
+
+async def _fetchrow(query, *args, readonly=False):
+    async with get_connection(readonly) as conn:
+        row = await conn.fetchrow(query, *args)
+    return dict(row) if row is not None else None
+
+
+async def _fetch(query, *args, readonly=True):
+    async with get_connection(readonly) as conn:
+        rows = await conn.fetch(query, *args)
+    return [dict(r) for r in rows]
+
+# ---------- USERS ----------
+async def add_user(name, email, password_hash, role):
+    return await _fetchrow("""
+        INSERT INTO users (name, email, password_hash, role)
+        VALUES ($1, $2, $3, $4)
+        RETURNING *;
+    """, name, email, password_hash, role)
+
+# ---------- SHELTERS ----------
+async def add_shelter(name, address, phone_number, capacity):
+    return await _fetchrow("""
+        INSERT INTO shelters (name, address, phone_number, capacity)
+        VALUES ($1, $2, $3, $4)
+        RETURNING *;
+    """, name, address, phone_number, capacity)
+
+# ---------- PETS ----------
+async def add_pet(name, age, type_, breed, gender, shelter_id, status="available"):
+    return await _fetchrow("""
+        INSERT INTO pets (name, age, type, breed, gender, shelter_id, status)
+        VALUES ($1, $2, $3, $4, $5, $6, $7)
+        RETURNING *;
+    """, name, age, type_, breed, gender, shelter_id, status)
+
+# ---------- ADOPTIONS ----------
+async def add_adoption(user_id, pet_id, success_notes=None):
+    return await _fetchrow("""
+        INSERT INTO adoptions (user_id, pet_id, success_notes)
+        VALUES ($1, $2, $3)
+        RETURNING *;
+    """, user_id, pet_id, success_notes)
+
+async def set_pet_status(pet_id, status):
+    """Change a pet's status ('available' or 'adopted'); returns the updated row."""
+    return await _fetchrow("""
+        UPDATE pets
+           SET status = $1
+         WHERE id = $2
+     RETURNING *;
+    """, status, pet_id)
+
+# ---------- STAFF ----------
+async def add_staff(name, email, role, shelter_id):
+    return await _fetchrow("""
+        INSERT INTO staff (name, email, role, shelter_id)
+        VALUES ($1, $2, $3, $4)
+        RETURNING *;
+    """, name, email, role, shelter_id)
+
+# ---------- FOLLOW UPS ----------
+async def add_follow_up(adoption_id, visit_date, notes=None):
+    return await _fetchrow("""
+        INSERT INTO follow_ups (adoption_id, visit_date, notes)
+        VALUES ($1, $2, $3)
+        RETURNING *;
+    """, adoption_id, visit_date, notes)
+
+# ---------- BULK INSERTS ----------
+async def _bulk_insert(table, columns, types, rows, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Insert `rows` (tuples ordered like `columns`) with one
+    INSERT ... SELECT FROM unnest(...) RETURNING * per chunk, all in a
+    single transaction. Returns the inserted rows in input order.
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+
+    arrays = ", ".join(f"${i}::{t}[]" for i, t in enumerate(types, start=1))
+    query = f"""
+        INSERT INTO {table} ({", ".join(columns)})
+        SELECT * FROM unnest({arrays})
+        RETURNING *;
+    """
+    inserted = []
+    async with get_connection() as conn:
+        async with conn.transaction():
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                returned = await conn.fetch(query, *(list(col) for col in zip(*chunk)))
+                # SERIAL ids are handed out in unnest order.
+                inserted.extend(sorted((dict(r) for r in returned), key=lambda r: r["id"]))
+    return inserted
+
+async def add_users_bulk(records, chunk_size=BULK_CHUNK_SIZE):
+    fields = ("name", "email", "password_hash", "role")
+    return await _bulk_insert("users", fields, ("text",) * 4,
+                              [_record_values(r, fields) for r in records], chunk_size)
+
+async def add_shelters_bulk(records, chunk_size=BULK_CHUNK_SIZE):
+    fields = ("name", "address", "phone_number", "capacity")
+    return await _bulk_insert("shelters", fields, ("text", "text", "text", "int"),
+                              [_record_values(r, fields) for r in records], chunk_size)
+
+async def add_pets_bulk(records, chunk_size=BULK_CHUNK_SIZE):
+    fields = ("name", "age", "type_", "breed", "gender", "shelter_id", "status")
+    columns = ("name", "age", "type", "breed", "gender", "shelter_id", "status")
+    types = ("text", "int", "text", "text", "text", "int", "text")
+    defaults = {"status": "available"}
+    return await _bulk_insert("pets", columns, types,
+                              [_record_values(r, fields, defaults) for r in records], chunk_size)
+
+async def add_adoptions_bulk(records, chunk_size=BULK_CHUNK_SIZE):
+    fields = ("user_id", "pet_id", "success_notes")
+    defaults = {"success_notes": None}
+    return await _bulk_insert("adoptions", fields, ("int", "int", "text"),
+                              [_record_values(r, fields, defaults) for r in records], chunk_size)
+
+# ---------- Raw Queries --------
+
+async def get_pets_by_ids(pet_ids):
+    """
+    Fetch basic pet details for the given list of pet IDs,
+    but only those still marked 'available'.
+    Returns a list of dicts.
+    """
+    if not pet_ids:
+        return []
+    return await _fetch("""
+        SELECT id, name, type, breed, gender, status
+        FROM pets
+        WHERE id = ANY($1::int[])
+          AND status = 'available';
+    """, list(pet_ids))
+
+async def get_users_by_ids(user_ids, columns=DEFAULT_USER_COLUMNS):
+    """
+    Fetch many users in a single query.
+    Returns a list of dicts aligned with `user_ids` (None for unknown IDs).
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return []
+
+    unknown = set(columns) - set(USER_COLUMNS)
+    if unknown:
+        raise ValueError(f"unknown user columns: {sorted(unknown)}")
+    # Column names come from the whitelist above, so they are safe to inline.
+    select = ("id",) + tuple(c for c in columns if c != "id")
+    rows = await _fetch(f"""
+        SELECT {", ".join(select)}
+          FROM users
+         WHERE id = ANY($1::int[]);
+    """, list(set(user_ids)))
+
+    by_id = {row["id"]: {c: row[c] for c in columns} for row in rows}
+    return [by_id.get(uid) for uid in user_ids]
+
+async def get_user_by_id(user_id, columns=DEFAULT_USER_COLUMNS):
+    """
+    Fetch a single user record by its ID, or None if it does not exist.
+    """
+    return (await get_users_by_ids([user_id], columns))[0]
+
+async def get_available_pet_ids():
+    """
+    Fetch all pet IDs where status is 'available'.
+    Returns a list of integers.
+    """
+    rows = await _fetch("""
+        SELECT id
+          FROM pets
+         WHERE status = 'available';
+    """)
+    return [row['id'] for row in rows]
+
+async def _stream(query, *args, fetch_size=None):
+    async with get_connection(readonly=True) as conn:
+        # asyncpg cursors only live inside a transaction.
+        async with conn.transaction():
+            prefetch = fetch_size or registry.settings.postgres_stream_fetch_size
+            async for row in conn.cursor(query, *args, prefetch=prefetch):
+                yield dict(row)
+
+async def iter_available_pet_ids(fetch_size=None):
+    """
+    Streaming variant of get_available_pet_ids (async generator).
+    """
+    async for row in _stream("""
+        SELECT id
+          FROM pets
+         WHERE status = 'available';
+    """, fetch_size=fetch_size):
+        yield row['id']
+
+async def iter_pets_by_ids(pet_ids, fetch_size=None):
+    """
+    Streaming variant of get_pets_by_ids (async generator).
+    """
+    if not pet_ids:
+        return
+    async for row in _stream("""
+        SELECT id, name, type, breed, gender, status
+        FROM pets
+        WHERE id = ANY($1::int[])
+          AND status = 'available';
+    """, list(pet_ids), fetch_size=fetch_size):
+        yield row
+
+async def iter_adoptions_with_pets(adopted_before=None, newest_first=False, fetch_size=None):
+    """
+    Streaming adoptions with pet breed and shelter (async generator).
+    """
+    direction = "DESC" if newest_first else "ASC"
+    async for row in _stream(f"""
+        SELECT a.id AS adoption_id, a.pet_id, a.user_id, a.adoption_date,
+               p.breed, p.shelter_id
+          FROM adoptions a
+          JOIN pets p ON p.id = a.pet_id
+         WHERE $1::date IS NULL OR a.adoption_date <= $1::date
+         ORDER BY a.adoption_date {direction}, a.id {direction};
+    """, adopted_before, fetch_size=fetch_size):
+        yield row
+
+async def get_shared_adoption_counts(user_id: int) -> dict[int,int]:
+    """
+    other_user_id -> number of pets both users have ADOPTED
+    """
+    rows = await _fetch("""
+        SELECT a2.user_id   AS other_id,
+               COUNT(*)      AS shared_count
+          FROM adoptions a1
+          JOIN adoptions a2
+            ON a1.pet_id = a2.pet_id
+         WHERE a1.user_id = $1
+           AND a2.user_id <> $1
+      GROUP BY a2.user_id;
+    """, user_id)
+    return {r["other_id"]: r["shared_count"] for r in rows}
+
+async def get_adoption_count_for_user(user_id: int) -> int:
+    """
+    Return how many adoptions this user has made.
+    """
+    row = await _fetchrow(
+        "SELECT COUNT(*) AS cnt FROM adoptions WHERE user_id = $1",
+        user_id, readonly=True
+    )
+    return row["cnt"] if row else 0
+
+async def get_user_with_adoption_count(user_id: int, columns=DEFAULT_USER_COLUMNS):
+    """
+    Fetch the user record and their adoption count concurrently.
+    Returns (user dict or None, adoption count).
+    """
+    return tuple(await asyncio.gather(
+        get_user_by_id(user_id, columns),
+        get_adoption_count_for_user(user_id),
+    ))
+
+async def get_available_pets_count_by_breed() -> dict[str,int]:
+    """
+    Returns a map: breed -> number of pets currently available in SQL,
+    read from the trigger-maintained pet_supply_counts table.
+    """
+    try:
+        rows = await _fetch("""
+            SELECT NULLIF(breed, '') AS breed,
+                   SUM(available_count) AS supply_count
+              FROM pet_supply_counts
+             GROUP BY breed
+            HAVING SUM(available_count) > 0;
+        """)
+    except asyncpg.exceptions.UndefinedTableError as exc:
+        raise RuntimeError(SUPPLY_COUNTS_MISSING) from exc
+    return {r["breed"]: r["supply_count"] for r in rows}
+
+# ---------- CATALOG ----------
+async def get_pet_catalog(type_=None, breed=None, gender=None, min_age=None, max_age=None,
+                          shelter_id=None, status="available", limit=CATALOG_PAGE_SIZE,
+                          after=None):
+    """
+    Browse pets with optional filters using keyset pagination.
+    Returns {"pets": [dict, ...], "next_token": str | None}.
+    """
+    limit = max(1, min(int(limit), CATALOG_MAX_PAGE_SIZE))
+    conditions = _pet_catalog_conditions(type_, breed, gender, min_age, max_age,
+                                         shelter_id, status, after)
+    # Column names and operators come from _pet_catalog_conditions, not the caller.
+    where = " AND ".join(
+        f"{column} {op} ${i}" for i, (column, op, _) in enumerate(conditions, start=1)
+    ) or "TRUE"
+    args = [value for _, _, value in conditions] + [limit + 1]
+    rows = await _fetch(f"""
+        SELECT {", ".join(CATALOG_COLUMNS)}
+          FROM pets
+         WHERE {where}
+         ORDER BY id
+         LIMIT ${len(args)};
+    """, *args)
+    return _catalog_page(rows, limit)
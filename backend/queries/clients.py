@@ -0,0 +1,194 @@
+# backend/queries/clients.py
+"""
+Settings and lazily created database clients shared by the query modules.
+
+Importing a query module no longer connects to anything: the environment
+(and .env) is read once, the first time `registry.settings` is needed, and
+each client is built on its first use. Everything is configured from the
+environment:
+
+    POSTGRES_DB / _USER / _PASSWORD / _HOST / _PORT
+    POSTGRES_POOL_MIN            connections opened up front      (default 1)
+    POSTGRES_POOL_MAX            hard upper bound on connections  (default 10)
+    POSTGRES_POOL_TIMEOUT        seconds to wait for a free conn  (default 30)
+    POSTGRES_POOL_PING_AFTER     idle seconds before a checkout
+                                 is health-checked with SELECT 1  (default 30)
+    POSTGRES_REPLICA_DSNS        comma-separated libpq DSNs of read replicas
+    POSTGRES_REPLICA_RETRY_AFTER seconds a failed replica is skipped  (default 30)
+    POSTGRES_READ_YOUR_WRITES    seconds a writer keeps reading from the
+                                 primary (default 0 = off)
+    POSTGRES_STREAM_FETCH_SIZE   rows per round trip when streaming (default 2000)
+    POSTGRES_EXECUTION_MODE      "simple" or "prepared"            (default simple)
+
+    MONGO_URI
+    MONGO_DB_NAME                                          (default pet_tracker)
+    MONGO_MAX_POOL_SIZE          connections per server    (default 100)
+    MONGO_MIN_POOL_SIZE                                    (default 0)
+    MONGO_CONNECT_TIMEOUT_MS                               (default 10000)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS                      (default 10000)
+
+    NEO4J_URI / NEO4J_USER / NEO4J_PASS
+    NEO4J_MAX_POOL_SIZE          connections in the driver pool    (default 100)
+    NEO4J_ACQUISITION_TIMEOUT    seconds to wait for a pooled conn (default 60)
+    NEO4J_CONNECTION_TIMEOUT     seconds to open a new connection  (default 30)
+
+Tests and scripts can swap the configuration with
+`registry.configure(Settings(...))` before the first query runs.
+"""
+import os
+import threading
+from dataclasses import dataclass
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, str(default)))
+
+
+def _env_float(name, default):
+    return float(os.getenv(name, str(default)))
+
+
+@dataclass(frozen=True)
+class Settings:
+    postgres_db: str = None
+    postgres_user: str = None
+    postgres_password: str = None
+    postgres_host: str = None
+    postgres_port: str = None
+    postgres_pool_min: int = 1
+    postgres_pool_max: int = 10
+    postgres_pool_timeout: float = 30.0
+    postgres_pool_ping_after: float = 30.0
+    postgres_replica_dsns: tuple = ()
+    postgres_replica_retry_after: float = 30.0
+    postgres_read_your_writes: float = 0.0
+    postgres_stream_fetch_size: int = 2000
+    postgres_execution_mode: str = "simple"
+
+    mongo_uri: str = None
+    mongo_db_name: str = "pet_tracker"
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 0
+    mongo_connect_timeout_ms: int = 10_000
+    mongo_server_selection_timeout_ms: int = 10_000
+
+    neo4j_uri: str = None
+    neo4j_user: str = None
+    neo4j_password: str = None
+    neo4j_max_pool_size: int = 100
+    neo4j_acquisition_timeout: float = 60.0
+    neo4j_connection_timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls):
+        """Build settings from the environment, after loading .env."""
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        replicas = os.getenv("POSTGRES_REPLICA_DSNS", "")
+        return cls(
+            postgres_db=os.getenv("POSTGRES_DB"),
+            postgres_user=os.getenv("POSTGRES_USER"),
+            postgres_password=os.getenv("POSTGRES_PASSWORD"),
+            postgres_host=os.getenv("POSTGRES_HOST"),
+            postgres_port=os.getenv("POSTGRES_PORT"),
+            postgres_pool_min=_env_int("POSTGRES_POOL_MIN", 1),
+            postgres_pool_max=_env_int("POSTGRES_POOL_MAX", 10),
+            postgres_pool_timeout=_env_float("POSTGRES_POOL_TIMEOUT", 30),
+            postgres_pool_ping_after=_env_float("POSTGRES_POOL_PING_AFTER", 30),
+            postgres_replica_dsns=tuple(d.strip() for d in replicas.split(",") if d.strip()),
+            postgres_replica_retry_after=_env_float("POSTGRES_REPLICA_RETRY_AFTER", 30),
+            postgres_read_your_writes=_env_float("POSTGRES_READ_YOUR_WRITES", 0),
+            postgres_stream_fetch_size=_env_int("POSTGRES_STREAM_FETCH_SIZE", 2000),
+            postgres_execution_mode=os.getenv("POSTGRES_EXECUTION_MODE", "simple"),
+            mongo_uri=os.getenv("MONGO_URI"),
+            mongo_db_name=os.getenv("MONGO_DB_NAME", "pet_tracker"),
+            mongo_max_pool_size=_env_int("MONGO_MAX_POOL_SIZE", 100),
+            mongo_min_pool_size=_env_int("MONGO_MIN_POOL_SIZE", 0),
+            mongo_connect_timeout_ms=_env_int("MONGO_CONNECT_TIMEOUT_MS", 10_000),
+            mongo_server_selection_timeout_ms=_env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 10_000),
+            neo4j_uri=os.getenv("NEO4J_URI"),
+            neo4j_user=os.getenv("NEO4J_USER"),
+            neo4j_password=os.getenv("NEO4J_PASS"),
+            neo4j_max_pool_size=_env_int("NEO4J_MAX_POOL_SIZE", 100),
+            neo4j_acquisition_timeout=_env_float("NEO4J_ACQUISITION_TIMEOUT", 60),
+            neo4j_connection_timeout=_env_float("NEO4J_CONNECTION_TIMEOUT", 30),
+        )
+
+
+class ClientRegistry:
+    """
+    Owns the process-wide MongoDB client and Neo4j driver. The drivers are
+    imported and the clients built on first use, once per process.
+    (The PostgreSQL pools live in `queries/sql_pool.py` and
+    `queries/async_sql_queries.py`, the async Neo4j driver in
+    `queries/async_graph_queries.py`; all read their settings from here.)
+    """
+
+    def __init__(self, settings=None):
+        self._settings = settings
+        self._lock = threading.Lock()
+        self._mongo_client = None
+        self._neo4j_driver = None
+
+    @property
+    def settings(self):
+        if self._settings is None:
+            with self._lock:
+                if self._settings is None:
+                    self._settings = Settings.from_env()
+        return self._settings
+
+    def configure(self, settings):
+        """Replace the settings; closes any client built with the old ones."""
+        self.close()
+        with self._lock:
+            self._settings = settings
+
+    def mongo_client(self):
+        if self._mongo_client is None:
+            settings = self.settings
+            with self._lock:
+                if self._mongo_client is None:
+                    from pymongo import MongoClient
+
+                    self._mongo_client = MongoClient(
+                        settings.mongo_uri,
+                        maxPoolSize=settings.mongo_max_pool_size,
+                        minPoolSize=settings.mongo_min_pool_size,
+                        connectTimeoutMS=settings.mongo_connect_timeout_ms,
+                        serverSelectionTimeoutMS=settings.mongo_server_selection_timeout_ms,
+                    )
+        return self._mongo_client
+
+    def mongo_db(self):
+        return self.mongo_client()[self.settings.mongo_db_name]
+
+    def neo4j_driver(self):
+        if self._neo4j_driver is None:
+            settings = self.settings
+            with self._lock:
+                if self._neo4j_driver is None:
+                    from neo4j import GraphDatabase
+
+                    self._neo4j_driver = GraphDatabase.driver(
+                        settings.neo4j_uri,
+                        auth=(settings.neo4j_user, settings.neo4j_password),
+                        max_connection_pool_size=settings.neo4j_max_pool_size,
+                        connection_acquisition_timeout=settings.neo4j_acquisition_timeout,
+                        connection_timeout=settings.neo4j_connection_timeout,
+                    )
+        return self._neo4j_driver
+
+    def close(self):
+        """Close whichever clients were created (e.g. at process shutdown)."""
+        with self._lock:
+            if self._mongo_client is not None:
+                self._mongo_client.close()
+                self._mongo_client = None
+            if self._neo4j_driver is not None:
+                self._neo4j_driver.close()
+                self._neo4j_driver = None
+
+
+registry = ClientRegistry()
@@ -1,16 +1,149 @@
-from neo4j import GraphDatabase
-from dotenv import load_dotenv
-import os
+import logging
 
-load_dotenv()
+from queries.clients import registry
 
-driver = GraphDatabase.driver(
-    os.getenv("NEO4J_URI"),
-    auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASS"))
-)
+logger = logging.getLogger(__name__)
+
+# Rows sent per UNWIND statement (and transaction) by the batched writers.
+GRAPH_BATCH_SIZE = 1000
+
+# Uniqueness constraints (each backed by an index) for the keys every MERGE
+# and MATCH below looks nodes up by: (constraint name, label, property).
+GRAPH_CONSTRAINTS = [
+    ("user_id_unique", "User", "id"),
+    ("pet_id_unique", "Pet", "id"),
+    ("shelter_id_unique", "Shelter", "id"),
+    ("tag_name_unique", "Tag", "name"),
+    ("breed_name_unique", "Breed", "name"),
+]
+# Range indexes for non-key lookups: (index name, label, property).
+GRAPH_INDEXES = [
+    # get_unliked_pet_ids / get_pet_like_counts
+    ("pet_like_count", "Pet", "like_count"),
+    # reconcile_like_counts: a breed's pets (Breed counters follow Pet.breed)
+    ("pet_breed", "Pet", "breed"),
+]
+
+
+def _driver():
+    # Built by the registry on first use, not at import.
+    return registry.neo4j_driver()
+
+
+def __getattr__(name):
+    # Backwards compatibility for `from queries.graph_queries import driver`.
+    if name == "driver":
+        return _driver()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# ---------- SCHEMA ----------
+
+def get_graph_constraints():
+    """
+    Single-property uniqueness constraints as {(label, property): name}.
+    Neo4j 5 reports them as NODE_PROPERTY_UNIQUENESS (4.x: UNIQUENESS); a
+    NODE_KEY implies uniqueness too.
+    """
+    with _driver().session() as session:
+        result = session.run("""
+            SHOW CONSTRAINTS
+            YIELD name, type, entityType, labelsOrTypes, properties
+            WHERE type IN ['NODE_PROPERTY_UNIQUENESS', 'UNIQUENESS', 'NODE_KEY']
+              AND entityType = 'NODE'
+              AND size(labelsOrTypes) = 1 AND size(properties) = 1
+            RETURN name, labelsOrTypes[0] AS label, properties[0] AS property
+        """)
+        return {(r["label"], r["property"]): r["name"] for r in result}
+
+def get_graph_indexes():
+    """Single-property range indexes as {(label, property): name}."""
+    with _driver().session() as session:
+        result = session.run("""
+            SHOW INDEXES
+            YIELD name, type, entityType, labelsOrTypes, properties, owningConstraint
+            WHERE type = 'RANGE' AND entityType = 'NODE' AND owningConstraint IS NULL
+              AND size(labelsOrTypes) = 1 AND size(properties) = 1
+            RETURN name, labelsOrTypes[0] AS label, properties[0] AS property
+        """)
+        return {(r["label"], r["property"]): r["name"] for r in result}
+
+def _missing_schema():
+    """(name, CREATE statement) for every constraint/index not present yet."""
+    constraints, indexes = get_graph_constraints(), get_graph_indexes()
+    # label/property come from the lists above, not user input
+    missing = [
+        (name, f"CREATE CONSTRAINT {name} IF NOT EXISTS "
+               f"FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE")
+        for name, label, prop in GRAPH_CONSTRAINTS if (label, prop) not in constraints
+    ]
+    missing += [
+        (name, f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})")
+        for name, label, prop in GRAPH_INDEXES if (label, prop) not in indexes
+    ]
+    return missing
+
+def ensure_graph_schema():
+    """
+    Create any missing constraint from GRAPH_CONSTRAINTS and index from
+    GRAPH_INDEXES. Safe to run repeatedly. Returns a report like
+    ensure_mongo_indexes:
+      {"created": [name, ...], "existing": [...], "failed": [(name, error), ...]}
+    """
+    from neo4j.exceptions import Neo4jError
+
+    missing = dict(_missing_schema())
+    report = {"created": [], "existing": [], "failed": []}
+    with _driver().session() as session:
+        for name, _, _ in GRAPH_CONSTRAINTS + GRAPH_INDEXES:
+            if name not in missing:
+                report["existing"].append(name)
+                continue
+            try:
+                session.run(missing[name]).consume()
+            except Neo4jError as exc:
+                # e.g. duplicate ids already in the graph
+                report["failed"].append((name, exc.message))
+            else:
+                report["created"].append(name)
+    # Pets from before the like counters (or written around the writers)
+    # have no like_count and would be invisible to the like_count reads.
+    if _pets_without_like_count():
+        reconcile_like_counts()
+        report["created"].append("like_count backfill")
+    return report
+
+def _pets_without_like_count():
+    with _driver().session() as session:
+        record = session.run("""
+            MATCH (p:Pet)
+            WHERE p.like_count IS NULL
+            RETURN count(p) AS missing
+        """).single()
+    return record["missing"]
+
+def check_graph_schema():
+    """
+    Log a warning for each constraint or index from GRAPH_CONSTRAINTS /
+    GRAPH_INDEXES that is missing (lookups on that property then scan the
+    whole label), and for Pet nodes without a like_count. Returns the
+    missing names.
+    """
+    missing = [name for name, _ in _missing_schema()]
+    for name, label, prop in GRAPH_CONSTRAINTS + GRAPH_INDEXES:
+        if name in missing:
+            logger.warning("Neo4j has no %s on :%s(%s); lookups by it scan every :%s "
+                           "node. Run `python manage.py graph-schema`.",
+                           name, label, prop, label)
+    unset = _pets_without_like_count()
+    if unset:
+        logger.warning("%s Pet nodes have no like_count and are left out of the like "
+                       "reports. Run `python manage.py graph-schema`.", unset)
+    return missing
+
+# ---------- WRITERS ----------
 
 def create_user(user_id, name):
-    with driver.session() as session:
+    with _driver().session() as session:
         session.run("""
             MERGE (u:User {id: $user_id})
             SET u.name = $name
@@ -18,22 +151,22 @@ def create_user(user_id, name):
 
 
 def create_pet(pet_id, name, breed=None):
-    with driver.session() as session:
+    with _driver().session() as session:
         session.run("""
             MERGE (p:Pet {id: $pet_id})
-            SET p.name = $name
+            SET p.name = $name, p.like_count = coalesce(p.like_count, 0)
             """ + (", p.breed = $breed" if breed is not None else ""),
             pet_id=pet_id, name=name, breed=breed
         )
 
 def create_breed(breed_name):
-    with driver.session() as session:
+    with _driver().session() as session:
         session.run("""
             MERGE (:Breed {name: $breed_name})
         """, breed_name=breed_name)
 
 def link_pet_to_breed(pet_id, breed_name):
-    with driver.session() as session:
+    with _driver().session() as session:
         session.run("""
             MATCH (p:Pet {id: $pet_id})
             MERGE (b:Breed {name: $breed_name})
@@ -41,35 +174,31 @@ def link_pet_to_breed(pet_id, breed_name):
         """, pet_id=pet_id, breed_name=breed_name)
 
 def create_shelter(shelter_id, name):
-    with driver.session() as session:
+    with _driver().session() as session:
         session.run("""
             MERGE (s:Shelter {id: $shelter_id})
             SET s.name = $name
         """, shelter_id=shelter_id, name=name)
 
 def link_pet_to_shelter(pet_id, shelter_id):
-    with driver.session() as session:
+    with _driver().session() as session:
         session.run("""
             MATCH (p:Pet {id: $pet_id}), (s:Shelter {id: $shelter_id})
             MERGE (p)-[:LOCATED_AT]->(s)
         """, pet_id=pet_id, shelter_id=shelter_id)
 
 def create_adopted_relationship(user_id, pet_id):
-    with driver.session() as session:
+    with _driver().session() as session:
         session.run("""
             MATCH (u:User {id: $user_id}), (p:Pet {id: $pet_id})
             MERGE (u)-[:ADOPTED]->(p)
         """, user_id=user_id, pet_id=pet_id)
 
 def create_likes_edge(user_id, pet_id):
-    with driver.session() as session:
-        session.run("""
-            MATCH (u:User {id: $user_id}), (p:Pet {id: $pet_id})
-            MERGE (u)-[:LIKES]->(p)
-        """, user_id=user_id, pet_id=pet_id)
+    create_likes_edges([(user_id, pet_id)])
 
 def create_friend_edge(user_id1, user_id2):
-    with driver.session() as session:
+    with _driver().session() as session:
         session.run("""
             MATCH (u1:User {id: $user_id1}), (u2:User {id: $user_id2})
             MERGE (u1)-[:FRIEND_OF]->(u2)
@@ -77,21 +206,22 @@ def create_friend_edge(user_id1, user_id2):
         """, user_id1=user_id1, user_id2=user_id2)
 
 def create_tag(tag_name):
-    with driver.session() as session:
+    with _driver().session() as session:
         session.run("""
             MERGE (:Tag {name: $tag_name})
         """, tag_name=tag_name)
 
 def link_pet_to_tag(pet_id, tag_name):
-    with driver.session() as session:
+    with _driver().session() as session:
         session.run("""
             MATCH (p:Pet {id: $pet_id})
             MERGE (t:Tag {name: $tag_name})
             MERGE (p)-[:HAS_TAG]->(t)
+            ON CREATE SET t.like_count = coalesce(t.like_count, 0) + coalesce(p.like_count, 0)
         """, pet_id=pet_id, tag_name=tag_name)
 
 def link_user_to_preference_tag(user_id, tag_name):
-    with driver.session() as session:
+    with _driver().session() as session:
         session.run("""
             MATCH (u:User {id: $user_id})
             MERGE (t:Tag {name: $tag_name})
@@ -99,7 +229,7 @@ def link_user_to_preference_tag(user_id, tag_name):
         """, user_id=user_id, tag_name=tag_name)
 
 def link_breeds_as_similar(breed1, breed2):
-    with driver.session() as session:
+    with _driver().session() as session:
         session.run("""
             MERGE (b1:Breed {name: $breed1})
             MERGE (b2:Breed {name: $breed2})
@@ -107,11 +237,169 @@ def link_breeds_as_similar(breed1, breed2):
             MERGE (b2)-[:SIMILAR_BREED]->(b1)
         """, breed1=breed1, breed2=breed2)
 
+# ---------- BATCHED WRITERS ----------
+# Each takes a list of pairs and applies them with one UNWIND statement per
+# chunk of `chunk_size` rows, each chunk in its own write transaction.
+# They return the number of rows sent.
+
+def _write_batched(query, rows, chunk_size=GRAPH_BATCH_SIZE):
+    rows = list(rows)
+    with _driver().session() as session:
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            session.execute_write(lambda tx: tx.run(query, rows=chunk).consume())
+    return len(rows)
+
+# UNWIND statements (one row per $rows entry) shared with
+# queries/async_graph_queries.py.
+_LIKES_EDGES = """
+    UNWIND $rows AS row
+    MATCH (u:User {id: row.user_id}), (p:Pet {id: row.pet_id})
+    // MERGE locks both nodes before re-checking for the edge, so concurrent
+    // likes of the same pair create (and count) it once
+    MERGE (u)-[r:LIKES]->(p)
+    ON CREATE SET r._created = true
+    WITH p, r
+    WHERE r._created
+    REMOVE r._created
+    SET p.like_count = coalesce(p.like_count, 0) + 1
+    FOREACH (breed IN CASE WHEN p.breed IS NULL THEN [] ELSE [p.breed] END |
+        MERGE (b:Breed {name: breed})
+        SET b.like_count = coalesce(b.like_count, 0) + 1)
+    FOREACH (t IN [(p)-[:HAS_TAG]->(tag:Tag) | tag] |
+        SET t.like_count = coalesce(t.like_count, 0) + 1)
+"""
+
+_PET_TAGS = """
+    UNWIND $rows AS row
+    MATCH (p:Pet {id: row.pet_id})
+    MERGE (t:Tag {name: row.tag_name})
+    MERGE (p)-[:HAS_TAG]->(t)
+    ON CREATE SET t.like_count = coalesce(t.like_count, 0) + coalesce(p.like_count, 0)
+"""
+
+_FRIEND_EDGES = """
+    UNWIND $rows AS row
+    MATCH (u1:User {id: row.user_id1}), (u2:User {id: row.user_id2})
+    MERGE (u1)-[:FRIEND_OF]->(u2)
+    MERGE (u2)-[:FRIEND_OF]->(u1)
+"""
+
+_PREFERENCE_TAGS = """
+    UNWIND $rows AS row
+    MATCH (u:User {id: row.user_id})
+    MERGE (t:Tag {name: row.tag_name})
+    MERGE (u)-[:PREFERS_TAG]->(t)
+"""
+
+_ADOPTED_EDGES = """
+    UNWIND $rows AS row
+    MATCH (u:User {id: row.user_id}), (p:Pet {id: row.pet_id})
+    MERGE (u)-[:ADOPTED]->(p)
+"""
+
+_UPSERT_PETS = """
+    UNWIND $rows AS row
+    MERGE (p:Pet {id: row.pet_id})
+    WITH p, row, p.breed AS old_breed
+    SET p.name = row.name, p.breed = coalesce(row.breed, p.breed),
+        p.like_count = coalesce(p.like_count, 0)
+    // a new breed replaces the old OF_BREED edge and takes the pet's likes along
+    FOREACH (stale IN CASE WHEN row.breed IS NULL THEN []
+                      ELSE [(p)-[r:OF_BREED]->(b:Breed) WHERE b.name <> row.breed | r] END |
+        DELETE stale)
+    FOREACH (breed IN CASE WHEN row.breed IS NOT NULL AND old_breed <> row.breed
+                      THEN [old_breed] ELSE [] END |
+        MERGE (old:Breed {name: breed})
+        SET old.like_count = coalesce(old.like_count, 0) - p.like_count)
+    FOREACH (breed IN CASE WHEN row.breed IS NULL THEN [] ELSE [row.breed] END |
+        MERGE (b:Breed {name: breed})
+        SET b.like_count = coalesce(b.like_count, 0)
+            + CASE WHEN old_breed = breed THEN 0 ELSE p.like_count END
+        MERGE (p)-[:OF_BREED]->(b))
+    // given tags replace the stored set: dropped tags lose the pet's likes
+    FOREACH (stale IN CASE WHEN row.tags IS NULL THEN []
+                      ELSE [(p)-[r:HAS_TAG]->(t:Tag) WHERE NOT t.name IN row.tags | r] END |
+        FOREACH (t IN [endNode(stale)] |
+            SET t.like_count = coalesce(t.like_count, 0) - p.like_count)
+        DELETE stale)
+    FOREACH (tag IN coalesce(row.tags, []) |
+        MERGE (t:Tag {name: tag})
+        MERGE (p)-[:HAS_TAG]->(t)
+        ON CREATE SET t.like_count = coalesce(t.like_count, 0) + p.like_count)
+    WITH p, row
+    OPTIONAL MATCH (s:Shelter {id: row.shelter_id})
+    // likewise a pet is located at one shelter; an unknown shelter_id keeps the old one
+    FOREACH (stale IN CASE WHEN s IS NULL THEN []
+                      ELSE [(p)-[r:LOCATED_AT]->(o:Shelter) WHERE o.id <> s.id | r] END |
+        DELETE stale)
+    FOREACH (shelter IN CASE WHEN s IS NULL THEN [] ELSE [s] END |
+        MERGE (p)-[:LOCATED_AT]->(shelter))
+"""
+
+def _likes_rows(pairs):
+    # Repeated pairs would only MERGE the same edge again; drop them up front.
+    return ({"user_id": u, "pet_id": p} for u, p in dict.fromkeys(map(tuple, pairs)))
+
+def _pet_rows(pets):
+    return ({"pet_id": pet["pet_id"], "name": pet["name"], "breed": pet.get("breed"),
+             "shelter_id": pet.get("shelter_id"),
+             "tags": None if pet.get("tags") is None else list(pet["tags"])}
+            for pet in pets)
+
+def create_likes_edges(pairs, chunk_size=GRAPH_BATCH_SIZE):
+    """
+    Batched create_likes_edge over (user_id, pet_id) pairs. In the same
+    transaction as each new LIKES edge, the liked Pet's like_count and the
+    like_count of its Breed (by the pet's breed property) and of each Tag
+    it carries go up by one; a pair that is already linked (or liked twice
+    at once) is counted once.
+    """
+    return _write_batched(_LIKES_EDGES, _likes_rows(pairs), chunk_size)
+
+def link_pets_to_tags(pairs, chunk_size=GRAPH_BATCH_SIZE):
+    """Batched link_pet_to_tag over (pet_id, tag_name) pairs."""
+    return _write_batched(_PET_TAGS, ({"pet_id": p, "tag_name": t} for p, t in pairs), chunk_size)
+
+def create_friend_edges(pairs, chunk_size=GRAPH_BATCH_SIZE):
+    """Batched create_friend_edge over (user_id1, user_id2) pairs."""
+    return _write_batched(_FRIEND_EDGES, ({"user_id1": a, "user_id2": b} for a, b in pairs), chunk_size)
+
+def link_users_to_preference_tags(pairs, chunk_size=GRAPH_BATCH_SIZE):
+    """Batched link_user_to_preference_tag over (user_id, tag_name) pairs."""
+    return _write_batched(_PREFERENCE_TAGS, ({"user_id": u, "tag_name": t} for u, t in pairs), chunk_size)
+
+def create_adopted_relationships(pairs, chunk_size=GRAPH_BATCH_SIZE):
+    """Batched create_adopted_relationship over (user_id, pet_id) pairs."""
+    return _write_batched(_ADOPTED_EDGES, ({"user_id": u, "pet_id": p} for u, p in pairs), chunk_size)
+
+def upsert_pets(pets, chunk_size=GRAPH_BATCH_SIZE):
+    """
+    Create or update many pets with their whole neighbourhood, one UNWIND
+    statement (and transaction) per chunk. Each pet is a dict with pet_id,
+    name and optional breed, shelter_id and tags. Per pet this MERGEs the
+    Pet node (name, breed), the Breed node and OF_BREED edge, the
+    LOCATED_AT edge to an existing Shelter and a HAS_TAG edge per tag.
+    A changed breed or shelter replaces the old edge (and a changed breed
+    moves the pet's likes between Breed counters); a missing breed or
+    unknown shelter keeps the stored one. Given tags replace the pet's
+    HAS_TAG edges (removed tags lose its likes); tags=None keeps them.
+    Returns the number of pets sent.
+    """
+    return _write_batched(_UPSERT_PETS, _pet_rows(pets), chunk_size)
+
+def upsert_pet(pet_id, name, breed=None, shelter_id=None, tags=None):
+    """Single-pet upsert_pets: node, breed, shelter and tags in one transaction."""
+    upsert_pets([{"pet_id": pet_id, "name": name, "breed": breed,
+                  "shelter_id": shelter_id, "tags": tags}])
+
+# ---------- READS ----------
+
 def get_preferred_tags(user_id):
     """
     Return a list of tag names the user has expressed a preference for.
     """
-    with driver.session() as session:
+    with _driver().session() as session:
         result = session.run(
             """
             MATCH (u:User {id: $user_id})-[:PREFERS_TAG]->(t:Tag)
@@ -122,7 +410,7 @@ def get_preferred_tags(user_id):
         return [record["tag"] for record in result]
 
 def get_interacted_pet_ids(user_id):
-    with driver.session() as session:
+    with _driver().session() as session:
         result = session.run(
             """
             MATCH (u:User {id: $user_id})-[r]->(p:Pet)
@@ -135,16 +423,18 @@ def get_interacted_pet_ids(user_id):
 
 def get_pet_like_counts(limit=None):
     """
-    Return a list of dicts {'pet_id': int, 'like_count': int},
-    sorted by like_count descending. Optionally limit the number of results.
+    Return a list of dicts {'pet_id': int, 'like_count': int} for liked
+    pets, sorted by like_count descending. Optionally limit the number of
+    results. Reads the maintained Pet.like_count through its range index.
     """
-    with driver.session() as session:
+    with _driver().session() as session:
         if limit:
             result = session.run(
                 """
-                MATCH (:User)-[:LIKES]->(p:Pet)
-                RETURN p.id AS pet_id, count(*) AS like_count
-                ORDER BY like_count DESC
+                MATCH (p:Pet)
+                WHERE p.like_count > 0
+                RETURN p.id AS pet_id, p.like_count AS like_count
+                ORDER BY p.like_count DESC
                 LIMIT $limit
                 """,
                 limit=limit
@@ -152,9 +442,10 @@ def get_pet_like_counts(limit=None):
         else:
             result = session.run(
                 """
-                MATCH (:User)-[:LIKES]->(p:Pet)
-                RETURN p.id AS pet_id, count(*) AS like_count
-                ORDER BY like_count DESC
+                MATCH (p:Pet)
+                WHERE p.like_count > 0
+                RETURN p.id AS pet_id, p.like_count AS like_count
+                ORDER BY p.like_count DESC
                 """
             )
         return [ { 'pet_id': record['pet_id'], 'like_count': record['like_count'] } for record in result ]
@@ -163,7 +454,7 @@ def get_adopted_pet_ids(user_id):
     """
     Return all pet IDs the user has adopted.
     """
-    with driver.session() as session:
+    with _driver().session() as session:
         result = session.run(
             """
             MATCH (u:User {id: $user_id})-[:ADOPTED]->(p:Pet)
@@ -177,7 +468,7 @@ def get_shared_like_counts(user_id: int) -> dict[int,int]:
     """
     other_user_id -> number of pets both have LIKED.
     """
-    with driver.session() as session:
+    with _driver().session() as session:
         result = session.run(
             """
             MATCH (u:User {id: $uid})-[:LIKES]->(p:Pet)<-[:LIKES]-(o:User)
@@ -192,7 +483,7 @@ def get_shared_adoption_shelter_counts(user_id: int) -> dict[int,int]:
     """
     Returns a map: other_user_id -> number of shelters both have adopted from.
     """
-    with driver.session() as session:
+    with _driver().session() as session:
         result = session.run(
             """
             MATCH (u:User {id: $uid})-[:ADOPTED]->(:Pet)-[:LOCATED_AT]->(s:Shelter)
@@ -206,7 +497,7 @@ def get_shared_preference_tag_counts(user_id: int) -> dict[int,int]:
     """
     other_user_id -> number of tags both users prefer.
     """
-    with driver.session() as session:
+    with _driver().session() as session:
         result = session.run(
             """
             MATCH (u:User {id: $uid})-[:PREFERS_TAG]->(t:Tag)<-[:PREFERS_TAG]-(o:User)
@@ -219,24 +510,44 @@ def get_shared_preference_tag_counts(user_id: int) -> dict[int,int]:
 
 def get_unliked_pet_ids() -> list[int]:
     """
-    Return IDs of all Pet nodes with NO incoming LIKES edges.
+    Return IDs of all Pet nodes with NO incoming LIKES edges
+    (like_count = 0, an index lookup). Pets without a like_count are not
+    seen; ensure_graph_schema backfills it and check_graph_schema warns.
     """
-    with driver.session() as session:
+    with _driver().session() as session:
         result = session.run(
             """
             MATCH (p:Pet)
-            WHERE NOT ( ()-[:LIKES]->(p) )
+            WHERE p.like_count = 0
             RETURN p.id AS pet_id
             """
         )
         records = list(result)
     return [r["pet_id"] for r in records]
 
+def filter_unliked_pet_ids(pet_ids) -> list[int]:
+    """
+    The ids among `pet_ids` whose Pet node has no LIKES (one indexed lookup
+    per id, so callers can check a catalog chunk by chunk).
+    """
+    with _driver().session() as session:
+        result = session.run(
+            """
+            UNWIND $ids AS id
+            MATCH (p:Pet {id: id})
+            WHERE coalesce(p.like_count, 0) = 0
+            RETURN p.id AS pet_id
+            """,
+            ids=list(pet_ids)
+        )
+        records = list(result)
+    return [r["pet_id"] for r in records]
+
 def get_like_count_for_user(user_id: int) -> int:
     """
     Return the number of :LIKES edges this user has made.
     """
-    with driver.session() as session:
+    with _driver().session() as session:
         result = session.run(
             """
             MATCH (:User {id: $uid})-[r:LIKES]->(:Pet)
@@ -250,13 +561,15 @@ def get_like_count_for_user(user_id: int) -> int:
 def get_like_counts_by_breed() -> dict[str,int]:
     """
     Returns a map: breed_name -> total number of LIKES on pets of that breed,
-    based on the `breed` property on Pet nodes rather than a separate label.
+    based on the `breed` property on Pet nodes (kept as Breed.like_count
+    by the like writers).
     """
-    with driver.session() as session:
+    with _driver().session() as session:
         result = session.run(
             """
-            MATCH (:User)-[:LIKES]->(p:Pet)
-            RETURN p.breed AS breed, count(*) AS like_count
+            MATCH (b:Breed)
+            WHERE b.like_count > 0
+            RETURN b.name AS breed, b.like_count AS like_count
             """
         )
         records = list(result)
@@ -265,15 +578,75 @@ def get_like_counts_by_breed() -> dict[str,int]:
 
 def get_like_counts_by_tag() -> dict[str,int]:
     """
-    Returns a map: tag_name -> total number of LIKES on pets carrying that tag.
+    Returns a map: tag_name -> total number of LIKES on pets carrying that tag
+    (kept as Tag.like_count by the like writers).
     """
-    with driver.session() as session:
+    with _driver().session() as session:
         result = session.run(
             """
-            MATCH (:User)-[:LIKES]->(p:Pet)-[:HAS_TAG]->(t:Tag)
-            RETURN t.name AS tag, count(*) AS like_count
+            MATCH (t:Tag)
+            WHERE t.like_count > 0
+            RETURN t.name AS tag, t.like_count AS like_count
             """
         )
         records = list(result)
     return {r["tag"]: r["like_count"] for r in records}
 
+def reconcile_like_counts():
+    """
+    Recompute Pet.like_count from the LIKES edges, then the Breed and Tag
+    aggregates from the pets (e.g. after bulk imports, a pet's breed
+    changing, or edges written without the like writers). Each node is
+    write-locked before its count is read and is set in the same
+    transaction, so readers never see a reset counter and a like committed
+    concurrently is counted once. Nodes are updated in batches per
+    transaction. Returns the number of liked pets.
+    """
+    with _driver().session() as session:
+        # CALL ... IN TRANSACTIONS needs an auto-commit transaction: session.run
+        session.run("""
+            MATCH (p:Pet)
+            CALL {
+                WITH p
+                SET p._lock = true
+                WITH p
+                SET p.like_count = COUNT { (:User)-[:LIKES]->(p) }
+                REMOVE p._lock
+            } IN TRANSACTIONS OF 10000 ROWS
+        """).consume()
+        session.run("""
+            MATCH (p:Pet)
+            WHERE p.breed IS NOT NULL
+            WITH DISTINCT p.breed AS breed
+            MERGE (:Breed {name: breed})
+        """).consume()
+        session.run("""
+            MATCH (b:Breed)
+            CALL {
+                WITH b
+                SET b._lock = true
+                WITH b
+                OPTIONAL MATCH (p:Pet {breed: b.name})
+                WITH b, sum(coalesce(p.like_count, 0)) AS likes
+                SET b.like_count = likes
+                REMOVE b._lock
+            } IN TRANSACTIONS OF 1000 ROWS
+        """).consume()
+        session.run("""
+            MATCH (t:Tag)
+            CALL {
+                WITH t
+                SET t._lock = true
+                WITH t
+                OPTIONAL MATCH (p:Pet)-[:HAS_TAG]->(t)
+                WITH t, sum(coalesce(p.like_count, 0)) AS likes
+                SET t.like_count = likes
+                REMOVE t._lock
+            } IN TRANSACTIONS OF 1000 ROWS
+        """).consume()
+        record = session.run("""
+            MATCH (p:Pet)
+            WHERE p.like_count > 0
+            RETURN count(p) AS liked
+        """).single()
+    return record["liked"]
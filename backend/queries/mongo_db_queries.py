@@ -1,141 +1,1129 @@
-import os
-from pymongo import MongoClient
-from dotenv import load_dotenv
-from datetime import datetime
-from queries.sql_queries import get_available_pet_ids
+import logging
+import math
+import re
+from collections import defaultdict
+from numbers import Number
 
-# Load .env file
-load_dotenv()
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, UpdateMany, UpdateOne
+from pymongo.results import InsertOneResult
+from pymongo.errors import BulkWriteError, CollectionInvalid, OperationFailure, PyMongoError
+from datetime import datetime, timedelta, timezone
 
-# Read from .env
-mongo_uri = os.getenv("MONGO_URI")
+from queries.clients import registry
+from queries.pagination import decode_token, encode_token
 
-# Connect to MongoDB
-client = MongoClient(mongo_uri)
-db = client["pet_tracker"]
+logger = logging.getLogger(__name__)
 
-# Access collections
-pet_profiles = db.pet_profiles
-user_feedback = db.user_feedback
-shelter_reports = db.shelter_reports
-follow_up_reports = db.follow_up_reports
+# Collections used below. They are reached through _db(), so importing this
+# module does not create a MongoClient; the client is built on first use.
+# pet_rating_stats holds one document per pet (_id = pet_id): sum, count,
+# min, max and a histogram of ratings, kept up to date by the feedback writers.
+# On a replica set the feedback and its stats update commit in one
+# transaction; on a standalone server the stats update is a second write and
+# the stats are eventually consistent: `python manage.py rating-stats verify`
+# reports drift and `rating-stats rebuild` repairs it.
+# shelter_reports is the legacy (pre time-series) home of shelter reports; see
+# migrate_legacy_shelter_reports.
+COLLECTIONS = ("pet_profiles", "user_feedback", "shelter_reports",
+               "follow_up_reports", "pet_rating_stats",
+               "shelter_report_series", "shelter_report_rollups")
+
+
+def _db():
+    return registry.mongo_db()
+
+
+def __getattr__(name):
+    # Backwards compatibility for `from queries.mongo_db_queries import client`,
+    # `db` or a collection name: resolved lazily through the registry.
+    if name == "client":
+        return registry.mongo_client()
+    if name == "db":
+        return _db()
+    if name in COLLECTIONS:
+        return _db()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+BULK_CHUNK_SIZE = 1000
+# Documents per getMore when streaming histories, and page sizes of the
+# token-paginated readers.
+HISTORY_BATCH_SIZE = 500
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 500
+
+# Indexes backing the queries below, per collection.
+MONGO_INDEXES = {
+    "pet_profiles": [
+        # insert/lookup by pet, $in over pet_id, one profile per pet
+        IndexModel([("pet_id", ASCENDING)], name="pet_id_unique", unique=True),
+        # find_pets_by_tags / get_all_unique_tags (multikey)
+        IndexModel([("tags", ASCENDING)], name="tags"),
+        # get_supply_counts_by_tag: only available profiles are read
+        IndexModel([("available", ASCENDING), ("tags", ASCENDING)], name="available_tags"),
+        # search_pets (one text index per collection)
+        IndexModel([("behaviorNotes", TEXT), ("dietaryNeeds", TEXT)], name="profile_text",
+                   weights={"behaviorNotes": 3, "dietaryNeeds": 1}, default_language="english"),
+    ],
+    "user_feedback": [
+        # get_feedback_count_for_user, get_liked_tags_by_user, own side of
+        # get_shared_feedback_counts
+        IndexModel([("user_id", ASCENDING), ("pet_id", ASCENDING)], name="user_id_pet_id"),
+        # get_feedback_for_pet, get_average_rating_for_pet, pet side of
+        # get_shared_feedback_counts, get_reviewed_pet_ids
+        IndexModel([("pet_id", ASCENDING), ("rating", ASCENDING)], name="pet_id_rating"),
+        # feedback history of a pet in timestamp order (iter_/page readers)
+        IndexModel([("pet_id", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)],
+                   name="pet_id_timestamp"),
+        # review side of search_pets
+        IndexModel([("reviewText", TEXT)], name="review_text", default_language="english"),
+    ],
+    "follow_up_reports": [
+        # follow-up history of a pet in report_date order
+        IndexModel([("pet_id", ASCENDING), ("report_date", ASCENDING), ("_id", ASCENDING)],
+                   name="pet_id_report_date"),
+        # get_follow_up_analytics(since=...) and get_first_follow_ups
+        IndexModel([("report_date", ASCENDING)], name="report_date"),
+        IndexModel([("adoption_id", ASCENDING), ("report_date", ASCENDING)],
+                   name="adoption_id_report_date"),
+    ],
+    "shelter_report_series": [
+        # range reads of a shelter's daily reports (meta + time field)
+        IndexModel([("shelter_id", ASCENDING), ("date", ASCENDING)], name="shelter_id_date"),
+    ],
+    "shelter_report_rollups": [
+        IndexModel([("shelter_id", ASCENDING), ("period", ASCENDING), ("start", ASCENDING)],
+                   name="shelter_id_period_start"),
+    ],
+}
 
 if __name__ == "__main__":
     try:
         # Test the connection
-        db.command('ping')
+        _db().command('ping')
         print("Successfully connected to MongoDB!")
         
         # Print database info
-        print("\nAvailable collections:", db.list_collection_names())
+        print("\nAvailable collections:", _db().list_collection_names())
         
     except Exception as e:
         print("Failed to connect to MongoDB:", e)
 
 
+def ensure_mongo_indexes(database=None):
+    """
+    Create any missing index from MONGO_INDEXES. Safe to run repeatedly
+    (at startup or on demand). Returns a report:
+      {"created": ["coll.index", ...], "existing": [...], "failed": [("coll.index", error), ...]}
+    """
+    database = _db() if database is None else database
+    report = {"created": [], "existing": [], "failed": []}
+    # Must exist before its index is built, or a plain collection is created.
+    try:
+        ensure_shelter_report_series(database)
+    except CollectionInvalid as exc:
+        report["failed"].append(("shelter_report_series", str(exc)))
+    for collection_name, models in MONGO_INDEXES.items():
+        collection = database[collection_name]
+        present = set(collection.index_information())
+        for model in models:
+            name = model.document["name"]
+            label = f"{collection_name}.{name}"
+            if name in present:
+                report["existing"].append(label)
+                continue
+            try:
+                collection.create_indexes([model])
+            except OperationFailure as exc:
+                # e.g. duplicate pet_ids blocking the unique index, or the same
+                # keys already indexed under another name
+                report["failed"].append((label, str(exc)))
+            else:
+                report["created"].append(label)
+    return report
+
 #functions to insert data into the database
 
-def insert_pet_profile(pet_id, gallery, tags, health_history, behavior_notes, dietary_needs):
-    doc = {
+def _bulk_insert(collection, docs, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Insert `docs` with unordered insert_many calls of `chunk_size` documents.
+    One bad document does not stop the rest of its chunk. Returns
+      {"inserted_ids": [...], "errors": [{"index", "code", "errmsg"}, ...]}
+    where inserted_ids is aligned with the input (None where the insert
+    failed) and each error's index points into the input.
+    """
+    docs = list(docs)
+    inserted_ids = [None] * len(docs)
+    errors = []
+    for start in range(0, len(docs), chunk_size):
+        chunk = docs[start:start + chunk_size]
+        failed = set()
+        try:
+            collection.insert_many(chunk, ordered=False)
+        except BulkWriteError as exc:
+            for err in exc.details.get("writeErrors", []):
+                failed.add(err["index"])
+                errors.append({
+                    "index": start + err["index"],
+                    "code": err.get("code"),
+                    "errmsg": err.get("errmsg")
+                })
+        # insert_many assigns _id on the documents client-side
+        for offset, doc in enumerate(chunk):
+            if offset not in failed:
+                inserted_ids[start + offset] = doc["_id"]
+    return {"inserted_ids": inserted_ids, "errors": errors}
+
+#streaming and paginated history readers
+
+def _sort_spec(sort_field, newest_first):
+    direction = DESCENDING if newest_first else ASCENDING
+    return [(sort_field, direction), ("_id", direction)]
+
+def _encode_position(doc, sort_field):
+    value = doc.get(sort_field)
+    if isinstance(value, datetime):
+        value = {"$date": value.isoformat()}
+    return encode_token({"key": value, "id": str(doc["_id"])})
+
+def _decode_position(token):
+    position = decode_token(token)
+    try:
+        value, doc_id = position["key"], ObjectId(position["id"])
+    except (KeyError, TypeError, InvalidId) as exc:
+        raise ValueError(f"invalid continuation token: {token!r}") from exc
+    if isinstance(value, dict) and "$date" in value:
+        value = datetime.fromisoformat(value["$date"])
+    return value, doc_id
+
+def _after_filter(flt, sort_field, after, newest_first):
+    """`flt` restricted to documents that sort after the `after` token."""
+    if after is None:
+        return flt
+    value, doc_id = _decode_position(after)
+    op = "$lt" if newest_first else "$gt"
+    return {**flt, "$or": [
+        {sort_field: {op: value}},
+        {sort_field: value, "_id": {op: doc_id}},
+    ]}
+
+def _iter_history(collection, flt, sort_field, projection=None,
+                  batch_size=HISTORY_BATCH_SIZE, newest_first=False):
+    """
+    Yield the documents matching `flt` ordered by (sort_field, _id), fetched
+    `batch_size` at a time so only one batch is held in memory.
+    """
+    cursor = collection.find(flt, projection, sort=_sort_spec(sort_field, newest_first),
+                             batch_size=batch_size)
+    try:
+        yield from cursor
+    finally:
+        cursor.close()
+
+def _history_page(collection, flt, sort_field, projection=None, limit=HISTORY_PAGE_SIZE,
+                  after=None, newest_first=False):
+    """
+    One page of the documents matching `flt` ordered by (sort_field, _id).
+    Returns (docs, next_token); next_token is None on the last page. The
+    sort field and _id are always returned since the token is built from them.
+    """
+    limit = max(1, min(int(limit), HISTORY_MAX_PAGE_SIZE))
+    if projection is not None:
+        if not isinstance(projection, dict):
+            projection = {field: 1 for field in projection}
+        if any(v for k, v in projection.items() if k != "_id"):
+            projection = {**projection, sort_field: 1, "_id": 1}
+        else:
+            projection = {k: v for k, v in projection.items() if k not in (sort_field, "_id")}
+    docs = list(collection.find(
+        _after_filter(flt, sort_field, after, newest_first), projection,
+        sort=_sort_spec(sort_field, newest_first), limit=limit + 1,
+    ))
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_token = _encode_position(docs[-1], sort_field) if has_more else None
+    return docs, next_token
+
+def _pet_profile_doc(pet_id, gallery, tags, health_history, behavior_notes, dietary_needs,
+                     available=True):
+    return {
         "pet_id": pet_id,
         "gallery": gallery,
         "tags": tags,
         "healthHistory": health_history,
         "behaviorNotes": behavior_notes,
-        "dietaryNeeds": dietary_needs
+        "dietaryNeeds": dietary_needs,
+        # mirrors pets.status == 'available' in SQL
+        "available": available
     }
-    return pet_profiles.insert_one(doc)
+
+def insert_pet_profile(pet_id, gallery, tags, health_history, behavior_notes, dietary_needs,
+                       available=True):
+    doc = _pet_profile_doc(pet_id, gallery, tags, health_history, behavior_notes,
+                           dietary_needs, available)
+    return _db().pet_profiles.insert_one(doc)
+
+def set_pet_profile_availability(pet_id, available):
+    """Mirror a pet's SQL status onto its profile's `available` flag."""
+    return _db().pet_profiles.update_one({"pet_id": pet_id}, {"$set": {"available": available}})
+
+def mark_profiles_available(pet_ids, sync_token):
+    """
+    Flag the given pets as available and stamp them with `sync_token`
+    (one step of a full availability resync, see
+    core_functions.sync_pet_profile_availability).
+    """
+    return _db().pet_profiles.update_many(
+        {"pet_id": {"$in": list(pet_ids)}},
+        {"$set": {"available": True, "availability_sync": sync_token}}
+    )
+
+def mark_unstamped_profiles_unavailable(sync_token):
+    """Flag every profile not stamped with `sync_token` as unavailable."""
+    return _db().pet_profiles.update_many(
+        {"availability_sync": {"$ne": sync_token}, "available": {"$ne": False}},
+        {"$set": {"available": False}}
+    )
+
+def insert_pet_profiles_bulk(records, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Bulk variant of insert_pet_profile. Each record is a dict with the
+    same keyword arguments. See _bulk_insert for the return value.
+    """
+    return _bulk_insert(_db().pet_profiles, (_pet_profile_doc(**r) for r in records), chunk_size)
 
 def find_pets_by_tags(tag_list):
-    result =  list(pet_profiles.find({
+    result =  list(_db().pet_profiles.find({
         "tags": {"$in": tag_list}
     }))
     return result
 
-def insert_user_feedback(user_id, pet_id, review_text, rating):
-    doc = {
+def get_top_pets_by_tag_overlap(tag_list, exclude_pet_ids=None, limit=5):
+    """
+    Score pets by how many of `tag_list` they carry, entirely in MongoDB.
+    Pets in `exclude_pet_ids` are skipped. Returns up to `limit` dicts
+    {'pet_id': int, 'score': int}, best overlap first (ties by pet_id).
+    """
+    if not tag_list or limit <= 0:
+        return []
+
+    match = {"tags": {"$in": list(tag_list)}}
+    if exclude_pet_ids:
+        match["pet_id"] = {"$nin": list(exclude_pet_ids)}
+
+    pipeline = [
+        {"$match": match},
+        {"$project": {
+            "_id": 0,
+            "pet_id": 1,
+            "score": {"$size": {"$setIntersection": [
+                {"$ifNull": ["$tags", []]}, list(tag_list)
+            ]}}
+        }},
+        # $sort followed by $limit is a bounded top-k sort on the server
+        {"$sort": {"score": -1, "pet_id": 1}},
+        {"$limit": limit}
+    ]
+    return list(_db().pet_profiles.aggregate(pipeline))
+
+#full-text search over profiles and reviews
+
+SEARCH_LIMIT = 20
+# Review matches count for less than matches in the pet's own profile.
+REVIEW_SCORE_WEIGHT = 0.5
+# Best-scoring matching reviews kept per search before they are grouped by pet.
+REVIEW_SCAN_LIMIT = 10_000
+SNIPPET_CHARS = 120
+
+def _search_terms(query):
+    """Lower-cased words of a $text query, without negated (-word) terms."""
+    return [word.lower() for negated, word in re.findall(r'(-?)(\w+)', query) if not negated]
+
+def _snippet(text, terms, width=SNIPPET_CHARS):
+    """
+    Up to `width` characters of `text` around the first query term (matched
+    on a crude stem, since $text matches stemmed words), or None.
+    """
+    if not text or not terms:
+        return None
+    stems = [t[:-1] if len(t) > 3 and t.endswith("s") else t for t in terms]
+    match = re.search(r'\b(' + "|".join(map(re.escape, stems)) + r')', text, re.IGNORECASE)
+    if match is None:
+        return None
+    start = max(0, match.start() - width // 3)
+    end = min(len(text), start + width)
+    return ("…" if start else "") + text[start:end].strip() + ("…" if end < len(text) else "")
+
+def _profile_filter(tags, match_all_tags, available):
+    flt = {}
+    if tags:
+        flt["tags"] = {"$all" if match_all_tags else "$in": list(tags)}
+    if available is not None:
+        flt["available"] = available
+    return flt
+
+def search_pets(query, tags=None, match_all_tags=False, available=None,
+                include_reviews=True, limit=SEARCH_LIMIT):
+    """
+    Ranked full-text search over pet_profiles behaviorNotes/dietaryNeeds and,
+    with include_reviews, user_feedback reviewText. `query` uses $text
+    syntax ("good with cats", quoted phrases, -negation). Results can be
+    restricted to pets carrying any (or, with match_all_tags, all) of `tags`
+    and to available=True/False profiles.
+    Returns up to `limit` dicts {"pet_id", "score", "snippets": [str, ...]},
+    best match first.
+    """
+    if not query or not query.strip() or limit <= 0:
+        return []
+    terms = _search_terms(query)
+    profile_filter = _profile_filter(tags, match_all_tags, available)
+    candidates = limit * 5
+
+    hits = {}
+    profiles = _db().pet_profiles.find(
+        {"$text": {"$search": query}, **profile_filter},
+        {"_id": 0, "pet_id": 1, "behaviorNotes": 1, "dietaryNeeds": 1,
+         "score": {"$meta": "textScore"}},
+        sort=[("score", {"$meta": "textScore"})],
+        limit=candidates,
+    )
+    for doc in profiles:
+        snippets = [_snippet(doc.get(field), terms) for field in ("behaviorNotes", "dietaryNeeds")]
+        hits[doc["pet_id"]] = {"pet_id": doc["pet_id"], "score": doc["score"],
+                               "snippets": [s for s in snippets if s]}
+
+    if include_reviews:
+        pipeline = [
+            {"$match": {"$text": {"$search": query}}},
+            # keep the best-scoring reviews, not an arbitrary subset (top-k sort)
+            {"$sort": {"score": {"$meta": "textScore"}}},
+            {"$limit": REVIEW_SCAN_LIMIT},
+            {"$set": {"score": {"$meta": "textScore"}}},
+            {"$group": {
+                "_id": "$pet_id",
+                "score": {"$sum": "$score"},
+                # $max compares the embedded documents by score first
+                "best": {"$max": {"score": "$score", "text": "$reviewText"}},
+            }},
+        ]
+        if profile_filter:
+            # tag / availability filters live on the profile; applied before
+            # the cut to `candidates` so filtered pets do not crowd out matches
+            pipeline += [
+                {"$lookup": {
+                    "from": "pet_profiles",
+                    "let": {"pet_id": "$_id"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$pet_id", "$$pet_id"]}, **profile_filter}},
+                        {"$project": {"_id": 1}},
+                    ],
+                    "as": "profile",
+                }},
+                {"$match": {"profile": {"$ne": []}}},
+            ]
+        pipeline += [
+            {"$sort": {"score": -1, "_id": 1}},
+            {"$limit": candidates},
+        ]
+        for review in _db().user_feedback.aggregate(pipeline):
+            hit = hits.setdefault(review["_id"], {"pet_id": review["_id"], "score": 0.0,
+                                                  "snippets": []})
+            hit["score"] += REVIEW_SCORE_WEIGHT * review["score"]
+            snippet = _snippet(review["best"]["text"], terms)
+            if snippet:
+                hit["snippets"].append(snippet)
+
+    ranked = sorted(hits.values(), key=lambda hit: (-hit["score"], hit["pet_id"]))
+    return ranked[:limit]
+
+def _user_feedback_doc(user_id, pet_id, review_text, rating):
+    return {
         "user_id": user_id,
         "pet_id": pet_id,
         "reviewText": review_text,
         "rating": rating,
         "timestamp": datetime.utcnow().isoformat()
     }
-    return user_feedback.insert_one(doc)
+
+def _histogram_key(rating):
+    # 4.0 and 4 land in the same bucket; "." is not allowed in field paths.
+    if isinstance(rating, float) and rating.is_integer():
+        rating = int(rating)
+    return str(rating).replace(".", "_")
+
+def _rating_stats_update(ratings):
+    """$inc/$min/$max update folding `ratings` into a pet's stats document."""
+    inc = {"sum": sum(ratings), "count": len(ratings)}
+    for rating in ratings:
+        key = f"histogram.{_histogram_key(rating)}"
+        inc[key] = inc.get(key, 0) + 1
+    return {"$inc": inc, "$min": {"min": min(ratings)}, "$max": {"max": max(ratings)}}
+
+def _rating_stats_ops(docs):
+    """One upsert per pet folding the numeric ratings of `docs` into its stats."""
+    ratings_by_pet = defaultdict(list)
+    for doc in docs:
+        if isinstance(doc["rating"], Number):
+            ratings_by_pet[doc["pet_id"]].append(doc["rating"])
+    return [UpdateOne({"_id": pet_id}, _rating_stats_update(ratings), upsert=True)
+            for pet_id, ratings in ratings_by_pet.items()]
+
+def _supports_transactions():
+    # Multi-document transactions need a replica set or a sharded cluster.
+    client = _db().client
+    if client.topology_description.topology_type_name == "Unknown":
+        client.admin.command("ping")
+    return client.topology_description.topology_type_name in (
+        "ReplicaSetWithPrimary", "Sharded", "LoadBalanced")
+
+def _apply_rating_stats(ops):
+    """
+    Stats update after a feedback write outside a transaction. A failure is
+    logged, not raised: the feedback is stored, so raising would invite a
+    retry that stores it twice. `rating-stats verify/rebuild` repair it.
+    """
+    if not ops:
+        return
+    try:
+        _db().pet_rating_stats.bulk_write(ops, ordered=False)
+    except PyMongoError:
+        logger.warning("pet_rating_stats update failed; the stats lag user_feedback "
+                       "until `python manage.py rating-stats rebuild`", exc_info=True)
+
+def _insert_feedback_in_transaction(docs):
+    # feedback and stats commit together, or neither does
+    def write(session):
+        result = _db().user_feedback.insert_many(docs, ordered=False, session=session)
+        ops = _rating_stats_ops(docs)
+        if ops:
+            _db().pet_rating_stats.bulk_write(ops, ordered=False, session=session)
+        return result
+
+    with _db().client.start_session() as session:
+        return session.with_transaction(write)
+
+def insert_user_feedback(user_id, pet_id, review_text, rating):
+    """
+    Insert one review and fold its rating into pet_rating_stats, in one
+    transaction on a replica set. On a standalone server the stats are
+    updated afterwards (see _apply_rating_stats).
+    """
+    doc = _user_feedback_doc(user_id, pet_id, review_text, rating)
+    if _supports_transactions():
+        _insert_feedback_in_transaction([doc])
+        return InsertOneResult(doc["_id"], acknowledged=True)
+    result = _db().user_feedback.insert_one(doc)
+    _apply_rating_stats(_rating_stats_ops([doc]))
+    return result
+
+def insert_user_feedback_bulk(records, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Bulk variant of insert_user_feedback. Each record is a dict with the
+    same keyword arguments. See _bulk_insert for the return value.
+    On a replica set each chunk and its stats commit in one transaction; a
+    chunk with a failing document is rolled back and retried without one,
+    so the other documents still go in and each error is reported.
+    """
+    docs = [_user_feedback_doc(**r) for r in records]
+    transactions = _supports_transactions()
+    result = {"inserted_ids": [None] * len(docs), "errors": []}
+    for start in range(0, len(docs), chunk_size):
+        chunk = docs[start:start + chunk_size]
+        if transactions:
+            try:
+                _insert_feedback_in_transaction(chunk)
+            except BulkWriteError:
+                pass  # rolled back; fall through to the per-document path
+            else:
+                result["inserted_ids"][start:start + len(chunk)] = [d["_id"] for d in chunk]
+                continue
+        part = _bulk_insert(_db().user_feedback, chunk, chunk_size)
+        result["inserted_ids"][start:start + len(chunk)] = part["inserted_ids"]
+        result["errors"] += [{**err, "index": start + err["index"]} for err in part["errors"]]
+        _apply_rating_stats(_rating_stats_ops(
+            doc for doc, inserted_id in zip(chunk, part["inserted_ids"]) if inserted_id is not None))
+    return result
 
 def get_feedback_for_pet(pet_id):
-    return list(user_feedback.find({"pet_id": pet_id}))
+    return list(iter_feedback_for_pet(pet_id))
 
-def insert_shelter_report(shelter_id, date, occupancy, notes, intake, adoptions):
-    doc = {
+def iter_feedback_for_pet(pet_id, projection=None, batch_size=HISTORY_BATCH_SIZE,
+                          newest_first=False):
+    """Stream a pet's feedback in timestamp order without buffering it."""
+    return _iter_history(_db().user_feedback, {"pet_id": pet_id}, "timestamp",
+                         projection, batch_size, newest_first)
+
+def get_feedback_page_for_pet(pet_id, limit=HISTORY_PAGE_SIZE, after=None,
+                              projection=None, newest_first=False):
+    """
+    One page of a pet's feedback in timestamp order. Pass the returned
+    `next_token` as `after` for the next page.
+    Returns {"feedback": [doc, ...], "next_token": str | None}.
+    """
+    docs, next_token = _history_page(_db().user_feedback, {"pet_id": pet_id}, "timestamp",
+                                     projection, limit, after, newest_first)
+    return {"feedback": docs, "next_token": next_token}
+
+#shelter reports: one document per shelter and day in a time-series
+#collection, plus weekly and monthly rollups kept up to date on insert
+
+ROLLUP_PERIODS = ("week", "month")
+
+# Databases (by name) whose shelter_report_series was checked by this process.
+_series_checked = set()
+
+def ensure_shelter_report_series(database=None):
+    """
+    Create the shelter_report_series time-series collection if it does not
+    exist yet. Returns True when it was created. Raises CollectionInvalid if
+    a plain collection of that name is in the way (e.g. auto-created by an
+    insert that ran before this check): rename it out of the way and
+    re-insert its reports with insert_shelter_reports_bulk.
+    """
+    database = _db() if database is None else database
+    existing = list(database.list_collections(filter={"name": "shelter_report_series"}))
+    if existing:
+        if existing[0].get("type") != "timeseries":
+            raise CollectionInvalid(
+                f"{database.name}.shelter_report_series exists but is not a "
+                f"time-series collection")
+        return False
+    try:
+        database.create_collection("shelter_report_series", timeseries={
+            "timeField": "date",
+            "metaField": "shelter_id",
+            "granularity": "hours",
+        })
+    except CollectionInvalid:
+        # created concurrently by another process
+        return False
+    return True
+
+def _shelter_report_series():
+    # Checked once per process before the first write, so an insert never
+    # auto-creates shelter_report_series as a plain collection.
+    database = _db()
+    if database.name not in _series_checked:
+        ensure_shelter_report_series(database)
+        _series_checked.add(database.name)
+    return database.shelter_report_series
+
+def _report_day(value):
+    """Midnight (naive UTC) of a datetime, date or ISO date string."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _period_start(day, period):
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+def _shelter_report_doc(shelter_id, date, occupancy, notes, intake, adoptions):
+    return {
         "shelter_id": shelter_id,
-        "date": date,
+        "date": _report_day(date),
         "occupancy": occupancy,
         "notes": notes,
         "intake": intake,
         "adoptions": adoptions
     }
-    return shelter_reports.insert_one(doc)
 
-def get_shelter_reports(shelter_id):
-    return list(shelter_reports.find({"shelter_id": shelter_id}))
+def _rollup_updates(docs):
+    """UpdateOne ops adding `docs` to their weekly and monthly rollups."""
+    totals = {}
+    for doc in docs:
+        occupancy = doc["occupancy"] if isinstance(doc["occupancy"], Number) else None
+        for period in ROLLUP_PERIODS:
+            start = _period_start(doc["date"], period)
+            key = f"{doc['shelter_id']}:{period}:{start:%Y-%m-%d}"
+            t = totals.setdefault(key, {
+                "meta": {"shelter_id": doc["shelter_id"], "period": period, "start": start},
+                "inc": {"days": 0, "occupancy_sum": 0, "intake": 0, "adoptions": 0},
+                "min": None, "max": None,
+            })
+            t["inc"]["days"] += 1
+            for field, value in (("occupancy_sum", occupancy), ("intake", doc["intake"]),
+                                 ("adoptions", doc["adoptions"])):
+                if isinstance(value, Number):
+                    t["inc"][field] += value
+            if occupancy is not None:
+                t["min"] = occupancy if t["min"] is None else min(t["min"], occupancy)
+                t["max"] = occupancy if t["max"] is None else max(t["max"], occupancy)
+
+    ops = []
+    for key, t in totals.items():
+        update = {"$setOnInsert": t["meta"], "$inc": t["inc"]}
+        if t["min"] is not None:
+            update["$min"] = {"occupancy_min": t["min"]}
+            update["$max"] = {"occupancy_max": t["max"]}
+        ops.append(UpdateOne({"_id": key}, update, upsert=True))
+    return ops
+
+def insert_shelter_report(shelter_id, date, occupancy, notes, intake, adoptions):
+    doc = _shelter_report_doc(shelter_id, date, occupancy, notes, intake, adoptions)
+    result = _shelter_report_series().insert_one(doc)
+    _db().shelter_report_rollups.bulk_write(_rollup_updates([doc]), ordered=False)
+    return result
+
+def insert_shelter_reports_bulk(records, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Bulk variant of insert_shelter_report. Each record is a dict with the
+    same keyword arguments. Rollups only count the reports that were
+    inserted. See _bulk_insert for the return value.
+    """
+    docs = [_shelter_report_doc(**r) for r in records]
+    result = _bulk_insert(_shelter_report_series(), docs, chunk_size)
+    inserted = [doc for doc, inserted_id in zip(docs, result["inserted_ids"])
+                if inserted_id is not None]
+    if inserted:
+        _db().shelter_report_rollups.bulk_write(_rollup_updates(inserted), ordered=False)
+    return result
+
+def _shelter_range_filter(shelter_id, start, end):
+    """Reports of `shelter_id` with start <= date < end (either bound optional)."""
+    flt = {"shelter_id": shelter_id}
+    bounds = {}
+    if start is not None:
+        bounds["$gte"] = _report_day(start)
+    if end is not None:
+        bounds["$lt"] = _report_day(end)
+    if bounds:
+        flt["date"] = bounds
+    return flt
+
+def get_shelter_reports(shelter_id, start=None, end=None):
+    return list(iter_shelter_reports(shelter_id, start, end))
+
+def iter_shelter_reports(shelter_id, start=None, end=None, projection=None,
+                         batch_size=HISTORY_BATCH_SIZE, newest_first=False):
+    """Stream a shelter's daily reports in [start, end) in date order."""
+    return _iter_history(_db().shelter_report_series,
+                         _shelter_range_filter(shelter_id, start, end), "date",
+                         projection, batch_size, newest_first)
+
+def get_shelter_reports_page(shelter_id, start=None, end=None, limit=HISTORY_PAGE_SIZE,
+                             after=None, projection=None, newest_first=False):
+    """
+    One page of a shelter's daily reports in [start, end), in date order.
+    Pass the returned `next_token` as `after` for the next page.
+    Returns {"reports": [doc, ...], "next_token": str | None}.
+    """
+    docs, next_token = _history_page(_db().shelter_report_series,
+                                     _shelter_range_filter(shelter_id, start, end), "date",
+                                     projection, limit, after, newest_first)
+    return {"reports": docs, "next_token": next_token}
+
+def get_shelter_rollups(shelter_id, period="week", start=None, end=None):
+    """
+    Precomputed weekly or monthly totals for a shelter, oldest first, for
+    periods starting in [start, end). Each item:
+      {"start", "days", "avg_occupancy", "min_occupancy", "max_occupancy",
+       "intake", "adoptions"}
+    Weeks start on Monday, months on the 1st.
+    """
+    if period not in ROLLUP_PERIODS:
+        raise ValueError(f"period must be one of {ROLLUP_PERIODS}, got {period!r}")
+    flt = {"shelter_id": shelter_id, "period": period}
+    bounds = {}
+    if start is not None:
+        bounds["$gte"] = _period_start(_report_day(start), period)
+    if end is not None:
+        bounds["$lt"] = _report_day(end)
+    if bounds:
+        flt["start"] = bounds
+
+    rollups = []
+    for doc in _db().shelter_report_rollups.find(flt, sort=[("start", ASCENDING)]):
+        rollups.append({
+            "start": doc["start"],
+            "days": doc["days"],
+            "avg_occupancy": doc["occupancy_sum"] / doc["days"] if doc["days"] else None,
+            "min_occupancy": doc.get("occupancy_min"),
+            "max_occupancy": doc.get("occupancy_max"),
+            "intake": doc["intake"],
+            "adoptions": doc["adoptions"],
+        })
+    return rollups
+
+def rebuild_shelter_rollups():
+    """
+    Recompute shelter_report_rollups from shelter_report_series and swap it
+    in atomically ($out). Reports written while the rebuild runs may be
+    missed, so run it when writers are quiet. Returns the number of rollups.
+    """
+    def numeric(field):
+        return {"$cond": [{"$isNumber": f"${field}"}, f"${field}", 0]}
+
+    pipeline = [
+        {"$set": {"periods": [
+            {"period": "week",
+             "start": {"$dateTrunc": {"date": "$date", "unit": "week", "startOfWeek": "monday"}}},
+            {"period": "month",
+             "start": {"$dateTrunc": {"date": "$date", "unit": "month"}}},
+        ]}},
+        {"$unwind": "$periods"},
+        {"$group": {
+            "_id": {"shelter_id": "$shelter_id", "period": "$periods.period",
+                    "start": "$periods.start"},
+            "days": {"$sum": 1},
+            "occupancy_sum": {"$sum": numeric("occupancy")},
+            # $min/$max ignore missing and null values
+            "occupancy_min": {"$min": {"$cond": [{"$isNumber": "$occupancy"}, "$occupancy", None]}},
+            "occupancy_max": {"$max": {"$cond": [{"$isNumber": "$occupancy"}, "$occupancy", None]}},
+            "intake": {"$sum": numeric("intake")},
+            "adoptions": {"$sum": numeric("adoptions")},
+        }},
+        {"$set": {
+            "shelter_id": "$_id.shelter_id",
+            "period": "$_id.period",
+            "start": "$_id.start",
+            "_id": {"$concat": [
+                {"$toString": "$_id.shelter_id"}, ":", "$_id.period", ":",
+                {"$dateToString": {"date": "$_id.start", "format": "%Y-%m-%d"}},
+            ]},
+        }},
+        {"$out": "shelter_report_rollups"}
+    ]
+    _db().shelter_report_series.aggregate(pipeline)
+    return _db().shelter_report_rollups.estimated_document_count()
+
+def migrate_legacy_shelter_reports(batch_size=BULK_CHUNK_SIZE):
+    """
+    Copy reports from the legacy shelter_reports collection into
+    shelter_report_series, marking each copied document `migrated: true`
+    so the migration can be resumed, then rebuild the rollups. Copies keep
+    the legacy _id, so a batch inserted but not yet marked when a previous
+    run stopped is not copied twice.
+    Returns {"migrated": int, "skipped": [(legacy _id, error), ...]}.
+    """
+    series = _shelter_report_series()
+    legacy = _db().shelter_reports
+    fields = ("shelter_id", "date", "occupancy", "notes", "intake", "adoptions")
+    migrated, skipped = 0, []
+    last_id = None
+    while True:
+        flt = {"migrated": {"$ne": True}}
+        if last_id is not None:
+            flt["_id"] = {"$gt": last_id}
+        batch = list(legacy.find(flt, sort=[("_id", ASCENDING)], limit=batch_size))
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        docs = []
+        for old in batch:
+            try:
+                doc = _shelter_report_doc(**{f: old.get(f) for f in fields})
+            except (TypeError, ValueError, AttributeError) as exc:
+                skipped.append((old["_id"], str(exc)))
+                continue
+            doc["_id"] = old["_id"]
+            docs.append(doc)
+        if docs:
+            ids = [doc["_id"] for doc in docs]
+            # shelter_id and date bound the lookup to the batch's buckets
+            copied = {doc["_id"] for doc in series.find({
+                "shelter_id": {"$in": list({doc["shelter_id"] for doc in docs})},
+                "date": {"$gte": min(doc["date"] for doc in docs),
+                         "$lte": max(doc["date"] for doc in docs)},
+                "_id": {"$in": ids},
+            }, {"_id": 1})}
+            pending = [doc for doc in docs if doc["_id"] not in copied]
+            if pending:
+                series.insert_many(pending, ordered=False)
+            legacy.update_many({"_id": {"$in": ids}}, {"$set": {"migrated": True}})
+            migrated += len(pending)
+
+    rebuild_shelter_rollups()
+    return {"migrated": migrated, "skipped": skipped}
 
-def insert_follow_up_report(follow_up_id, report_date, pet_id, user_id, review_text, picture, energy_level):
-    doc = {
+# adoption_id, breed and shelter_id are copied from PostgreSQL so the
+# follow-up analytics can group without a cross-database join.
+def _follow_up_report_doc(follow_up_id, report_date, pet_id, user_id, review_text, picture,
+                          energy_level, adoption_id=None, breed=None, shelter_id=None):
+    return {
         "follow_up_id": follow_up_id,
         "report_date": report_date,
         "pet_id": pet_id,
         "user_id": user_id,
         "reviewText": review_text,
         "picture": picture,
-        "energy_level": energy_level
+        "energy_level": energy_level,
+        "adoption_id": adoption_id,
+        "breed": breed,
+        "shelter_id": shelter_id
     }
-    return follow_up_reports.insert_one(doc)
+
+def insert_follow_up_report(follow_up_id, report_date, pet_id, user_id, review_text, picture,
+                            energy_level, adoption_id=None, breed=None, shelter_id=None):
+    doc = _follow_up_report_doc(follow_up_id, report_date, pet_id, user_id,
+                                review_text, picture, energy_level,
+                                adoption_id, breed, shelter_id)
+    return _db().follow_up_reports.insert_one(doc)
+
+def insert_follow_up_reports_bulk(records, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Bulk variant of insert_follow_up_report. Each record is a dict with the
+    same keyword arguments. See _bulk_insert for the return value.
+    """
+    return _bulk_insert(_db().follow_up_reports, (_follow_up_report_doc(**r) for r in records), chunk_size)
 
 def get_follow_ups_for_pet(pet_id):
-    return list(follow_up_reports.find({"pet_id": pet_id}))
+    return list(iter_follow_ups_for_pet(pet_id))
+
+def iter_follow_ups_for_pet(pet_id, projection=None, batch_size=HISTORY_BATCH_SIZE,
+                            newest_first=False):
+    """Stream a pet's follow-up reports in report_date order without buffering them."""
+    return _iter_history(_db().follow_up_reports, {"pet_id": pet_id}, "report_date",
+                         projection, batch_size, newest_first)
+
+def get_follow_ups_page_for_pet(pet_id, limit=HISTORY_PAGE_SIZE, after=None,
+                                projection=None, newest_first=False):
+    """
+    One page of a pet's follow-up reports in report_date order. Pass the
+    returned `next_token` as `after` for the next page.
+    Returns {"follow_ups": [doc, ...], "next_token": str | None}.
+    """
+    docs, next_token = _history_page(_db().follow_up_reports, {"pet_id": pet_id}, "report_date",
+                                     projection, limit, after, newest_first)
+    return {"follow_ups": docs, "next_token": next_token}
+
+def set_follow_up_context(adoptions, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Backfill adoption_id, breed and shelter_id on follow-up reports that do
+    not have them yet. `adoptions` is an iterable of dicts with adoption_id,
+    pet_id, adoption_date, breed and shelter_id, newest adoption first: each
+    one claims the unassigned reports of its pet dated on or after its
+    adoption, so a pet adopted twice keeps reports apart.
+    Returns the number of reports updated.
+    """
+    updated = 0
+    ops = []
+    for adoption in adoptions:
+        flt = {"pet_id": adoption["pet_id"], "adoption_id": None}
+        if adoption.get("adoption_date") is not None:
+            flt["report_date"] = {"$gte": adoption["adoption_date"].isoformat()}
+        ops.append(UpdateMany(flt, {"$set": {
+            "adoption_id": adoption["adoption_id"],
+            "breed": adoption["breed"],
+            "shelter_id": adoption["shelter_id"],
+        }}))
+        if len(ops) >= chunk_size:
+            # ordered, so newer adoptions claim their reports first
+            updated += _db().follow_up_reports.bulk_write(ops).modified_count
+            ops = []
+    if ops:
+        updated += _db().follow_up_reports.bulk_write(ops).modified_count
+    return updated
+
+ENERGY_LEVEL_SCORES = {"low": 1, "medium": 2, "high": 3}
+
+def _energy_trend(key):
+    # Monthly average energy score (low=1 .. high=3) per `key`.
+    return [
+        {"$match": {key: {"$ne": None}}},
+        {"$group": {
+            "_id": {"key": f"${key}", "month": "$month"},
+            "avg_energy": {"$avg": "$energy"},
+            "reports": {"$sum": 1}
+        }},
+        {"$sort": {"_id.key": 1, "_id.month": 1}}
+    ]
+
+def _trend_by_key(rows):
+    trends = defaultdict(list)
+    for row in rows:
+        trends[row["_id"]["key"]].append({
+            "month": row["_id"]["month"],
+            "avg_energy": row["avg_energy"],
+            "reports": row["reports"],
+        })
+    return dict(trends)
+
+def get_follow_up_analytics(since=None, pet_ids=None):
+    """
+    Energy-level trends in a single $facet pass over follow_up_reports dated
+    on or after `since` (an ISO date string; all dated reports when None):
+    "by_pet" / "by_breed" / "by_shelter": {key: [{"month": "YYYY-MM",
+    "avg_energy": float, "reports": int}, ...]} with energy scored low=1,
+    medium=2, high=3; by_pet can be limited to `pet_ids`. Each facet returns
+    one row per key and month, so pass `since` to keep the (16MB) result
+    document and the scan small.
+    """
+    date_filter = {"$ne": None} if since is None else {"$gte": since}
+    by_pet = _energy_trend("pet_id")
+    if pet_ids is not None:
+        by_pet.insert(0, {"$match": {"pet_id": {"$in": list(pet_ids)}}})
+    pipeline = [
+        # report_date index; undated reports have no month to go in
+        {"$match": {"report_date": date_filter}},
+        {"$project": {
+            "_id": 0, "pet_id": 1, "breed": 1, "shelter_id": 1,
+            "reported_at": {"$toDate": "$report_date"},
+            "energy": {"$switch": {
+                "branches": [{"case": {"$eq": ["$energy_level", level]}, "then": score}
+                             for level, score in ENERGY_LEVEL_SCORES.items()],
+                "default": None
+            }}
+        }},
+        {"$set": {"month": {"$dateToString": {"date": "$reported_at", "format": "%Y-%m"}}}},
+        {"$facet": {
+            "by_pet": by_pet,
+            "by_breed": _energy_trend("breed"),
+            "by_shelter": _energy_trend("shelter_id"),
+        }}
+    ]
+    result = next(_db().follow_up_reports.aggregate(pipeline))
+    return {
+        "by_pet": _trend_by_key(result["by_pet"]),
+        "by_breed": _trend_by_key(result["by_breed"]),
+        "by_shelter": _trend_by_key(result["by_shelter"]),
+    }
+
+def get_first_follow_ups(adoption_ids):
+    """
+    First dated follow-up report per adoption, for the given adoption ids
+    (an indexed $match on adoption_id_report_date; pass them in chunks).
+    Returns {adoption_id: {"first_report": datetime, "reports": int}};
+    adoptions without a dated report are left out.
+    """
+    pipeline = [
+        {"$match": {"adoption_id": {"$in": list(adoption_ids)}, "report_date": {"$ne": None}}},
+        {"$group": {
+            "_id": "$adoption_id",
+            "first_report": {"$min": {"$toDate": "$report_date"}},
+            "reports": {"$sum": 1}
+        }}
+    ]
+    return {row["_id"]: {"first_report": row["first_report"], "reports": row["reports"]}
+            for row in _db().follow_up_reports.aggregate(pipeline)}
 
 def get_all_unique_tags():
-    return pet_profiles.distinct("tags")
+    return _db().pet_profiles.distinct("tags")
 
 def get_liked_tags_by_user(user_id, min_rating=4):
-    feedback = user_feedback.find({"user_id": user_id, "rating": {"$gte": min_rating}})
+    feedback = _db().user_feedback.find({"user_id": user_id, "rating": {"$gte": min_rating}})
     liked_pet_ids = [fb["pet_id"] for fb in feedback]
     if not liked_pet_ids:
         return []
 
-    return pet_profiles.distinct("tags", {"pet_id": {"$in": liked_pet_ids}})
+    return _db().pet_profiles.distinct("tags", {"pet_id": {"$in": liked_pet_ids}})
 
 def add_image_to_pet_gallery(pet_id, image_url):
-    return pet_profiles.update_one(
+    return _db().pet_profiles.update_one(
         {"pet_id": pet_id},
         {"$push": {"gallery": image_url}}
     )
 
 def get_average_rating_for_pet(pet_id):
-    pipeline = [
-        {"$match": {"pet_id": pet_id}},
-        {"$group": {"_id": "$pet_id", "avg_rating": {"$avg": "$rating"}}}
-    ]
-    result = list(user_feedback.aggregate(pipeline))
-    return result[0]["avg_rating"] if result else None
+    stats = _db().pet_rating_stats.find_one({"_id": pet_id}, {"sum": 1, "count": 1})
+    return stats["sum"] / stats["count"] if stats and stats.get("count") else None
 
 def get_average_ratings_for_all_pets():
     """
     Returns a dict mapping pet_id -> average rating for every pet
-    in the user_feedback collection.
+    with feedback, read from the maintained pet_rating_stats collection.
     """
-    pipeline = [
-        {"$group": {"_id": "$pet_id", "avg_rating": {"$avg": "$rating"}}}
+    cursor = _db().pet_rating_stats.find({"count": {"$gt": 0}}, {"sum": 1, "count": 1})
+    return {doc["_id"]: doc["sum"] / doc["count"] for doc in cursor}
+
+def get_rating_stats_for_pet(pet_id):
+    """
+    Return {'sum', 'count', 'min', 'max', 'histogram'} for a pet,
+    or None if it has no rated feedback.
+    """
+    return _db().pet_rating_stats.find_one({"_id": pet_id}, {"_id": 0})
+
+_RATING_STATS_FIELDS = ("sum", "count", "min", "max", "histogram")
+
+# _histogram_key as an aggregation expression over $_id.rating: integral
+# doubles become integers first, so 4.0 lands in "4" like it does on insert.
+_HISTOGRAM_KEY_EXPR = {"$replaceAll": {
+    "input": {"$toString": {"$cond": [
+        {"$eq": ["$_id.rating", {"$trunc": "$_id.rating"}]},
+        {"$toLong": "$_id.rating"},
+        "$_id.rating",
+    ]}},
+    "find": ".",
+    "replacement": "_",
+}}
+
+def _rating_stats_pipeline():
+    # pet_rating_stats documents computed from the raw user_feedback
+    return [
+        {"$match": {"rating": {"$type": "number"}}},
+        {"$group": {
+            "_id": {"pet_id": "$pet_id", "rating": "$rating"},
+            "n": {"$sum": 1}
+        }},
+        {"$group": {
+            "_id": "$_id.pet_id",
+            "sum": {"$sum": {"$multiply": ["$_id.rating", "$n"]}},
+            "count": {"$sum": "$n"},
+            "min": {"$min": "$_id.rating"},
+            "max": {"$max": "$_id.rating"},
+            "histogram": {"$push": {"k": _HISTOGRAM_KEY_EXPR, "v": "$n"}}
+        }},
+        {"$set": {"histogram": {"$arrayToObject": "$histogram"}}},
     ]
-    result = user_feedback.aggregate(pipeline)
-    return {doc["_id"]: doc["avg_rating"] for doc in result}
+
+def _histogram_counts(histogram):
+    # empty buckets carry no information
+    return {key: n for key, n in (histogram or {}).items() if n}
+
+def verify_rating_stats():
+    """
+    Compare pet_rating_stats with a fresh aggregation over user_feedback.
+    Returns a list of drifted pets as dicts with pet_id, expected and stored
+    ({"sum", "count", "min", "max", "histogram"}, or None when the pet has
+    no stats on that side); empty when the stats are correct.
+    """
+    stored = {doc["_id"]: doc for doc in _db().pet_rating_stats.find(
+        {}, {field: 1 for field in _RATING_STATS_FIELDS})}
+    drift = []
+
+    def compare(pet_id, expected, actual):
+        expected = {f: expected[f] for f in _RATING_STATS_FIELDS} if expected else None
+        actual = {f: actual.get(f) for f in _RATING_STATS_FIELDS} if actual else None
+        if expected is None or actual is None:
+            same = expected == actual
+        else:
+            same = (all(expected[f] == actual[f] for f in ("count", "min", "max"))
+                    and isinstance(actual["sum"], Number)
+                    and math.isclose(expected["sum"], actual["sum"])
+                    and _histogram_counts(expected["histogram"])
+                        == _histogram_counts(actual["histogram"]))
+        if not same:
+            drift.append({"pet_id": pet_id, "expected": expected, "stored": actual})
+
+    for doc in _db().user_feedback.aggregate(_rating_stats_pipeline()):
+        compare(doc["_id"], doc, stored.pop(doc["_id"], None))
+    for pet_id, doc in stored.items():
+        compare(pet_id, None, doc)
+    return drift
+
+def rebuild_rating_stats():
+    """
+    Recompute pet_rating_stats from the raw user_feedback collection and
+    swap it in atomically ($out). Feedback written while the rebuild runs
+    may be missed, so run it when writers are quiet.
+    Returns the number of pets with stats.
+    """
+    _db().user_feedback.aggregate(_rating_stats_pipeline() + [{"$out": "pet_rating_stats"}])
+    return _db().pet_rating_stats.estimated_document_count()
 
 def get_shared_feedback_counts(user_id: int) -> dict[int,int]:
     """
     other_user_id -> number of pets both users have left feedback for
     """
     # 1. find all pet_ids this user has feedback on
-    own = user_feedback.find({"user_id": user_id}, {"pet_id": 1})
+    own = _db().user_feedback.find({"user_id": user_id}, {"pet_id": 1})
     pet_ids = [doc["pet_id"] for doc in own]
     if not pet_ids:
         return {}
@@ -151,33 +1139,36 @@ def get_shared_feedback_counts(user_id: int) -> dict[int,int]:
             "count": {"$sum": 1}
         }}
     ]
-    result = user_feedback.aggregate(pipeline)
+    result = _db().user_feedback.aggregate(pipeline)
     return {doc["_id"]: doc["count"] for doc in result}
 
 def get_reviewed_pet_ids() -> list[int]:
     """
     Return all pet_ids that appear in user_feedback (i.e. have at least one review).
     """
-    return user_feedback.distinct("pet_id")
+    return _db().user_feedback.distinct("pet_id")
+
+def filter_reviewed_pet_ids(pet_ids) -> list[int]:
+    """The ids among `pet_ids` with at least one review (pet_id index)."""
+    return _db().user_feedback.distinct("pet_id", {"pet_id": {"$in": list(pet_ids)}})
 
 def get_feedback_count_for_user(user_id: int) -> int:
     """
     Return how many feedback docs this user has submitted.
     """
-    return user_feedback.count_documents({"user_id": user_id})
+    return _db().user_feedback.count_documents({"user_id": user_id})
 
 def get_supply_counts_by_tag() -> dict[str,int]:
     """
     Returns a map: tag -> number of available pets carrying that tag.
+    Uses the `available` flag kept on pet_profiles, so no pet id list has
+    to be fetched from SQL.
     """
-    avail_ids = get_available_pet_ids()
-    if not avail_ids:
-        return {}
-
     pipeline = [
-        {"$match": {"pet_id": {"$in": avail_ids}}},
+        {"$match": {"available": True}},
+        {"$project": {"_id": 0, "tags": 1}},
         {"$unwind": "$tags"},
         {"$group": {"_id": "$tags", "count": {"$sum": 1}}}
     ]
-    result = pet_profiles.aggregate(pipeline)
+    result = _db().pet_profiles.aggregate(pipeline)
     return {doc["_id"]: doc["count"] for doc in result}
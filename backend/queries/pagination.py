@@ -0,0 +1,27 @@
+# backend/queries/pagination.py
+"""
+Opaque continuation tokens for keyset ("seek") pagination.
+
+A token is the url-safe base64 of a small JSON object holding the sort key
+of the last row on the previous page; callers just pass it back unchanged.
+"""
+import base64
+import json
+
+
+def encode_token(position):
+    """Encode a JSON-serialisable position (e.g. {"id": 42}) as a token."""
+    raw = json.dumps(position, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_token(token):
+    """Decode a token produced by encode_token; raises ValueError if malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"invalid continuation token: {token!r}") from exc
+    if not isinstance(position, dict):
+        raise ValueError(f"invalid continuation token: {token!r}")
+    return position
@@ -0,0 +1,364 @@
+# backend/queries/sql_pool.py
+"""
+Process-wide PostgreSQL connection pool shared by every function in
+`queries/sql_queries.py`.
+
+The pool is created lazily on first checkout. Its size, checkout timeout,
+health-check interval, read replicas (POSTGRES_REPLICA_DSNS) and the
+read-your-writes window come from `queries.clients.registry.settings`;
+see that module for the environment variables.
+"""
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, connection as _pg_connection
+from psycopg2.extensions import parse_dsn
+from psycopg2.extras import RealDictCursor
+
+from queries.clients import registry
+
+logger = logging.getLogger(__name__)
+
+
+class PooledConnection(_pg_connection):
+    """
+    psycopg2 connection that remembers which server-side prepared
+    statements (see sql_queries' prepared execution mode) it already holds.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+class PoolExhausted(pg_pool.PoolError):
+    """Every connection of a pool stayed checked out for the whole timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool on top of psycopg2's ThreadedConnectionPool.
+
+    psycopg2's pool raises as soon as `maxconn` connections are checked out;
+    this wrapper makes callers wait (up to `timeout` seconds) for a free
+    connection instead, validates connections on checkout and keeps
+    counters that can be read with `stats()`.
+    """
+
+    def __init__(self, minconn, maxconn, timeout=30.0, ping_after=30.0,
+                 **connect_kwargs):
+        self._pool = pg_pool.ThreadedConnectionPool(minconn, maxconn, **connect_kwargs)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._last_used = {}
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "discarded": 0,
+            "in_use": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    def getconn(self):
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise PoolExhausted(
+                f"no PostgreSQL connection available after {self.timeout}s "
+                f"(pool max = {self.maxconn})"
+            )
+        waited = time.perf_counter() - started
+
+        try:
+            conn = self._checkout_healthy()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+            self._stats["total_wait_seconds"] += waited
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+            if waited > 0.001:
+                self._stats["waits"] += 1
+        return conn
+
+    def putconn(self, conn, close=False):
+        try:
+            if conn.closed:
+                close = True
+            self._last_used[id(conn)] = time.monotonic()
+            if close:
+                self._last_used.pop(id(conn), None)
+            self._pool.putconn(conn, close=close)
+        finally:
+            with self._lock:
+                self._stats["in_use"] -= 1
+            self._slots.release()
+
+    def closeall(self):
+        self._pool.closeall()
+        self._last_used.clear()
+
+    def stats(self):
+        """
+        Snapshot of the pool counters:
+          - checkouts:          total successful checkouts
+          - waits:              checkouts that had to wait for a free slot
+          - timeouts:           checkouts that gave up after `timeout`
+          - discarded:          connections dropped by the health check
+          - in_use:             connections currently checked out
+          - total/max/avg_wait_seconds: time spent waiting for a slot
+        """
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot["avg_wait_seconds"] = (
+            snapshot["total_wait_seconds"] / snapshot["checkouts"]
+            if snapshot["checkouts"] else 0.0
+        )
+        snapshot["min_size"] = self.minconn
+        snapshot["max_size"] = self.maxconn
+        return snapshot
+
+    def _checkout_healthy(self):
+        # A slot is held, so the underlying pool can always hand out (or open)
+        # a connection; keep going until one passes the health check.
+        while True:
+            conn = self._pool.getconn()
+            if self._is_healthy(conn):
+                return conn
+            with self._lock:
+                self._stats["discarded"] += 1
+            self._last_used.pop(id(conn), None)
+            self._pool.putconn(conn, close=True)
+
+    def _is_healthy(self, conn):
+        if conn.closed or conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            return False
+
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.ping_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+
+_pool = None
+_replicas = None
+_pool_lock = threading.Lock()
+
+# Monotonic time of the last committed write in the current thread/task.
+_last_write = ContextVar("last_sql_write", default=None)
+
+
+def get_pool():
+    """Return the process-wide primary pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                settings = registry.settings
+                _pool = ConnectionPool(
+                    settings.postgres_pool_min,
+                    settings.postgres_pool_max,
+                    timeout=settings.postgres_pool_timeout,
+                    ping_after=settings.postgres_pool_ping_after,
+                    dbname=settings.postgres_db,
+                    user=settings.postgres_user,
+                    password=settings.postgres_password,
+                    host=settings.postgres_host,
+                    port=settings.postgres_port,
+                    cursor_factory=RealDictCursor,
+                    connection_factory=PooledConnection,
+                )
+    return _pool
+
+
+def replica_label(dsn):
+    """host:port/dbname of a DSN, without credentials, for logs and stats."""
+    parts = parse_dsn(dsn)
+    return f"{parts.get('host', '')}:{parts.get('port', '5432')}/{parts.get('dbname', '')}"
+
+
+class ReplicaSet:
+    """
+    Round-robin over the read replicas. A replica whose pool cannot be
+    created or connect is skipped for `retry_after` seconds; one whose pool
+    is merely full is passed over for this checkout only.
+    """
+
+    def __init__(self, dsns, retry_after=30.0, pool_settings=(1, 10, 30.0, 30.0)):
+        self.dsns = list(dsns)
+        self.retry_after = retry_after
+        # (minconn, maxconn, timeout, ping_after) of each replica pool
+        self.pool_settings = pool_settings
+        self._pools = {}
+        self._down_until = {}
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self.failovers = 0
+
+    def _pool_for(self, dsn):
+        with self._lock:
+            if dsn not in self._pools:
+                minconn, maxconn, timeout, ping_after = self.pool_settings
+                self._pools[dsn] = ConnectionPool(
+                    minconn,
+                    maxconn,
+                    timeout=timeout,
+                    ping_after=ping_after,
+                    dsn=dsn,
+                    options="-c default_transaction_read_only=on",
+                    cursor_factory=RealDictCursor,
+                    connection_factory=PooledConnection,
+                )
+            return self._pools[dsn]
+
+    def getconn(self):
+        """
+        Return (pool, conn) from the next healthy replica,
+        or (None, None) if every replica is unavailable.
+        """
+        if not self.dsns:
+            return None, None
+        start = next(self._next)
+        now = time.monotonic()
+        for offset in range(len(self.dsns)):
+            dsn = self.dsns[(start + offset) % len(self.dsns)]
+            if self._down_until.get(dsn, 0) > now:
+                continue
+            try:
+                pool = self._pool_for(dsn)
+                return pool, pool.getconn()
+            except PoolExhausted as exc:
+                # busy, not broken: try the next replica (or the primary)
+                logger.warning("replica %s pool exhausted: %s", replica_label(dsn), exc)
+            except (psycopg2.Error, pg_pool.PoolError) as exc:
+                self._down_until[dsn] = now + self.retry_after
+                logger.warning("replica %s unavailable, skipping for %ss: %s",
+                               replica_label(dsn), self.retry_after, exc)
+        self.failovers += 1
+        return None, None
+
+    def stats(self):
+        with self._lock:
+            pools = dict(self._pools)
+        return {replica_label(dsn): pool.stats() for dsn, pool in pools.items()}
+
+    def closeall(self):
+        with self._lock:
+            for pool in self._pools.values():
+                pool.closeall()
+            self._pools.clear()
+
+
+def get_replicas():
+    """Return the process-wide ReplicaSet, creating it on first use."""
+    global _replicas
+    if _replicas is None:
+        with _pool_lock:
+            if _replicas is None:
+                settings = registry.settings
+                _replicas = ReplicaSet(
+                    settings.postgres_replica_dsns,
+                    retry_after=settings.postgres_replica_retry_after,
+                    pool_settings=(
+                        settings.postgres_pool_min,
+                        settings.postgres_pool_max,
+                        settings.postgres_pool_timeout,
+                        settings.postgres_pool_ping_after,
+                    ),
+                )
+    return _replicas
+
+
+def reads_pinned_to_primary():
+    """True while the current thread/task is inside its read-your-writes window."""
+    window = registry.settings.postgres_read_your_writes
+    if window <= 0:
+        return False
+    last_write = _last_write.get()
+    return last_write is not None and time.monotonic() - last_write < window
+
+
+def record_write():
+    """Start the read-your-writes window for the current thread/task."""
+    _last_write.set(time.monotonic())
+
+
+@contextmanager
+def get_connection(readonly=False):
+    """
+    Check a connection out of the pool for the duration of a `with` block.
+    The transaction is committed on success and rolled back on error, and
+    the connection is always returned to the pool.
+
+    With readonly=True the connection comes from a read replica when any
+    are configured (round-robin, falling back to the primary), unless this
+    thread/task wrote within the read-your-writes window.
+    """
+    pool = conn = None
+    if readonly and not reads_pinned_to_primary():
+        pool, conn = get_replicas().getconn()
+    on_primary = conn is None
+    if on_primary:
+        pool = get_pool()
+        conn = pool.getconn()
+
+    broken = False
+    try:
+        yield conn
+        conn.commit()
+        if on_primary and not readonly:
+            record_write()
+    except BaseException:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            broken = True
+        raise
+    finally:
+        pool.putconn(conn, close=broken)
+
+
+def get_pool_stats():
+    """
+    Return the pool counters: {"primary": {...} or None,
+    "replicas": {label: {...}}, "replica_failovers": int}.
+    """
+    return {
+        "primary": _pool.stats() if _pool is not None else None,
+        "replicas": _replicas.stats() if _replicas is not None else {},
+        "replica_failovers": _replicas.failovers if _replicas is not None else 0,
+    }
+
+
+def close_pool():
+    """Close every pooled connection (e.g. at process shutdown)."""
+    global _pool, _replicas
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+        if _replicas is not None:
+            _replicas.closeall()
+            _replicas = None
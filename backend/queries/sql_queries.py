@@ -1,32 +1,37 @@
 # backend/queries/sql_queries.py
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
-import os
+import itertools
+import re
 
-from dotenv import load_dotenv
+from psycopg2 import errors, sql
+from psycopg2.extras import execute_values
 
-load_dotenv() 
+from queries.clients import registry
+from queries.pagination import decode_token, encode_token
+from queries.sql_pool import get_connection, get_pool_stats
 
+BULK_CHUNK_SIZE = 1000
+CATALOG_PAGE_SIZE = 50
+CATALOG_MAX_PAGE_SIZE = 500
 
+_cursor_names = itertools.count()
 
-DB_NAME = os.getenv("POSTGRES_DB")
-DB_USER = os.getenv("POSTGRES_USER")
-DB_PASSWORD = os.getenv("POSTGRES_PASSWORD")
-DB_HOST = os.getenv("POSTGRES_HOST")
-DB_PORT = os.getenv("POSTGRES_PORT")
+# "simple": every call sends its SQL text to be parsed and planned.
+# "prepared": hot reads are PREPAREd once per pooled connection and
+#             afterwards only EXECUTEd with new parameters.
+EXECUTION_MODES = ("simple", "prepared")
+# None until set_execution_mode() is called: use POSTGRES_EXECUTION_MODE.
+EXECUTION_MODE = None
 
+def get_execution_mode():
+    return EXECUTION_MODE or registry.settings.postgres_execution_mode
 
-
-def get_connection():
-    return psycopg2.connect(
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        host=DB_HOST,
-        port=DB_PORT,
-        cursor_factory=RealDictCursor
-    )
+def set_execution_mode(mode):
+    """Switch how the hot read queries are sent to the server."""
+    global EXECUTION_MODE
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"execution mode must be one of {EXECUTION_MODES}, got {mode!r}")
+    EXECUTION_MODE = mode
 
 # ---------- USERS ----------
 def add_user(name, email, password_hash, role):
@@ -72,6 +77,18 @@ def add_adoption(user_id, pet_id, success_notes=None):
             """, (user_id, pet_id, success_notes))
             return cur.fetchone()
 
+def set_pet_status(pet_id, status):
+    """Change a pet's status ('available' or 'adopted'); returns the updated row."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE pets
+                   SET status = %s
+                 WHERE id = %s
+             RETURNING *;
+            """, (status, pet_id))
+            return cur.fetchone()
+
 # ---------- STAFF ----------
 def add_staff(name, email, role, shelter_id):
     with get_connection() as conn:
@@ -94,7 +111,151 @@ def add_follow_up(adoption_id, visit_date, notes=None):
             """, (adoption_id, visit_date, notes))
             return cur.fetchone()
 
+# ---------- BULK INSERTS ----------
+def _bulk_insert(table, columns, rows, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Insert `rows` (tuples ordered like `columns`) with one multi-row
+    INSERT ... RETURNING * per chunk, all in a single transaction.
+    Returns the inserted rows in input order.
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+
+    query = sql.SQL("INSERT INTO {} ({}) VALUES %s RETURNING *;").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(map(sql.Identifier, columns)),
+    )
+    inserted = []
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                returned = execute_values(cur, query, chunk,
+                                          page_size=len(chunk), fetch=True)
+                # SERIAL ids are handed out in VALUES order, so sorting by id
+                # lines the returned rows back up with the input.
+                returned.sort(key=lambda r: r["id"])
+                inserted.extend(returned)
+    return inserted
+
+def _record_values(record, fields, defaults=None):
+    """Accept either a mapping keyed like the single-row API or a plain sequence."""
+    if isinstance(record, dict):
+        defaults = defaults or {}
+        return tuple(record[f] if f in record else defaults[f] for f in fields)
+    values = tuple(record)
+    if defaults and len(values) < len(fields):
+        values += tuple(defaults[f] for f in fields[len(values):])
+    return values
+
+def add_users_bulk(records, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Bulk variant of add_user. Each record is a dict with keys
+    name, email, password_hash, role (or a tuple in that order).
+    Returns the inserted rows in input order.
+    """
+    fields = ("name", "email", "password_hash", "role")
+    return _bulk_insert("users", fields,
+                        (_record_values(r, fields) for r in records), chunk_size)
+
+def add_shelters_bulk(records, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Bulk variant of add_shelter. Each record is a dict with keys
+    name, address, phone_number, capacity (or a tuple in that order).
+    Returns the inserted rows in input order.
+    """
+    fields = ("name", "address", "phone_number", "capacity")
+    return _bulk_insert("shelters", fields,
+                        (_record_values(r, fields) for r in records), chunk_size)
+
+def add_pets_bulk(records, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Bulk variant of add_pet. Each record is a dict with keys
+    name, age, type_, breed, gender, shelter_id and optional status
+    (or a tuple in that order). Returns the inserted rows in input order.
+    """
+    fields = ("name", "age", "type_", "breed", "gender", "shelter_id", "status")
+    columns = ("name", "age", "type", "breed", "gender", "shelter_id", "status")
+    defaults = {"status": "available"}
+    return _bulk_insert("pets", columns,
+                        (_record_values(r, fields, defaults) for r in records), chunk_size)
+
+def add_adoptions_bulk(records, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Bulk variant of add_adoption. Each record is a dict with keys
+    user_id, pet_id and optional success_notes (or a tuple in that order).
+    Returns the inserted rows in input order.
+    """
+    fields = ("user_id", "pet_id", "success_notes")
+    defaults = {"success_notes": None}
+    return _bulk_insert("adoptions", fields,
+                        (_record_values(r, fields, defaults) for r in records), chunk_size)
+
 # ---------- Raw Queries --------
+# Everything below only reads, so it checks out connections with
+# readonly=True and is routed to a read replica when one is configured.
+
+def _execute(cur, name, query, params, param_types):
+    """
+    Run `query` (written with %s placeholders) on `cur`. In prepared mode the
+    statement is PREPAREd under `name` the first time a pooled connection
+    sees it, and later calls only send EXECUTE with the parameters.
+    """
+    if get_execution_mode() != "prepared":
+        cur.execute(query, params)
+        return
+
+    conn = cur.connection
+    if name not in conn.prepared:
+        text = query.as_string(conn) if isinstance(query, sql.Composable) else query
+        counter = itertools.count(1)
+        text = re.sub(r"%s", lambda _: f"${next(counter)}", text.strip().rstrip(";"))
+        cur.execute(sql.SQL("PREPARE {} ({}) AS ").format(
+            sql.Identifier(name), sql.SQL(", ".join(param_types))
+        ) + sql.SQL(text))
+        conn.prepared.add(name)
+
+    cur.execute(sql.SQL("EXECUTE {} ({});").format(
+        sql.Identifier(name), sql.SQL(", ").join(sql.Placeholder() * len(params))
+    ), params)
+
+def run_pipelined(statements):
+    """
+    Run several independent read queries in a single network round trip.
+    `statements` is a list of (query, params); each query is wrapped in a
+    scalar json_agg subquery of one combined SELECT. Returns one list of
+    row dicts per statement, in order. Values come back JSON-typed
+    (e.g. dates as ISO strings).
+    """
+    if not statements:
+        return []
+
+    with get_connection(readonly=True) as conn:
+        parts, params = [], []
+        for i, (query, query_params) in enumerate(statements):
+            text = query.as_string(conn) if isinstance(query, sql.Composable) else query
+            parts.append(sql.SQL("(SELECT COALESCE(json_agg(q), '[]'::json) FROM ({}) q) AS {}").format(
+                sql.SQL(text.strip().rstrip(";")), sql.Identifier(f"r{i}")
+            ))
+            params.extend(query_params)
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL("SELECT ") + sql.SQL(", ").join(parts) + sql.SQL(";"), params)
+            row = cur.fetchone()
+    return [row[f"r{i}"] for i in range(len(statements))]
+
+def _stream(query, params=None, fetch_size=None):
+    """
+    Yield rows of `query` through a named server-side cursor, pulling
+    `fetch_size` rows per round trip (default POSTGRES_STREAM_FETCH_SIZE)
+    so only one batch is held in memory.
+    The pooled connection is held until the generator is exhausted or closed.
+    """
+    with get_connection(readonly=True) as conn:
+        with conn.cursor(name=f"stream_{next(_cursor_names)}") as cur:
+            cur.itersize = fetch_size or registry.settings.postgres_stream_fetch_size
+            cur.execute(query, params)
+            yield from cur
 
 def get_pets_by_ids(pet_ids):
     """
@@ -111,31 +272,65 @@ def get_pets_by_ids(pet_ids):
         WHERE id = ANY(%s)
           AND status = 'available';
     """
-    with get_connection() as conn:
+    with get_connection(readonly=True) as conn:
         with conn.cursor() as cur:
-            cur.execute(query, (pet_ids,))
+            _execute(cur, "get_pets_by_ids", query, (list(pet_ids),), ("integer[]",))
             return cur.fetchall()
     
-def get_user_by_id(user_id):
+USER_COLUMNS = ("id", "name", "email", "password_hash", "role")
+# password_hash is only returned when a caller asks for it explicitly.
+DEFAULT_USER_COLUMNS = ("id", "name", "email", "role")
+
+def _users_by_ids_query(columns):
+    """Return (statement name, query) selecting `columns` plus id for a list of ids."""
+    unknown = set(columns) - set(USER_COLUMNS)
+    if unknown:
+        raise ValueError(f"unknown user columns: {sorted(unknown)}")
+    # Always select id so rows can be matched back to the input order.
+    select = ("id",) + tuple(c for c in columns if c != "id")
+
+    query = sql.SQL("""
+        SELECT {}
+          FROM users
+         WHERE id = ANY(%s);
+    """).format(sql.SQL(", ").join(map(sql.Identifier, select)))
+    return "get_users_by_ids__" + "_".join(select), query
+
+def get_users_by_ids(user_ids, columns=DEFAULT_USER_COLUMNS):
     """
-    Fetch a single user record by its ID.
-    Returns a dict with keys: id, name, email, password_hash, role.
+    Fetch many users in a single query.
+    Returns a list of dicts (with the requested `columns`) aligned with
+    `user_ids`; IDs with no matching user come back as None.
     """
-    with get_connection() as conn:
+    user_ids = list(user_ids)
+    if not user_ids:
+        return []
+
+    name, query = _users_by_ids_query(columns)
+    with get_connection(readonly=True) as conn:
         with conn.cursor() as cur:
-            cur.execute("""
-                SELECT name
-                FROM users
-                WHERE id = %s;
-            """, (user_id,))
-            return cur.fetchone()
+            _execute(cur, name, query, (list(set(user_ids)),), ("integer[]",))
+            rows = cur.fetchall()
+
+    by_id = {}
+    for row in rows:
+        by_id[row["id"]] = {c: row[c] for c in columns}
+    return [by_id.get(uid) for uid in user_ids]
+
+def get_user_by_id(user_id, columns=DEFAULT_USER_COLUMNS):
+    """
+    Fetch a single user record by its ID.
+    Returns a dict with keys: id, name, email, role (or `columns`),
+    or None if the user does not exist.
+    """
+    return get_users_by_ids([user_id], columns)[0]
 
 def get_available_pet_ids():
     """
     Fetch all pet IDs where status is 'available'.
     Returns a list of integers.
     """
-    with get_connection() as conn:
+    with get_connection(readonly=True) as conn:
         with conn.cursor() as cur:
             cur.execute("""
                 SELECT id
@@ -145,12 +340,57 @@ def get_available_pet_ids():
             rows = cur.fetchall()
             # Each row is a dict like {'id': 42}, so extract the values:
             return [row['id'] for row in rows]
+
+def iter_available_pet_ids(fetch_size=None):
+    """
+    Streaming variant of get_available_pet_ids: yields pet IDs one at a
+    time from a server-side cursor instead of building the full list.
+    """
+    rows = _stream("""
+        SELECT id
+          FROM pets
+         WHERE status = 'available';
+    """, fetch_size=fetch_size)
+    for row in rows:
+        yield row['id']
+
+def iter_pets_by_ids(pet_ids, fetch_size=None):
+    """
+    Streaming variant of get_pets_by_ids: yields the same dicts one at a
+    time from a server-side cursor.
+    """
+    if not pet_ids:
+        return
+    yield from _stream("""
+        SELECT id, name, type, breed, gender, status
+        FROM pets
+        WHERE id = ANY(%s)
+          AND status = 'available';
+    """, (list(pet_ids),), fetch_size=fetch_size)
+
+def iter_adoptions_with_pets(adopted_before=None, newest_first=False, fetch_size=None):
+    """
+    Stream every adoption with its pet's breed and shelter as dicts
+    {adoption_id, pet_id, user_id, adoption_date, breed, shelter_id},
+    ordered by adoption_date (then id). adopted_before limits the stream to
+    adoptions on or before that date.
+    """
+    direction = sql.SQL("DESC" if newest_first else "ASC")
+    query = sql.SQL("""
+        SELECT a.id AS adoption_id, a.pet_id, a.user_id, a.adoption_date,
+               p.breed, p.shelter_id
+          FROM adoptions a
+          JOIN pets p ON p.id = a.pet_id
+         WHERE %(before)s IS NULL OR a.adoption_date <= %(before)s
+         ORDER BY a.adoption_date {dir}, a.id {dir};
+    """).format(dir=direction)
+    yield from _stream(query, {"before": adopted_before}, fetch_size=fetch_size)
         
 def get_shared_adoption_counts(user_id: int) -> dict[int,int]:
     """
     other_user_id -> number of pets both users have ADOPTED
     """
-    with get_connection() as conn:
+    with get_connection(readonly=True) as conn:
         with conn.cursor() as cur:
             cur.execute("""
                 SELECT a2.user_id   AS other_id,
@@ -165,32 +405,162 @@ def get_shared_adoption_counts(user_id: int) -> dict[int,int]:
             rows = cur.fetchall()
     return {r["other_id"]: r["shared_count"] for r in rows}
 
+ADOPTION_COUNT_QUERY = "SELECT COUNT(*) AS cnt FROM adoptions WHERE user_id = %s"
+
 def get_adoption_count_for_user(user_id: int) -> int:
     """
     Return how many adoptions this user has made.
     """
-    with get_connection() as conn:
+    with get_connection(readonly=True) as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                "SELECT COUNT(*) AS cnt FROM adoptions WHERE user_id = %s",
-                (user_id,)
-            )
+            _execute(cur, "get_adoption_count_for_user", ADOPTION_COUNT_QUERY,
+                     (user_id,), ("integer",))
             row = cur.fetchone()
     return row["cnt"] if row else 0
 
+def get_user_with_adoption_count(user_id: int, columns=DEFAULT_USER_COLUMNS):
+    """
+    Fetch the user record and their adoption count in one round trip.
+    Returns (user dict or None, adoption count).
+    """
+    _, user_query = _users_by_ids_query(columns)
+    users, counts = run_pipelined([
+        (user_query, ([user_id],)),
+        (ADOPTION_COUNT_QUERY, (user_id,)),
+    ])
+    user = {c: users[0][c] for c in columns} if users else None
+    return user, (counts[0]["cnt"] if counts else 0)
+
+SUPPLY_COUNTS_MISSING = ("pet_supply_counts does not exist; apply the SQL migrations "
+                         "with `python manage.py migrate`")
+
 def get_available_pets_count_by_breed() -> dict[str,int]:
     """
     Returns a map: breed -> number of pets currently available in SQL.
+    Reads the trigger-maintained pet_supply_counts table (migration 0004),
+    so the cost does not grow with the number of pets.
     """
-    with get_connection() as conn:
+    with get_connection(readonly=True) as conn:
         with conn.cursor() as cur:
-            cur.execute("""
-                SELECT breed, COUNT(*) AS supply_count
-                  FROM pets
-                 WHERE status = 'available'
-                 GROUP BY breed;
-            """)
+            try:
+                cur.execute("""
+                    SELECT NULLIF(breed, '') AS breed,
+                           SUM(available_count) AS supply_count
+                      FROM pet_supply_counts
+                     GROUP BY breed
+                    HAVING SUM(available_count) > 0;
+                """)
+            except errors.UndefinedTable as exc:
+                raise RuntimeError(SUPPLY_COUNTS_MISSING) from exc
             rows = cur.fetchall()
     return {r["breed"]: r["supply_count"] for r in rows}
 
+# ---------- SUPPLY COUNTERS ----------
+_SUPPLY_COUNTS_FROM_PETS = """
+    SELECT COALESCE(breed, '') AS breed, COALESCE(type, '') AS type,
+           COALESCE(shelter_id, 0) AS shelter_id, COUNT(*) AS available_count
+      FROM pets
+     WHERE status = 'available'
+     GROUP BY 1, 2, 3
+"""
+
+def verify_pet_supply_counts():
+    """
+    Compare pet_supply_counts with a fresh count over pets.
+    Returns a list of drifted keys as dicts with breed, type, shelter_id,
+    expected and stored counts (empty when the counters are correct).
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT COALESCE(e.breed, s.breed)           AS breed,
+                       COALESCE(e.type, s.type)             AS type,
+                       COALESCE(e.shelter_id, s.shelter_id) AS shelter_id,
+                       COALESCE(e.available_count, 0)       AS expected,
+                       COALESCE(s.available_count, 0)       AS stored
+                  FROM ({_SUPPLY_COUNTS_FROM_PETS}) e
+                  FULL OUTER JOIN pet_supply_counts s
+                    ON (s.breed, s.type, s.shelter_id) = (e.breed, e.type, e.shelter_id)
+                 WHERE COALESCE(e.available_count, 0) <> COALESCE(s.available_count, 0);
+            """)
+            return cur.fetchall()
 
+def rebuild_pet_supply_counts() -> int:
+    """
+    Recompute pet_supply_counts from pets. Writers to pets are blocked for
+    the duration so the rebuilt counters are exact. Returns the row count.
+    """
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("LOCK TABLE pets IN SHARE MODE;")
+            cur.execute("DELETE FROM pet_supply_counts;")
+            cur.execute(f"""
+                INSERT INTO pet_supply_counts (breed, type, shelter_id, available_count)
+                {_SUPPLY_COUNTS_FROM_PETS};
+            """)
+            return cur.rowcount
+
+# ---------- CATALOG ----------
+CATALOG_COLUMNS = ("id", "name", "age", "type", "breed", "gender", "shelter_id", "status")
+
+def _pet_catalog_conditions(type_=None, breed=None, gender=None, min_age=None,
+                            max_age=None, shelter_id=None, status="available",
+                            after=None):
+    """
+    Translate catalog filters into [(column, operator, value), ...].
+    Shared by the blocking and async catalog queries.
+    """
+    conditions = []
+    for column, value in (("status", status), ("type", type_), ("breed", breed),
+                          ("gender", gender), ("shelter_id", shelter_id)):
+        if value is not None:
+            conditions.append((column, "=", value))
+    if min_age is not None:
+        conditions.append(("age", ">=", min_age))
+    if max_age is not None:
+        conditions.append(("age", "<=", max_age))
+    if after is not None:
+        last_id = decode_token(after).get("id")
+        if not isinstance(last_id, int):
+            raise ValueError(f"invalid continuation token: {after!r}")
+        conditions.append(("id", ">", last_id))
+    return conditions
+
+def _catalog_page(rows, limit):
+    """Trim the look-ahead row and build the {"pets", "next_token"} result."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_token = encode_token({"id": rows[-1]["id"]}) if has_more else None
+    return {"pets": rows, "next_token": next_token}
+
+def get_pet_catalog(type_=None, breed=None, gender=None, min_age=None, max_age=None,
+                    shelter_id=None, status="available", limit=CATALOG_PAGE_SIZE,
+                    after=None):
+    """
+    Browse pets with optional filters, one page at a time.
+    Pages are ordered by id and use keyset pagination: pass the returned
+    `next_token` as `after` to get the next page. status=None lists pets of
+    any status. Returns {"pets": [dict, ...], "next_token": str | None}.
+    """
+    limit = max(1, min(int(limit), CATALOG_MAX_PAGE_SIZE))
+    conditions = _pet_catalog_conditions(type_, breed, gender, min_age, max_age,
+                                         shelter_id, status, after)
+
+    where = sql.SQL(" AND ").join(
+        sql.SQL("{} {} %s").format(sql.Identifier(column), sql.SQL(op))
+        for column, op, _ in conditions
+    ) if conditions else sql.SQL("TRUE")
+    query = sql.SQL("""
+        SELECT {}
+          FROM pets
+         WHERE {}
+         ORDER BY id
+         LIMIT %s;
+    """).format(sql.SQL(", ").join(map(sql.Identifier, CATALOG_COLUMNS)), where)
+    params = [value for _, _, value in conditions] + [limit + 1]
+
+    with get_connection(readonly=True) as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+    return _catalog_page(rows, limit)
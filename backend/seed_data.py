@@ -1,19 +1,19 @@
 from faker import Faker
 import random
-from queries.sql_queries import add_user, add_shelter, add_pet, add_adoption
-from queries.mongo_db_queries import insert_pet_profile, insert_user_feedback, insert_follow_up_report
-from queries.mongo_db_queries import pet_profiles
+from queries.sql_queries import add_users_bulk, add_shelters_bulk, add_pets_bulk, add_adoptions_bulk
+from queries.mongo_db_queries import (
+    insert_pet_profiles_bulk,
+    insert_user_feedback_bulk,
+    insert_follow_up_reports_bulk
+)
 from queries.graph_queries import (
     create_user as create_user_neo4j,
-    create_pet as create_pet_neo4j,
     create_shelter as create_shelter_neo4j,
-    link_pet_to_shelter,
-    create_adopted_relationship,
-    create_tag,
-    link_pet_to_tag,
-    link_user_to_preference_tag,
-    create_likes_edge,
-    create_friend_edge
+    upsert_pets,
+    create_adopted_relationships,
+    link_users_to_preference_tags,
+    create_likes_edges,
+    create_friend_edges
 )
 
 fake = Faker()
@@ -46,123 +46,137 @@ pet_name_pool = [
     "BreezyTail", "FloppyFur", "TiredPaws", "QuietBounce", "NoisyMittens", "SassySnout", "PlayfulToes", "CozyBark", "WhiskeryShadow", "FeistyFang",
     "ZippyNose", "BouncyMittens", "CleverClaw", "LoyalStripe", "ChillEars", "FurryWhiskers", "JumpyPaws", "PurringBean", "JoyfulTail", "GiddyFur"
 ]
-users = []
-shelters = []
-pets = []
-
 # Create 5 shelters
-for _ in range(5):
-    shelter = add_shelter(
-        name=fake.company(),
-        address=fake.address(),
-        phone_number=fake.phone_number(),
-        capacity=random.randint(20, 50)
-    )
+shelters = add_shelters_bulk([
+    {
+        "name": fake.company(),
+        "address": fake.address(),
+        "phone_number": fake.phone_number(),
+        "capacity": random.randint(20, 50)
+    }
+    for _ in range(5)
+])
+for shelter in shelters:
     create_shelter_neo4j(shelter['id'], shelter['name'])
-    shelters.append(shelter)
 
 # Create 50 users
-for _ in range(50):
-    first_name = fake.first_name()
-    last_name = fake.last_name()
-    user = add_user(
-        name=f"{first_name} {last_name}",
-        email=fake.email(),
-        password_hash="hashed_pw",
-        role="adopter"
-    )
+users = add_users_bulk([
+    {
+        "name": f"{fake.first_name()} {fake.last_name()}",
+        "email": fake.email(),
+        "password_hash": "hashed_pw",
+        "role": "adopter"
+    }
+    for _ in range(50)
+])
+for user in users:
     create_user_neo4j(user['id'], user['name'])
-    users.append(user)
 # ── Give every user 1–3 random preference tags ─────────────────────────
-for user in users:
-    # pick between 1 and 3 tags from your tags_pool
-    pref_tags = random.sample(tags_pool, k=random.randint(1, 3))
-    for tag in pref_tags:
-        # make sure the tag node exists
-        create_tag(tag)
-        # link the user to that tag
-        link_user_to_preference_tag(user['id'], tag)
+# (the batched linker MERGEs the Tag nodes as well)
+link_users_to_preference_tags([
+    (user['id'], tag)
+    for user in users
+    for tag in random.sample(tags_pool, k=random.randint(1, 3))
+])
         
 # Create 100 pets
+pet_records = []
 for i in range(100):
-    shelter = random.choice(shelters)
     pet_type = random.choice(pet_types)
-    breed = random.choice(breeds_by_type[pet_type])
+    pet_records.append({
+        "name": pet_name_pool[i],
+        "age": random.randint(1, 10),
+        "type_": pet_type,
+        "breed": random.choice(breeds_by_type[pet_type]),
+        "gender": random.choice(["Male", "Female"]),
+        "shelter_id": random.choice(shelters)['id'],
+        "status": "available"
+    })
+pets = add_pets_bulk(pet_records)
+
+profile_records = []
+graph_pets = []
+for pet in pets:
     tag_sample = random.sample(tags_pool, k=2)
-
-    pet = add_pet(
-        name=pet_name_pool[i],
-        age=random.randint(1, 10),
-        type_=pet_type,
-        breed=breed,
-        gender=random.choice(["Male", "Female"]),
-        shelter_id=shelter['id'],
-        status="available"
-    )
-    create_pet_neo4j(pet['id'], pet['name'], pet['breed'])
-    link_pet_to_shelter(pet['id'], shelter['id'])
-    pets.append(pet)
-
-    insert_pet_profile(
-        pet_id=pet['id'],
-        gallery=[fake.image_url(), fake.image_url()],
-        tags=tag_sample,
-        health_history=[{"vaccine": "Rabies", "date": "2024-01-01"}],
-        behavior_notes=fake.sentence(),
-        dietary_needs="Grain-free"
-    )
-
-    for tag in tag_sample:
-        create_tag(tag)
-        link_pet_to_tag(pet['id'], tag)
+    graph_pets.append({"pet_id": pet['id'], "name": pet['name'], "breed": pet['breed'],
+                       "shelter_id": pet['shelter_id'], "tags": tag_sample})
+
+    profile_records.append({
+        "pet_id": pet['id'],
+        "gallery": [fake.image_url(), fake.image_url()],
+        "tags": tag_sample,
+        "health_history": [{"vaccine": "Rabies", "date": "2024-01-01"}],
+        "behavior_notes": fake.sentence(),
+        "dietary_needs": "Grain-free",
+        "available": pet['status'] == "available"
+    })
+
+# Pet nodes with their breed, shelter and tag edges
+upsert_pets(graph_pets)
+insert_pet_profiles_bulk(profile_records)
+tags_by_pet = {record["pet_id"]: record["tags"] for record in profile_records}
 
 # ── Seed some LIKES ────────────────────────────────────────────────────
-for user in users:
-    # each user likes between 3 and 10 random pets
-    liked = random.sample(pets, k=random.randint(3,10))
-    for pet in liked:
-        create_likes_edge(user['id'], pet['id'])
+# each user likes between 3 and 10 random pets
+create_likes_edges([
+    (user['id'], pet['id'])
+    for user in users
+    for pet in random.sample(pets, k=random.randint(3,10))
+])
 
 # ── Seed some FRIEND_OF edges ─────────────────────────────────────────
-for user in users:
-    # connect each user to 2–5 random friends
-    friends = random.sample([u for u in users if u != user], k=random.randint(2,5))
-    for fr in friends:
-        create_friend_edge(user['id'], fr['id'])
+# connect each user to 2–5 random friends
+create_friend_edges([
+    (user['id'], fr['id'])
+    for user in users
+    for fr in random.sample([u for u in users if u != user], k=random.randint(2,5))
+])
 
 
 # Create 35 adoptions
-adoptions = []
-for _ in range(35):
-    user = random.choice(users)
-    pet  = random.choice(pets)
-    adoption = add_adoption(user['id'], pet['id'], success_notes="Successful match!")
-    adoptions.append(adoption)
-    create_adopted_relationship(user['id'], pet['id'])
-
-    # Mongo feedback
-    insert_user_feedback(user['id'], pet['id'], "Loved the pet!", random.randint(4,5))
-    # Link real pet tags
-    profile = pet_profiles.find_one({"pet_id": pet['id']})
-    for tag in profile.get("tags", []):
-        if random.random() < 0.5:
-            link_user_to_preference_tag(user['id'], tag)
+adoption_pairs = [(random.choice(users), random.choice(pets)) for _ in range(35)]
+adoptions = add_adoptions_bulk([
+    {"user_id": user['id'], "pet_id": pet['id'], "success_notes": "Successful match!"}
+    for user, pet in adoption_pairs
+])
+# Mongo feedback
+insert_user_feedback_bulk([
+    {"user_id": user['id'], "pet_id": pet['id'], "review_text": "Loved the pet!",
+     "rating": random.randint(4,5)}
+    for user, pet in adoption_pairs
+])
+create_adopted_relationships([(user['id'], pet['id']) for user, pet in adoption_pairs])
+
+# Link real pet tags
+link_users_to_preference_tags([
+    (user['id'], tag)
+    for user, pet in adoption_pairs
+    for tag in tags_by_pet.get(pet['id'], [])
+    if random.random() < 0.5
+])
 
 # ── 5) Follow-up reports ────────────────────────────────────
 from datetime import timedelta
+pets_by_id = {pet['id']: pet for pet in pets}
+follow_up_records = []
 for adoption in adoptions:
+    adopted_pet = pets_by_id[adoption['pet_id']]
     for i in range(random.randint(1,3)):
-            visit = adoption['adoption_date'] + timedelta(days=7*(i+1))
-            insert_follow_up_report(
-            follow_up_id=f"{adoption['id']}-{i}",
-            report_date=visit.isoformat(),
-            pet_id=adoption['pet_id'],
-            user_id=adoption['user_id'],
-            review_text=random.choice([
+        visit = adoption['adoption_date'] + timedelta(days=7*(i+1))
+        follow_up_records.append({
+            "follow_up_id": f"{adoption['id']}-{i}",
+            "report_date": visit.isoformat(),
+            "pet_id": adoption['pet_id'],
+            "user_id": adoption['user_id'],
+            "review_text": random.choice([
                 "Pet is thriving!","Adjusting well to home","Happy and healthy!"
             ]),
-            picture=random.choice([fake.image_url(), None]),
-            energy_level=random.choice(["low","medium","high"])
-        )
+            "picture": random.choice([fake.image_url(), None]),
+            "energy_level": random.choice(["low","medium","high"]),
+            "adoption_id": adoption['id'],
+            "breed": adopted_pet['breed'],
+            "shelter_id": adopted_pet['shelter_id']
+        })
+insert_follow_up_reports_bulk(follow_up_records)
 
 print("✅ Expanded fake data with proper pet names successfully seeded.")
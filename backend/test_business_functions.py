@@ -0,0 +1,37 @@
+"""
+Unit tests for the cross-database business functions. The store readers
+are replaced with fakes. Run with `python -m pytest test_business_functions.py`.
+"""
+import pytest
+
+business = pytest.importorskip("function_.business_functions")
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    lookups = []
+    names = {2: "Ann", 3: "Bo", 5: "Cy"}
+
+    def get_users_by_ids(user_ids, columns):
+        lookups.append((list(user_ids), columns))
+        return [{"name": names[uid]} if uid in names else None for uid in user_ids]
+
+    monkeypatch.setattr(business, "get_user_by_id", lambda uid: {"id": uid})
+    monkeypatch.setattr(business, "get_shared_like_counts", lambda uid: {2: 1, 3: 4})
+    monkeypatch.setattr(business, "get_shared_preference_tag_counts", lambda uid: {2: 2, 4: 9})
+    monkeypatch.setattr(business, "get_shared_adoption_counts", lambda uid: {5: 1})
+    monkeypatch.setattr(business, "get_shared_feedback_counts", lambda uid: {2: 2})
+    monkeypatch.setattr(business, "get_users_by_ids", get_users_by_ids)
+    return lookups
+
+
+def test_top_connections_are_ranked_by_summed_score(connections):
+    # scores: 4 -> 9 (no longer in SQL), 2 -> 5, 3 -> 4, 5 -> 1
+    assert business.get_top_crossdb_user_connections(1, 3) == [{"name": "Ann"}, {"name": "Bo"}]
+    assert connections == [([4, 2, 3], ("name",))]
+
+
+def test_unknown_user_has_no_connections(connections, monkeypatch):
+    monkeypatch.setattr(business, "get_user_by_id", lambda uid: None)
+    assert business.get_top_crossdb_user_connections(1, 3) is None
+    assert connections == []
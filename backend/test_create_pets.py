@@ -0,0 +1,48 @@
+"""
+Unit tests for the pet intake and adoption writes across the three
+stores. The store writers are replaced with fakes. Run with `python -m pytest test_create_pets.py`.
+"""
+import pytest
+
+core = pytest.importorskip("function_.core_functions")
+
+
+@pytest.fixture
+def stores(monkeypatch):
+    calls = {}
+
+    def add_pets_bulk(records):
+        return [{"id": 100 + i, "name": r["name"], "breed": r.get("breed"),
+                 "shelter_id": r.get("shelter_id"), "status": r.get("status", "available")}
+                for i, r in enumerate(records)]
+
+    def insert_pet_profiles_bulk(profiles):
+        calls["profiles"] = list(profiles)
+        return {"inserted_ids": ["a", None, "c"],
+                "errors": [{"index": 1, "code": 121, "errmsg": "Document failed validation"}]}
+
+    monkeypatch.setattr(core, "add_pets_bulk", add_pets_bulk)
+    monkeypatch.setattr(core, "upsert_pets", lambda pets: calls.setdefault("graph", list(pets)))
+    monkeypatch.setattr(core, "insert_pet_profiles_bulk", insert_pet_profiles_bulk)
+    return calls
+
+
+def test_create_pets_returns_profile_errors(stores):
+    records = [{"name": "Rex", "tags": ["calm"]}, {"name": "Bo"}, {"name": "Kit", "status": "adopted"}]
+    result = core.create_pets(records)
+    assert [pet["id"] for pet in result["pets"]] == [100, 101, 102]
+    assert result["profile_errors"] == [
+        {"pet_id": 101, "index": 1, "code": 121, "errmsg": "Document failed validation"}]
+    assert [p["available"] for p in stores["profiles"]] == [True, True, False]
+    # a record without tags leaves the graph tags alone
+    assert [p["tags"] for p in stores["graph"]] == [["calm"], None, None]
+
+
+def test_create_adoption_links_preference_tags_in_one_batch(monkeypatch):
+    batches = []
+    monkeypatch.setattr(core, "add_adoption", lambda u, p, notes: {"user_id": u, "pet_id": p})
+    monkeypatch.setattr(core, "create_adopted_relationship", lambda u, p: None)
+    monkeypatch.setattr(core, "get_liked_tags_by_user", lambda u: ["calm", "small"])
+    monkeypatch.setattr(core, "link_users_to_preference_tags", batches.append)
+    assert core.create_adoption(7, 3) == {"user_id": 7, "pet_id": 3}
+    assert batches == [[(7, "calm"), (7, "small")]]
@@ -0,0 +1,120 @@
+"""
+Unit tests for the rows the batched Neo4j writers send with UNWIND and how
+they are chunked into transactions. No server is needed.
+Run with `python -m pytest test_graph_rows.py`.
+"""
+import pytest
+
+graph = pytest.importorskip("queries.graph_queries")
+
+
+def test_likes_rows_drop_repeated_pairs():
+    rows = list(graph._likes_rows([(1, 10), [1, 10], (2, 10), (1, 11)]))
+    assert rows == [{"user_id": 1, "pet_id": 10}, {"user_id": 2, "pet_id": 10},
+                    {"user_id": 1, "pet_id": 11}]
+
+
+def test_likes_rows_accept_a_generator():
+    assert list(graph._likes_rows((u, 5) for u in (3, 3, 4))) == [
+        {"user_id": 3, "pet_id": 5}, {"user_id": 4, "pet_id": 5}]
+
+
+def test_pet_rows_fill_optional_fields():
+    assert list(graph._pet_rows([{"pet_id": 1, "name": "Rex"}])) == [
+        {"pet_id": 1, "name": "Rex", "breed": None, "shelter_id": None, "tags": None}]
+
+
+@pytest.mark.parametrize("tags, expected", [
+    (None, None),               # keep the stored HAS_TAG edges
+    ([], []),                   # drop them all
+    (("calm", "small"), ["calm", "small"]),
+])
+def test_pet_rows_tags(tags, expected):
+    row, = graph._pet_rows([{"pet_id": 1, "name": "Rex", "breed": "Pug",
+                             "shelter_id": 2, "tags": tags}])
+    assert row["tags"] == expected
+    assert (row["breed"], row["shelter_id"]) == ("Pug", 2)
+
+
+def test_upsert_replaces_tags_only_when_given():
+    # stale HAS_TAG edges are deleted, and their tags lose the pet's likes,
+    # only for rows that carry a tag list
+    stale = graph._UPSERT_PETS.split("FOREACH (tag IN")[0].rsplit("FOREACH (stale", 1)[1]
+    assert "row.tags IS NULL THEN []" in stale
+    assert "WHERE NOT t.name IN row.tags" in stale
+    assert "t.like_count = coalesce(t.like_count, 0) - p.like_count" in stale
+    assert "DELETE stale" in stale
+
+
+def test_upsert_pet_sends_one_row(monkeypatch):
+    sent = []
+    monkeypatch.setattr(graph, "_write_batched",
+                        lambda query, rows, chunk_size: sent.append((query, list(rows))))
+    graph.upsert_pet(1, "Rex", tags=["calm"])
+    assert sent == [(graph._UPSERT_PETS, [{"pet_id": 1, "name": "Rex", "breed": None,
+                                           "shelter_id": None, "tags": ["calm"]}])]
+
+
+class FakeSession:
+    """Records each write transaction as the list of (query, params) it ran."""
+
+    def __init__(self):
+        self.transactions = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_write(self, work):
+        runs = []
+
+        class Tx:
+            def run(self, query, **params):
+                runs.append((query, params))
+
+                class Summary:
+                    def consume(self):
+                        return None
+                return Summary()
+
+        work(Tx())
+        self.transactions.append(runs)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    fake = FakeSession()
+
+    class Driver:
+        def session(self):
+            return fake
+
+    monkeypatch.setattr(graph, "_driver", lambda: Driver())
+    return fake
+
+
+def test_one_transaction_per_chunk(session):
+    sent = graph.create_friend_edges(((n, n + 1) for n in range(5)), chunk_size=2)
+    assert sent == 5
+    assert [len(runs) for runs in session.transactions] == [1, 1, 1]
+    assert [len(params["rows"]) for runs in session.transactions for _, params in runs] == [2, 2, 1]
+    assert session.transactions[0][0] == (graph._FRIEND_EDGES, {"rows": [
+        {"user_id1": 0, "user_id2": 1}, {"user_id1": 1, "user_id2": 2}]})
+
+
+@pytest.mark.parametrize("writer, query, row", [
+    (graph.create_likes_edges, graph._LIKES_EDGES, {"user_id": 1, "pet_id": 2}),
+    (graph.link_pets_to_tags, graph._PET_TAGS, {"pet_id": 1, "tag_name": 2}),
+    (graph.link_users_to_preference_tags, graph._PREFERENCE_TAGS, {"user_id": 1, "tag_name": 2}),
+    (graph.create_adopted_relationships, graph._ADOPTED_EDGES, {"user_id": 1, "pet_id": 2}),
+])
+def test_pair_writers_build_their_rows(session, writer, query, row):
+    assert writer([(1, 2)]) == 1
+    assert session.transactions == [[(query, {"rows": [row]})]]
+
+
+def test_nothing_to_write_runs_no_transaction(session):
+    assert graph.link_users_to_preference_tags([]) == 0
+    assert session.transactions == []
@@ -0,0 +1,46 @@
+"""
+Unit tests for the Neo4j constraint and index provisioning. The SHOW
+CONSTRAINTS / SHOW INDEXES reads are replaced with fakes, so no server is
+needed. Run with `python -m pytest test_graph_schema.py`.
+"""
+import logging
+
+import pytest
+
+graph = pytest.importorskip("queries.graph_queries")
+
+
+@pytest.fixture
+def schema(monkeypatch):
+    present = {"constraints": {}, "indexes": {}}
+    monkeypatch.setattr(graph, "get_graph_constraints", lambda: present["constraints"])
+    monkeypatch.setattr(graph, "get_graph_indexes", lambda: present["indexes"])
+    monkeypatch.setattr(graph, "_pets_without_like_count", lambda: 0)
+    return present
+
+
+def test_empty_graph_needs_everything(schema):
+    missing = dict(graph._missing_schema())
+    assert list(missing) == [name for name, _, _ in graph.GRAPH_CONSTRAINTS + graph.GRAPH_INDEXES]
+    assert missing["pet_id_unique"] == (
+        "CREATE CONSTRAINT pet_id_unique IF NOT EXISTS FOR (n:Pet) REQUIRE n.id IS UNIQUE")
+    assert missing["pet_like_count"] == (
+        "CREATE INDEX pet_like_count IF NOT EXISTS FOR (n:Pet) ON (n.like_count)")
+
+
+def test_existing_schema_is_matched_by_label_and_property(schema):
+    # names may differ from ours (e.g. created by hand); label/property decide
+    schema["constraints"] = {(label, prop): f"other_{name}"
+                             for name, label, prop in graph.GRAPH_CONSTRAINTS}
+    schema["indexes"] = {("Pet", "like_count"): "likes"}
+    assert [name for name, _ in graph._missing_schema()] == [
+        name for name, _, _ in graph.GRAPH_INDEXES if name != "pet_like_count"]
+
+
+def test_check_warns_once_per_missing_item(schema, caplog):
+    schema["constraints"] = {(label, prop): name for name, label, prop in graph.GRAPH_CONSTRAINTS}
+    schema["indexes"] = {(label, prop): name for name, label, prop in graph.GRAPH_INDEXES[1:]}
+    with caplog.at_level(logging.WARNING, logger=graph.__name__):
+        assert graph.check_graph_schema() == [graph.GRAPH_INDEXES[0][0]]
+    assert len(caplog.records) == 1
+    assert "manage.py graph-schema" in caplog.text
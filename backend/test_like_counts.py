@@ -0,0 +1,82 @@
+"""
+Unit tests for the maintained Neo4j like counters: the reconcile
+statements, the like_count backfill and its startup warning. The driver
+is replaced with a recording fake, so no server is needed.
+Run with `python -m pytest test_like_counts.py`.
+"""
+import logging
+
+import pytest
+
+graph = pytest.importorskip("queries.graph_queries")
+
+
+class Result:
+    def __init__(self, record):
+        self.record = record
+
+    def consume(self):
+        return None
+
+    def single(self):
+        return self.record
+
+
+class FakeSession:
+    def __init__(self, record):
+        self.record = record
+        self.queries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        self.queries.append(" ".join(query.split()))
+        return Result(self.record)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    fake = FakeSession({"liked": 3, "missing": 0})
+
+    class Driver:
+        def session(self):
+            return fake
+
+    monkeypatch.setattr(graph, "_driver", lambda: Driver())
+    return fake
+
+
+def test_reconcile_locks_each_node_before_counting(session):
+    assert graph.reconcile_like_counts() == 3
+    pets, breeds_merged, breeds, tags, liked = session.queries
+    for query, var in ((pets, "p"), (breeds, "b"), (tags, "t")):
+        assert query.index(f"SET {var}._lock = true") < query.index(f"SET {var}.like_count")
+        assert f"REMOVE {var}._lock" in query and "IN TRANSACTIONS" in query
+    assert "MERGE (:Breed {name: breed})" in breeds_merged
+    # no separate reset: each breed is zeroed and recounted by one SET
+    assert not any("like_count = 0" in q for q in (pets, breeds_merged, breeds, tags))
+    assert "sum(coalesce(p.like_count, 0))" in breeds
+
+
+def test_check_warns_about_pets_without_like_count(monkeypatch, caplog):
+    monkeypatch.setattr(graph, "_missing_schema", lambda: [])
+    monkeypatch.setattr(graph, "_pets_without_like_count", lambda: 12)
+    with caplog.at_level(logging.WARNING, logger=graph.__name__):
+        assert graph.check_graph_schema() == []
+    assert "12 Pet nodes have no like_count" in caplog.text
+
+
+@pytest.mark.parametrize("missing, backfilled", [(5, True), (0, False)])
+def test_schema_bootstrap_backfills_like_counts(session, monkeypatch, missing, backfilled):
+    pytest.importorskip("neo4j")
+    reconciled = []
+    monkeypatch.setattr(graph, "_missing_schema", lambda: [])
+    monkeypatch.setattr(graph, "_pets_without_like_count", lambda: missing)
+    monkeypatch.setattr(graph, "reconcile_like_counts", lambda: reconciled.append(True))
+    report = graph.ensure_graph_schema()
+    assert ("like_count backfill" in report["created"]) is backfilled
+    assert bool(reconciled) is backfilled
@@ -0,0 +1,67 @@
+"""
+Unit tests for the chunked MongoDB bulk insert. No server is needed:
+`_bulk_insert` is driven with an in-memory collection.
+Run with `python -m pytest test_mongo_bulk.py`.
+"""
+import pytest
+
+mongo = pytest.importorskip("queries.mongo_db_queries")
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+
+class FakeCollection:
+    """
+    insert_many that assigns _id client-side like pymongo and rejects
+    documents with {"bad": True}, reporting them the way an unordered
+    insert does (index relative to the chunk).
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.stored = []
+
+    def insert_many(self, docs, ordered=True):
+        assert ordered is False
+        self.chunks.append(len(docs))
+        errors = []
+        for index, doc in enumerate(docs):
+            doc.setdefault("_id", ObjectId())
+            if doc.get("bad"):
+                errors.append({"index": index, "code": 11000, "errmsg": f"duplicate {doc['n']}"})
+            else:
+                self.stored.append(doc)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(docs) - len(errors)})
+
+
+def test_all_documents_inserted_in_chunks():
+    collection = FakeCollection()
+    docs = [{"n": n} for n in range(5)]
+    result = mongo._bulk_insert(collection, docs, chunk_size=2)
+    assert collection.chunks == [2, 2, 1]
+    assert result["errors"] == []
+    assert result["inserted_ids"] == [doc["_id"] for doc in docs]
+
+
+def test_errors_and_ids_align_with_the_input():
+    collection = FakeCollection()
+    docs = [{"n": n, "bad": n in (1, 4)} for n in range(6)]
+    result = mongo._bulk_insert(collection, docs, chunk_size=3)
+
+    # index 4 is the second document of the second chunk
+    assert [(e["index"], e["code"], e["errmsg"]) for e in result["errors"]] == [
+        (1, 11000, "duplicate 1"),
+        (4, 11000, "duplicate 4"),
+    ]
+    ids = result["inserted_ids"]
+    assert len(ids) == len(docs)
+    assert [i for i, inserted_id in enumerate(ids) if inserted_id is None] == [1, 4]
+    assert [ids[i] for i in (0, 2, 3, 5)] == [doc["_id"] for doc in collection.stored]
+
+
+def test_generator_input_and_empty_input():
+    collection = FakeCollection()
+    result = mongo._bulk_insert(collection, ({"n": n} for n in range(3)), chunk_size=10)
+    assert len(result["inserted_ids"]) == 3 and collection.chunks == [3]
+    assert mongo._bulk_insert(FakeCollection(), []) == {"inserted_ids": [], "errors": []}
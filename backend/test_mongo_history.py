@@ -0,0 +1,98 @@
+"""
+Unit tests for the token-paginated MongoDB history helpers. No server is
+needed: `_history_page` is driven with an in-memory collection.
+Run with `python -m pytest test_mongo_history.py`.
+"""
+from datetime import datetime
+
+import pytest
+
+mongo = pytest.importorskip("queries.mongo_db_queries")
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from queries.pagination import decode_token, encode_token
+
+
+class FakeCollection:
+    """Records find() calls and returns `docs` (already in sort order)."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+
+    def find(self, flt, projection=None, sort=None, limit=0):
+        self.calls.append({"filter": flt, "projection": projection, "sort": sort, "limit": limit})
+        return iter(self.docs[:limit] if limit else self.docs)
+
+
+def make_docs(n):
+    return [{"_id": ObjectId(), "pet_id": 7, "timestamp": f"2024-01-{day:02d}"}
+            for day in range(1, n + 1)]
+
+
+def test_sort_spec_breaks_ties_on_id():
+    assert mongo._sort_spec("timestamp", False) == [("timestamp", ASCENDING), ("_id", ASCENDING)]
+    assert mongo._sort_spec("timestamp", True) == [("timestamp", DESCENDING), ("_id", DESCENDING)]
+
+
+@pytest.mark.parametrize("value", ["2024-01-05", datetime(2024, 1, 5, 12, 30), 3, None])
+def test_position_round_trip(value):
+    doc = {"_id": ObjectId(), "date": value}
+    assert mongo._decode_position(mongo._encode_position(doc, "date")) == (value, doc["_id"])
+
+
+@pytest.mark.parametrize("position", [{}, {"key": 1}, {"id": "not-an-object-id", "key": 1}])
+def test_tampered_position_is_rejected(position):
+    with pytest.raises(ValueError):
+        mongo._decode_position(encode_token(position))
+
+
+def test_after_filter_seeks_past_the_token():
+    doc = {"_id": ObjectId(), "timestamp": "2024-01-05"}
+    token = mongo._encode_position(doc, "timestamp")
+    assert mongo._after_filter({"pet_id": 7}, "timestamp", token, False) == {
+        "pet_id": 7,
+        "$or": [
+            {"timestamp": {"$gt": "2024-01-05"}},
+            {"timestamp": "2024-01-05", "_id": {"$gt": doc["_id"]}},
+        ],
+    }
+    newest_first = mongo._after_filter({"pet_id": 7}, "timestamp", token, True)
+    assert newest_first["$or"][0] == {"timestamp": {"$lt": "2024-01-05"}}
+    assert mongo._after_filter({"pet_id": 7}, "timestamp", None, False) == {"pet_id": 7}
+
+
+def test_history_page_fetches_one_extra_and_builds_token():
+    docs = make_docs(3)
+    collection = FakeCollection(docs)
+    page, token = mongo._history_page(collection, {"pet_id": 7}, "timestamp", limit=2)
+    assert page == docs[:2]
+    assert collection.calls[0]["limit"] == 3
+    assert decode_token(token) == {"key": "2024-01-02", "id": str(docs[1]["_id"])}
+
+
+def test_history_last_page_has_no_token():
+    docs = make_docs(2)
+    page, token = mongo._history_page(FakeCollection(docs), {"pet_id": 7}, "timestamp", limit=2)
+    assert page == docs and token is None
+
+
+def test_history_page_limit_is_clamped():
+    collection = FakeCollection([])
+    mongo._history_page(collection, {}, "timestamp", limit=10 ** 6)
+    mongo._history_page(collection, {}, "timestamp", limit=0)
+    assert [call["limit"] for call in collection.calls] == [mongo.HISTORY_MAX_PAGE_SIZE + 1, 2]
+
+
+@pytest.mark.parametrize("projection, expected", [
+    (None, None),
+    (["reviewText"], {"reviewText": 1, "timestamp": 1, "_id": 1}),
+    ({"reviewText": 1, "_id": 0}, {"reviewText": 1, "timestamp": 1, "_id": 1}),
+    # exclusion projections must not gain inclusions, nor drop the sort keys
+    ({"picture": 0, "_id": 0}, {"picture": 0}),
+])
+def test_history_page_projection_keeps_sort_keys(projection, expected):
+    collection = FakeCollection([])
+    mongo._history_page(collection, {}, "timestamp", projection=projection)
+    assert collection.calls[0]["projection"] == expected
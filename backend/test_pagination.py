@@ -0,0 +1,83 @@
+"""
+Unit tests for the keyset-pagination tokens and the pet catalog helpers.
+No database is needed: run with `python -m pytest test_pagination.py`.
+"""
+import base64
+
+import pytest
+
+from queries.pagination import decode_token, encode_token
+
+
+@pytest.fixture
+def sql_queries():
+    # the catalog helpers live next to psycopg2 code; skip them without it
+    return pytest.importorskip("queries.sql_queries")
+
+
+def test_token_round_trip():
+    position = {"id": 42, "key": "2024-01-01T00:00:00"}
+    assert decode_token(encode_token(position)) == position
+
+
+def test_token_is_url_safe_and_unpadded():
+    token = encode_token({"id": 10 ** 12, "key": "??>>"})
+    assert "=" not in token
+    assert set(token) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+def test_token_does_not_depend_on_key_order():
+    assert encode_token({"a": 1, "b": 2}) == encode_token({"b": 2, "a": 1})
+
+
+@pytest.mark.parametrize("token", [
+    "",
+    "not base64!",
+    encode_token({"id": 1})[:-2],
+    base64.urlsafe_b64encode(b"[1, 2]").decode(),
+    base64.urlsafe_b64encode(b'"id"').decode(),
+])
+def test_malformed_tokens_are_rejected(token):
+    with pytest.raises(ValueError):
+        decode_token(token)
+
+
+def test_catalog_conditions_from_filters(sql_queries):
+    conditions = sql_queries._pet_catalog_conditions(
+        type_="dog", breed="Beagle", min_age=2, max_age=8, shelter_id=3)
+    assert conditions == [
+        ("status", "=", "available"),
+        ("type", "=", "dog"),
+        ("breed", "=", "Beagle"),
+        ("shelter_id", "=", 3),
+        ("age", ">=", 2),
+        ("age", "<=", 8),
+    ]
+
+
+def test_catalog_conditions_any_status(sql_queries):
+    assert sql_queries._pet_catalog_conditions(status=None) == []
+
+
+def test_catalog_conditions_seek_after_token(sql_queries):
+    conditions = sql_queries._pet_catalog_conditions(after=encode_token({"id": 17}))
+    assert conditions[-1] == ("id", ">", 17)
+
+
+@pytest.mark.parametrize("position", [{}, {"id": "17"}, {"id": 1.5}, {"key": 17}])
+def test_catalog_conditions_reject_tampered_token(sql_queries, position):
+    with pytest.raises(ValueError):
+        sql_queries._pet_catalog_conditions(after=encode_token(position))
+
+
+def test_catalog_page_with_more_rows(sql_queries):
+    rows = [{"id": i} for i in (3, 5, 8)]
+    page = sql_queries._catalog_page(rows, limit=2)
+    assert page["pets"] == [{"id": 3}, {"id": 5}]
+    assert decode_token(page["next_token"]) == {"id": 5}
+
+
+def test_catalog_last_page(sql_queries):
+    rows = [{"id": 3}, {"id": 5}]
+    assert sql_queries._catalog_page(rows, limit=2) == {"pets": rows, "next_token": None}
+    assert sql_queries._catalog_page([], limit=2) == {"pets": [], "next_token": None}
@@ -0,0 +1,136 @@
+"""
+Unit tests for the incremental pet rating stats: histogram keys, the $inc
+update, the rebuild pipeline's key expression and the drift check. No server
+is needed. Run with `python -m pytest test_rating_stats.py`.
+"""
+import pytest
+
+mongo = pytest.importorskip("queries.mongo_db_queries")
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+
+def evaluate(expr, doc):
+    """Evaluate the operators used by _HISTOGRAM_KEY_EXPR against `doc`."""
+    if isinstance(expr, str) and expr.startswith("$"):
+        value = doc
+        for part in expr[1:].split("."):
+            value = value[part]
+        return value
+    if not isinstance(expr, dict):
+        return expr
+    (op, args), = expr.items()
+    if op == "$replaceAll":
+        return evaluate(args["input"], doc).replace(args["find"], args["replacement"])
+    if op == "$toString":
+        value = evaluate(args, doc)
+        # like the server: doubles keep their fraction ("4.0"), longs do not
+        return repr(float(value)) if isinstance(value, float) else str(value)
+    if op == "$cond":
+        test, then, otherwise = args
+        return evaluate(then, doc) if evaluate(test, doc) else evaluate(otherwise, doc)
+    if op == "$eq":
+        return evaluate(args[0], doc) == evaluate(args[1], doc)
+    if op == "$trunc":
+        return float(int(evaluate(args, doc)))
+    if op == "$toLong":
+        return int(evaluate(args, doc))
+    raise NotImplementedError(op)
+
+
+@pytest.mark.parametrize("rating, key", [(4, "4"), (4.0, "4"), (4.5, "4_5"), (1.25, "1_25")])
+def test_histogram_key(rating, key):
+    assert mongo._histogram_key(rating) == key
+
+
+@pytest.mark.parametrize("rating", [1, 3, 4.0, 4.5, 5.0, 2.75])
+def test_rebuild_key_expression_matches_insert_key(rating):
+    doc = {"_id": {"pet_id": 1, "rating": rating}}
+    assert evaluate(mongo._HISTOGRAM_KEY_EXPR, doc) == mongo._histogram_key(rating)
+
+
+def test_rating_stats_update_folds_ratings():
+    assert mongo._rating_stats_update([4, 4.0, 2, 4.5]) == {
+        "$inc": {"sum": 14.5, "count": 4,
+                 "histogram.4": 2, "histogram.2": 1, "histogram.4_5": 1},
+        "$min": {"min": 2},
+        "$max": {"max": 4.5},
+    }
+
+
+def test_rating_stats_ops_group_by_pet_and_skip_non_numeric():
+    docs = [{"pet_id": 1, "rating": 5}, {"pet_id": 2, "rating": None},
+            {"pet_id": 1, "rating": 3}, {"pet_id": 3, "rating": "5"}]
+    assert mongo._rating_stats_ops(docs) == [
+        UpdateOne({"_id": 1}, mongo._rating_stats_update([5, 3]), upsert=True),
+    ]
+
+
+class FakeCollection:
+    def __init__(self, find=(), aggregate=(), fail_bulk_write=False, bad=()):
+        self._find, self._aggregate = list(find), list(aggregate)
+        self.fail_bulk_write, self.bad = fail_bulk_write, set(bad)
+        self.bulk_writes = []
+
+    def find(self, flt=None, projection=None):
+        return iter(self._find)
+
+    def aggregate(self, pipeline):
+        return iter(self._aggregate)
+
+    def insert_many(self, docs, ordered=True):
+        errors = []
+        for index, doc in enumerate(docs):
+            doc.setdefault("_id", ObjectId())
+            if doc["pet_id"] in self.bad:
+                errors.append({"index": index, "code": 121, "errmsg": "invalid"})
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+    def bulk_write(self, ops, ordered=True):
+        if self.fail_bulk_write:
+            raise PyMongoError("stats write failed")
+        self.bulk_writes.append(ops)
+
+
+class FakeDb:
+    def __init__(self, **collections):
+        self.__dict__.update(collections)
+
+
+def test_bulk_feedback_without_transactions_keeps_errors_and_survives_stats_failure(monkeypatch):
+    feedback = FakeCollection(bad={2})
+    stats = FakeCollection(fail_bulk_write=True)
+    monkeypatch.setattr(mongo, "_db", lambda: FakeDb(user_feedback=feedback, pet_rating_stats=stats))
+    monkeypatch.setattr(mongo, "_supports_transactions", lambda: False)
+
+    records = [{"user_id": 9, "pet_id": pet_id, "review_text": "", "rating": 4}
+               for pet_id in (1, 2, 3)]
+    result = mongo.insert_user_feedback_bulk(records, chunk_size=2)
+    assert [e["index"] for e in result["errors"]] == [1]
+    assert [i is None for i in result["inserted_ids"]] == [False, True, False]
+
+
+def test_verify_reports_histogram_drift(monkeypatch):
+    expected = {"_id": 1, "sum": 8, "count": 2, "min": 4, "max": 4, "histogram": {"4": 2}}
+    stored = [
+        {"_id": 1, "sum": 8, "count": 2, "min": 4, "max": 4, "histogram": {"4_0": 2}},
+        {"_id": 2, "sum": 5, "count": 1, "min": 5, "max": 5, "histogram": {"5": 1}},
+    ]
+    monkeypatch.setattr(mongo, "_db", lambda: FakeDb(
+        user_feedback=FakeCollection(aggregate=[expected]),
+        pet_rating_stats=FakeCollection(find=stored)))
+    drift = mongo.verify_rating_stats()
+    assert [row["pet_id"] for row in drift] == [1, 2]
+    assert drift[1]["expected"] is None
+
+
+def test_verify_ignores_empty_buckets(monkeypatch):
+    expected = {"_id": 1, "sum": 4.0, "count": 1, "min": 4, "max": 4, "histogram": {"4": 1}}
+    stored = [{"_id": 1, "sum": 4, "count": 1, "min": 4, "max": 4,
+               "histogram": {"4": 1, "3": 0}}]
+    monkeypatch.setattr(mongo, "_db", lambda: FakeDb(
+        user_feedback=FakeCollection(aggregate=[expected]),
+        pet_rating_stats=FakeCollection(find=stored)))
+    assert mongo.verify_rating_stats() == []
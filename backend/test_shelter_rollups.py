@@ -0,0 +1,78 @@
+"""
+Unit tests for the shelter report day normalisation and the weekly/monthly
+rollup updates. No server is needed.
+Run with `python -m pytest test_shelter_rollups.py`.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+mongo = pytest.importorskip("queries.mongo_db_queries")
+from pymongo import UpdateOne
+
+
+def report(shelter_id, day, occupancy, intake=0, adoptions=0):
+    return mongo._shelter_report_doc(shelter_id, day, occupancy, None, intake, adoptions)
+
+
+@pytest.mark.parametrize("value", [
+    "2024-03-14",
+    "2024-03-14T17:45:00",
+    date(2024, 3, 14),
+    datetime(2024, 3, 14, 23, 59, 59, 999),
+    datetime(2024, 3, 15, 1, 0, tzinfo=timezone(timedelta(hours=2))),
+])
+def test_report_day_is_naive_utc_midnight(value):
+    assert mongo._report_day(value) == datetime(2024, 3, 14)
+
+
+def test_period_start():
+    thursday = datetime(2024, 3, 14)
+    assert mongo._period_start(thursday, "week") == datetime(2024, 3, 11)
+    assert mongo._period_start(datetime(2024, 3, 11), "week") == datetime(2024, 3, 11)
+    assert mongo._period_start(thursday, "month") == datetime(2024, 3, 1)
+
+
+def test_rollups_for_one_report():
+    ops = mongo._rollup_updates([report(1, "2024-03-14", 40, intake=3, adoptions=2)])
+    inc = {"days": 1, "occupancy_sum": 40, "intake": 3, "adoptions": 2}
+    assert ops == [
+        UpdateOne({"_id": "1:week:2024-03-11"}, {
+            "$setOnInsert": {"shelter_id": 1, "period": "week", "start": datetime(2024, 3, 11)},
+            "$inc": inc, "$min": {"occupancy_min": 40}, "$max": {"occupancy_max": 40},
+        }, upsert=True),
+        UpdateOne({"_id": "1:month:2024-03-01"}, {
+            "$setOnInsert": {"shelter_id": 1, "period": "month", "start": datetime(2024, 3, 1)},
+            "$inc": inc, "$min": {"occupancy_min": 40}, "$max": {"occupancy_max": 40},
+        }, upsert=True),
+    ]
+
+
+def test_rollups_fold_reports_per_shelter_and_period():
+    ops = mongo._rollup_updates([
+        report(1, "2024-03-29", 40, intake=1),   # week of 03-25, March
+        report(1, "2024-04-01", 30, intake=2),   # week of 04-01, April
+        report(1, "2024-04-02", 50, adoptions=4),
+        report(2, "2024-04-02", 10),
+    ])
+    updates = {op._filter["_id"]: op._doc for op in ops}
+    assert sorted(updates) == [
+        "1:month:2024-03-01", "1:month:2024-04-01",
+        "1:week:2024-03-25", "1:week:2024-04-01",
+        "2:month:2024-04-01", "2:week:2024-04-01",
+    ]
+    april = updates["1:month:2024-04-01"]
+    assert april["$inc"] == {"days": 2, "occupancy_sum": 80, "intake": 2, "adoptions": 4}
+    assert april["$min"] == {"occupancy_min": 30} and april["$max"] == {"occupancy_max": 50}
+    assert updates["1:week:2024-03-25"]["$inc"]["days"] == 1
+
+
+def test_rollups_skip_non_numeric_values():
+    ops = mongo._rollup_updates([report(1, "2024-03-14", "n/a", intake=None, adoptions="2")])
+    week = ops[0]._doc
+    assert week["$inc"] == {"days": 1, "occupancy_sum": 0, "intake": 0, "adoptions": 0}
+    assert "$min" not in week and "$max" not in week
+
+
+def test_no_reports_no_updates():
+    assert mongo._rollup_updates([]) == []
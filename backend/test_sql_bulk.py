@@ -0,0 +1,80 @@
+"""
+Unit tests for the multi-row SQL bulk inserts: record normalisation,
+chunking and the order of the returned rows. No database is needed:
+run with `python -m pytest test_sql_bulk.py`.
+"""
+from contextlib import contextmanager
+
+import pytest
+
+sql_queries = pytest.importorskip("queries.sql_queries")
+
+
+class FakeCursor:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def inserts(monkeypatch):
+    """execute_values stand-in that hands out ids and returns rows shuffled."""
+    chunks = []
+    next_id = iter(range(1, 10 ** 6))
+
+    def execute_values(cur, query, chunk, page_size, fetch):
+        assert fetch and page_size == len(chunk)
+        chunks.append(list(chunk))
+        returned = [{"id": next(next_id), "values": values} for values in chunk]
+        return returned[::-1]     # RETURNING order is not guaranteed
+
+    class Connection:
+        def cursor(self):
+            return FakeCursor()
+
+    @contextmanager
+    def get_connection(readonly=False):
+        assert not readonly
+        yield Connection()
+
+    monkeypatch.setattr(sql_queries, "execute_values", execute_values)
+    monkeypatch.setattr(sql_queries, "get_connection", get_connection)
+    return chunks
+
+
+def test_rows_come_back_in_input_order_across_chunks(inserts):
+    rows = [(f"user{n}", f"u{n}@example.com", "hash", "adopter") for n in range(5)]
+    inserted = sql_queries.add_users_bulk(rows, chunk_size=2)
+    assert [len(chunk) for chunk in inserts] == [2, 2, 1]
+    assert [row["values"] for row in inserted] == rows
+    assert [row["id"] for row in inserted] == [1, 2, 3, 4, 5]
+
+
+def test_pet_records_map_type_and_default_status(inserts):
+    sql_queries.add_pets_bulk([
+        {"name": "Rex", "age": 3, "type_": "dog", "breed": "Pug", "gender": "m", "shelter_id": 1},
+        ("Kit", 1, "cat", None, "f", 2, "adopted"),
+        ("Bo", 2, "dog", "Lab", "m", 1),
+    ])
+    assert inserts == [[
+        ("Rex", 3, "dog", "Pug", "m", 1, "available"),
+        ("Kit", 1, "cat", None, "f", 2, "adopted"),
+        ("Bo", 2, "dog", "Lab", "m", 1, "available"),
+    ]]
+
+
+def test_adoption_notes_default_to_none(inserts):
+    sql_queries.add_adoptions_bulk([{"user_id": 1, "pet_id": 2}, (3, 4, "home visit ok")])
+    assert inserts == [[(1, 2, None), (3, 4, "home visit ok")]]
+
+
+def test_missing_required_field_is_an_error():
+    with pytest.raises(KeyError):
+        sql_queries._record_values({"name": "Ann"}, ("name", "email"))
+
+
+def test_nothing_to_insert_opens_no_connection(monkeypatch):
+    monkeypatch.setattr(sql_queries, "get_connection", None)
+    assert sql_queries.add_shelters_bulk([]) == []
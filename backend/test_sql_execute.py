@@ -0,0 +1,121 @@
+"""
+Unit tests for how the read queries are sent to PostgreSQL: the prepared
+execution mode (with its %s -> $n placeholder rewrite) and the pipelined
+json_agg batch. No database is needed: run with `python -m pytest test_sql_execute.py`.
+"""
+from contextlib import contextmanager
+
+import pytest
+
+sql_queries = pytest.importorskip("queries.sql_queries")
+from psycopg2 import sql
+
+
+def render(query):
+    """Render a psycopg2.sql composition without a server connection."""
+    if isinstance(query, str):
+        return query
+    if isinstance(query, sql.Composed):
+        return "".join(render(part) for part in query.seq)
+    if isinstance(query, sql.Identifier):
+        return ".".join(f'"{s}"' for s in query.strings)
+    if isinstance(query, sql.Placeholder):
+        return "%s"
+    return query.string
+
+
+class FakeConnection:
+    def __init__(self):
+        self.prepared = set()
+
+
+class FakeCursor:
+    def __init__(self, connection=None, row=None):
+        self.connection = connection or FakeConnection()
+        self.row = row
+        self.executed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.executed.append((render(query), params))
+
+    def fetchone(self):
+        return self.row
+
+
+@pytest.fixture
+def mode(monkeypatch):
+    return lambda value: monkeypatch.setattr(sql_queries, "EXECUTION_MODE", value)
+
+
+QUERY = """
+    SELECT id FROM pets
+     WHERE id = ANY(%s) AND status = %s;
+"""
+
+
+def test_simple_mode_sends_the_query_as_is(mode):
+    mode("simple")
+    cur = FakeCursor()
+    sql_queries._execute(cur, "pets", QUERY, ([1, 2], "available"), ("integer[]", "text"))
+    assert cur.executed == [(QUERY, ([1, 2], "available"))]
+    assert cur.connection.prepared == set()
+
+
+def test_prepared_mode_rewrites_placeholders_once_per_connection(mode):
+    mode("prepared")
+    cur = FakeCursor()
+    params = ([1, 2], "available")
+    sql_queries._execute(cur, "pets", QUERY, params, ("integer[]", "text"))
+    sql_queries._execute(cur, "pets", QUERY, params, ("integer[]", "text"))
+
+    prepare, (first, first_params), (second, _) = cur.executed
+    assert prepare == ('PREPARE "pets" (integer[], text) AS SELECT id FROM pets\n'
+                       '     WHERE id = ANY($1) AND status = $2', None)
+    assert first == second == 'EXECUTE "pets" (%s, %s);'
+    assert first_params == params
+    assert cur.connection.prepared == {"pets"}
+
+
+def test_prepared_mode_prepares_again_on_a_new_connection(mode):
+    mode("prepared")
+    for _ in range(2):
+        cur = FakeCursor()
+        sql_queries._execute(cur, "pets", QUERY, ([1], "available"), ("integer[]", "text"))
+        assert cur.executed[0][0].startswith('PREPARE "pets"')
+
+
+def test_pipelined_statements_share_one_round_trip(monkeypatch):
+    cur = FakeCursor(row={"r0": [{"id": 1}], "r1": []})
+
+    class Connection:
+        def cursor(self):
+            return cur
+
+    @contextmanager
+    def get_connection(readonly=False):
+        assert readonly
+        yield Connection()
+
+    monkeypatch.setattr(sql_queries, "get_connection", get_connection)
+    result = sql_queries.run_pipelined([
+        ("SELECT id FROM pets WHERE breed = %s;", ("Pug",)),
+        ("SELECT id FROM users WHERE id = %s", (9,)),
+    ])
+    assert result == [[{"id": 1}], []]
+    (query, params), = cur.executed
+    assert query == (
+        "SELECT (SELECT COALESCE(json_agg(q), '[]'::json) FROM "
+        "(SELECT id FROM pets WHERE breed = %s) q) AS \"r0\", "
+        "(SELECT COALESCE(json_agg(q), '[]'::json) FROM "
+        "(SELECT id FROM users WHERE id = %s) q) AS \"r1\";")
+    assert params == ["Pug", 9]
+
+
+def test_pipelined_nothing_is_no_query():
+    assert sql_queries.run_pipelined([]) == []
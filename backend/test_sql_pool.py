@@ -0,0 +1,140 @@
+"""
+Unit tests for the bounded PostgreSQL pool: waiting for a free slot, the
+checkout timeout and the health check. psycopg2's pool is replaced with an
+in-memory one, so no database is needed.
+Run with `python -m pytest test_sql_pool.py`.
+"""
+import threading
+import time
+
+import pytest
+
+sql_pool = pytest.importorskip("queries.sql_pool")
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+
+class FakeConnection:
+    def __init__(self, n):
+        self.n = n
+        self.closed = 0
+        self.status = TRANSACTION_STATUS_IDLE
+        self.fail_ping = False
+        self.pings = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def cursor(self):
+        conn = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, query):
+                conn.pings += 1
+                if conn.fail_ping:
+                    raise psycopg2.OperationalError("server closed the connection")
+        return Cursor()
+
+    def rollback(self):
+        pass
+
+
+class FakeThreadedPool:
+    """Hands out idle connections first and opens new ones on demand."""
+
+    def __init__(self, minconn, maxconn, **kwargs):
+        self.idle, self.opened, self.closed = [], 0, []
+
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop()
+        self.opened += 1
+        return FakeConnection(self.opened)
+
+    def putconn(self, conn, close=False):
+        if close:
+            conn.closed = 1
+            self.closed.append(conn)
+        else:
+            self.idle.append(conn)
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    monkeypatch.setattr(sql_pool.pg_pool, "ThreadedConnectionPool", FakeThreadedPool)
+    return lambda maxconn=1, **kwargs: sql_pool.ConnectionPool(1, maxconn, **kwargs)
+
+
+def test_checkout_times_out_when_the_pool_is_full(make_pool):
+    pool = make_pool(maxconn=1, timeout=0.01)
+    pool.getconn()
+    with pytest.raises(sql_pool.PoolExhausted):
+        pool.getconn()
+    stats = pool.stats()
+    assert (stats["checkouts"], stats["timeouts"], stats["in_use"]) == (1, 1, 1)
+
+
+def test_checkout_waits_for_a_returned_connection(make_pool):
+    pool = make_pool(maxconn=1, timeout=5)
+    conn = pool.getconn()
+    releaser = threading.Timer(0.05, pool.putconn, (conn,))
+    releaser.start()
+    assert pool.getconn() is conn
+    releaser.join()
+    stats = pool.stats()
+    assert stats["waits"] == 1 and stats["max_wait_seconds"] >= 0.04
+    assert stats["in_use"] == 1
+
+
+def test_recently_used_connection_is_not_pinged(make_pool):
+    pool = make_pool(ping_after=60)
+    conn = pool.getconn()
+    assert conn.pings == 1          # never used before: pinged once
+    pool.putconn(conn)
+    assert pool.getconn() is conn and conn.pings == 1
+
+
+def test_idle_connection_is_pinged_and_dropped_when_dead(make_pool):
+    pool = make_pool(ping_after=0)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.fail_ping = True
+    fresh = pool.getconn()
+    assert fresh is not conn and conn.closed
+    assert pool.stats()["discarded"] == 1
+
+
+def test_connection_left_in_a_transaction_is_discarded(make_pool):
+    pool = make_pool(ping_after=60)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.status = TRANSACTION_STATUS_INTRANS
+    assert pool.getconn() is not conn
+    assert pool._pool.closed == [conn]
+
+
+def test_failed_checkout_gives_the_slot_back(make_pool):
+    pool = make_pool(maxconn=1, timeout=0.01)
+
+    def refuse():
+        raise psycopg2.OperationalError("could not connect")
+
+    pool._pool.getconn = refuse
+    with pytest.raises(psycopg2.OperationalError):
+        pool.getconn()
+    assert pool._slots.acquire(timeout=0.01)
+
+
+def test_closed_connection_is_not_returned_to_the_pool(make_pool):
+    pool = make_pool()
+    conn = pool.getconn()
+    conn.closed = 2
+    pool.putconn(conn)
+    assert pool._pool.closed == [conn] and pool._pool.idle == []
+    assert pool.stats()["in_use"] == 0
@@ -0,0 +1,78 @@
+"""
+Unit tests for the pet_supply_counts read path and the migration that
+creates it. No database is needed: run with `python -m pytest test_supply_counts.py`.
+"""
+from contextlib import contextmanager
+
+import pytest
+
+sql_queries = pytest.importorskip("queries.sql_queries")
+from psycopg2 import errors
+
+from db.migrate import discover_migrations
+
+
+class FakeCursor:
+    def __init__(self, rows=(), error=None):
+        self.rows, self.error = list(rows), error
+        self.executed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.executed.append(query)
+        if self.error:
+            raise self.error
+
+    def fetchall(self):
+        return self.rows
+
+
+def fake_connection(cursor):
+    class Connection:
+        def cursor(self):
+            return cursor
+
+    @contextmanager
+    def get_connection(readonly=False):
+        yield Connection()
+    return get_connection
+
+
+def test_supply_counts_by_breed(monkeypatch):
+    cursor = FakeCursor([{"breed": "Pug", "supply_count": 3}, {"breed": None, "supply_count": 1}])
+    monkeypatch.setattr(sql_queries, "get_connection", fake_connection(cursor))
+    assert sql_queries.get_available_pets_count_by_breed() == {"Pug": 3, None: 1}
+    assert "FROM pet_supply_counts" in cursor.executed[0]
+
+
+def test_missing_supply_counts_table_says_to_migrate(monkeypatch):
+    cursor = FakeCursor(error=errors.UndefinedTable('relation "pet_supply_counts" does not exist'))
+    monkeypatch.setattr(sql_queries, "get_connection", fake_connection(cursor))
+    with pytest.raises(RuntimeError, match="manage.py migrate"):
+        sql_queries.get_available_pets_count_by_breed()
+
+
+def test_supply_counts_migration_is_discovered_in_order():
+    migrations = discover_migrations()
+    versions = [version for version, _, _ in migrations]
+    assert versions == sorted(versions)
+    assert (4, "pet_supply_counts") in [(version, name) for version, name, _ in migrations]
+
+
+def test_supply_counts_triggers_cover_every_write():
+    migration = next(path for version, _, path in discover_migrations() if version == 4)
+    text = migration.read_text(encoding="utf-8")
+    for event in ("INSERT", "UPDATE", "DELETE", "TRUNCATE"):
+        assert f"AFTER {event} ON pets" in text
+
+
+def test_duplicate_migration_versions_are_rejected(tmp_path):
+    (tmp_path / "0001_a.sql").write_text("")
+    (tmp_path / "01_b.sql").write_text("")
+    with pytest.raises(ValueError):
+        discover_migrations(tmp_path)
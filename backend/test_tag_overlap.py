@@ -0,0 +1,115 @@
+"""
+Unit tests for the server-side tag-overlap scoring. The aggregation is
+run by a small evaluator over in-memory profiles, so no server is needed.
+Run with `python -m pytest test_tag_overlap.py`.
+"""
+import pytest
+
+mongo = pytest.importorskip("queries.mongo_db_queries")
+
+
+def evaluate(expr, doc):
+    """Evaluate the expression operators used by the overlap $project."""
+    if isinstance(expr, str) and expr.startswith("$"):
+        return doc.get(expr[1:])
+    if isinstance(expr, list):
+        return [evaluate(e, doc) for e in expr]
+    if not isinstance(expr, dict):
+        return expr
+    (op, args), = expr.items()
+    if op == "$ifNull":
+        value = evaluate(args[0], doc)
+        return evaluate(args[1], doc) if value is None else value
+    if op == "$setIntersection":
+        first, *rest = evaluate(args, doc)
+        return [v for v in dict.fromkeys(first) if all(v in other for other in rest)]
+    if op == "$size":
+        return len(evaluate(args, doc))
+    raise NotImplementedError(op)
+
+
+def matches(doc, match):
+    for field, cond in match.items():
+        value = doc.get(field)
+        values = value if isinstance(value, list) else [value]
+        if "$in" in cond and not any(v in cond["$in"] for v in values):
+            return False
+        if "$nin" in cond and any(v in cond["$nin"] for v in values):
+            return False
+    return True
+
+
+def run_pipeline(docs, pipeline):
+    for stage in pipeline:
+        (op, spec), = stage.items()
+        if op == "$match":
+            docs = [d for d in docs if matches(d, spec)]
+        elif op == "$project":
+            docs = [{field: d[field] if rule == 1 else evaluate(rule, d)
+                     for field, rule in spec.items() if rule != 0} for d in docs]
+        elif op == "$sort":
+            for field, direction in reversed(list(spec.items())):
+                docs = sorted(docs, key=lambda d: d[field], reverse=direction < 0)
+        elif op == "$limit":
+            docs = docs[:spec]
+        else:
+            raise NotImplementedError(op)
+    return docs
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return iter(run_pipeline(self.docs, pipeline))
+
+
+class FakeDb:
+    def __init__(self, profiles):
+        self.pet_profiles = profiles
+
+
+PROFILES = [
+    {"pet_id": 1, "tags": ["calm", "small"]},
+    {"pet_id": 2, "tags": ["calm", "small", "playful"]},
+    {"pet_id": 3, "tags": ["playful"]},
+    {"pet_id": 4, "tags": ["small", "calm", "calm"]},
+    {"pet_id": 5, "tags": None},
+    {"pet_id": 6},
+]
+
+
+@pytest.fixture
+def profiles(monkeypatch):
+    collection = FakeCollection(PROFILES)
+    monkeypatch.setattr(mongo, "_db", lambda: FakeDb(collection))
+    return collection
+
+
+def test_best_overlap_first_ties_by_pet_id(profiles):
+    assert mongo.get_top_pets_by_tag_overlap(["calm", "small", "playful"], limit=3) == [
+        {"pet_id": 2, "score": 3},
+        {"pet_id": 1, "score": 2},
+        {"pet_id": 4, "score": 2},     # a repeated tag counts once
+    ]
+
+
+def test_excluded_pets_are_skipped(profiles):
+    result = mongo.get_top_pets_by_tag_overlap(["calm", "playful"], exclude_pet_ids={2, 4})
+    assert result == [{"pet_id": 1, "score": 1}, {"pet_id": 3, "score": 1}]
+
+
+def test_top_k_is_sorted_and_limited_on_the_server(profiles):
+    mongo.get_top_pets_by_tag_overlap(("calm",), limit=2)
+    stages = [next(iter(stage)) for stage in profiles.pipelines[0]]
+    assert stages == ["$match", "$project", "$sort", "$limit"]
+    assert profiles.pipelines[0][-1] == {"$limit": 2}
+
+
+@pytest.mark.parametrize("tags, limit", [([], 5), (["calm"], 0)])
+def test_nothing_to_score_sends_no_query(profiles, tags, limit):
+    assert mongo.get_top_pets_by_tag_overlap(tags, limit=limit) == []
+    assert profiles.pipelines == []